@@ -0,0 +1,100 @@
+"""
+Conditional GET (ETag / Last-Modified) for catalog pages.
+
+Validators are built from catalog versions that the signals in
+``caching.signals`` already maintain: tag versions and scope generations
+are ``time_ns`` stamps of the last write, so the newest one doubles as the
+``Last-Modified`` time. Checking them costs a shared-cache lookup; a
+matching request gets a 304 before any template or row is loaded.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+
+def _visitor_state(request):
+    # per-visitor parts of the page: login, cart badge and CSRF secret; the
+    # latter two as the response leaves them (their cookies may be re-issued)
+    user = getattr(request, 'user', None)
+    cart = getattr(request, 'cart', None)
+    return (
+        str(user.pk) if user is not None and user.is_authenticated else '',
+        str(cart.count) if cart is not None else '',
+        request.META.get('CSRF_COOKIE', ''),
+    )
+
+
+def validators(request, versions):
+    """``(etag, last_modified)`` of a page built from catalog ``versions``."""
+    versions = sorted(versions)
+    raw = '|'.join((
+        ','.join(map(str, versions)),
+        get_language() or settings.LANGUAGE_CODE,
+        'xhr' if request.headers.get('x-requested-with') == 'XMLHttpRequest' else 'html',
+        *_visitor_state(request),
+    ))
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    last_modified = versions[-1] // 1_000_000_000 if versions else None
+    return etag, last_modified
+
+
+def _checkable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # flash messages are shown once; a cached copy would hide them
+    return not len(messages.get_messages(request))
+
+
+def stamp(request, response, versions):
+    """Add the validators of ``versions`` to a 200/304 ``response``."""
+    etag, last_modified = validators(request, versions)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    # let browsers keep the page but revalidate it on every visit
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie', 'X-Requested-With'))
+    return response
+
+
+def not_modified(request, versions):
+    """A 304 response when the client's copy of the page is current, else ``None``."""
+    if not _checkable(request):
+        return None
+    etag, last_modified = validators(request, versions)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        stamp(request, response, versions)
+    return response
+
+
+def conditional_catalog(versions_func):
+    """
+    View decorator: answer GETs with 304 while ``versions_func(request,
+    *args, **kwargs)`` (an iterable of catalog versions) is unchanged.
+
+    The versions are left on ``request._catalog_versions`` so the page cache
+    can validate its hits the same way.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _checkable(request):
+                return view(request, *args, **kwargs)
+            versions = list(versions_func(request, *args, **kwargs))
+            response = not_modified(request, versions)
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                request._catalog_versions = versions
+                stamp(request, response, versions)
+            return response
+        return wrapper
+    return decorator
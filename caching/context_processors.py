@@ -0,0 +1,8 @@
+from .donuts import collecting, placeholder
+
+
+def donut_holes(request):
+    # overrides the built-in csrf processor so cached pages carry no token
+    if collecting(request):
+        return {'csrf_token': placeholder('csrf_token')}
+    return {}
@@ -0,0 +1,52 @@
+"""
+Donut holes: per-visitor snippets punched out of cached pages.
+
+While a page is rendered for the anonymous page cache, each hole renders as
+a placeholder; the middleware fills them in for every visitor after the
+cache lookup. Placeholders only use ``[a-z_]`` so autoescaping and attribute
+quoting leave them intact.
+"""
+from django.middleware.csrf import get_token
+from django.utils.html import escape
+
+_fillers = {}
+
+
+def placeholder(name):
+    return f'__donut_{name}__'
+
+
+def register(name):
+    def decorator(func):
+        _fillers[name] = func
+        return func
+    return decorator
+
+
+def filler(name):
+    return _fillers[name]
+
+
+def collecting(request):
+    """True while ``request`` renders a page destined for the page cache."""
+    return getattr(request, '_donut_holes', False)
+
+
+def fill(request, content):
+    for name, func in _fillers.items():
+        marker = placeholder(name).encode()
+        if marker in content:
+            content = content.replace(marker, escape(func(request)).encode())
+    return content
+
+
+@register('csrf_token')
+def _csrf_token(request):
+    return get_token(request)
+
+
+@register('cart_count')
+def _cart_count(request):
+    cart = getattr(request, 'cart', None)
+    count = cart.count if cart is not None else 0
+    return str(count) if count else ''
@@ -0,0 +1,30 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+from .tiered import catalog_cache
+
+
+def fragment_key(scope, **params):
+    """
+    Cache key of a rendered listing fragment.
+
+    The key embeds the catalog generation of ``scope`` (bumped on every
+    product/design change) and the active language, so stale fragments are
+    never looked up again and simply age out of the cache.
+    """
+    lang = (get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    raw = '|'.join(f'{name}={params[name] if params[name] is not None else ""}' for name in sorted(params))
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'fragment:{scope}:{catalog_cache.generation(scope)}:{lang}:{digest}'
+
+
+def get_fragment(key):
+    return catalog_cache.get(key)
+
+
+def set_fragment(key, payload):
+    timeout = getattr(settings, 'CATALOG_CACHE', {}).get('FRAGMENT_TIMEOUT')
+    catalog_cache.set(key, payload, timeout=timeout)
+    return payload
@@ -0,0 +1,103 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.translation import get_language
+
+from . import conditional, donuts
+from .tiered import catalog_cache
+
+PAGE_SCOPE = 'pages'
+
+
+def _options():
+    return getattr(settings, 'PAGE_CACHE', {})
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Full-page cache for anonymous GETs of the views in ``PAGE_CACHE['VIEWS']``.
+
+    Pages are keyed by language, path and (sorted) query parameters, cached
+    only when every parameter is listed in ``PAGE_CACHE['PARAMS']``, and
+    versioned by the ``pages`` generation, which catalog and review changes bump. Per-visitor snippets
+    (CSRF token, cart badge) are cached as donut holes and filled per request.
+    Must come after the session, auth and messages middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._cacheable_request(request):
+            return self.get_response(request)
+
+        key = self._key(request)
+        cached = catalog_cache.get(key)
+        if cached is not None:
+            # entries cached before validators were stored have no versions
+            content_type, content, *versions = cached
+            versions = versions[0] if versions else None
+            if versions is not None:
+                response = conditional.not_modified(request, versions)
+                if response is not None:
+                    return response
+            response = HttpResponse(donuts.fill(request, content), content_type=content_type)
+            if versions is not None:
+                conditional.stamp(request, response, versions)
+            response['X-Page-Cache'] = 'hit'
+            return response
+
+        request._donut_holes = True
+        response = self.get_response(request)
+        request._donut_holes = False
+        if self._cacheable_response(request, response):
+            catalog_cache.set(
+                key, (response['Content-Type'], response.content, getattr(request, '_catalog_versions', None)),
+                timeout=_options().get('TIMEOUT', 120),
+            )
+            response['X-Page-Cache'] = 'miss'
+        if not response.streaming:
+            response.content = donuts.fill(request, response.content)
+            versions = getattr(request, '_catalog_versions', None)
+            if versions is not None:
+                # filling may have issued the CSRF secret the validator covers
+                conditional.stamp(request, response, versions)
+        return response
+
+    def _cacheable_request(self, request):
+        if request.method != 'GET' or request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return False
+        # resolve first: the user and message checks below read the session
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        if match.url_name not in _options().get('VIEWS', ()):
+            return False
+        # junk query strings (?x=1, ?x=2, ...) would each add an entry and
+        # cull the shared cache's version keys; pages render them uncached
+        params = _options().get('PARAMS', ())
+        if any(name not in params for name in request.GET):
+            return False
+        if request.user.is_authenticated:
+            return False
+        # len() peeks at pending messages without marking them as read
+        return not len(messages.get_messages(request))
+
+    def _cacheable_response(self, request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.session.modified
+        )
+
+    def _key(self, request):
+        # parameters in a fixed order, so ?a=1&b=2 and ?b=2&a=1 share an entry
+        query = urlencode(sorted((name, value) for name, values in request.GET.lists() for value in values))
+        path = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+        return f'page:{catalog_cache.generation(PAGE_SCOPE)}:{get_language()}:{path}'
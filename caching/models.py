@@ -0,0 +1,21 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter of catalog writes, bumped in the same transaction as
+    the write itself. Workers compare it with the version of their in-memory
+    catalog snapshot (see ``caching.snapshot``).
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Catalog version')
+        verbose_name_plural = _('Catalog version')
+        db_table = 'catalog_version'
+
+    def __str__(self):
+        return f"catalog v{self.version}"
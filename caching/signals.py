@@ -0,0 +1,64 @@
+from django.db.models.signals import post_delete, post_save
+
+from designs.models import AssetImage, DesignAsset, DesignCategory, DesignReview
+from orders.models import Order, OrderItem
+from products.models import Category, Product, Review
+
+from .snapshot import bump_catalog_version
+from .tiered import catalog_cache
+
+
+def _product_tags(pk):
+    return (f'product:{pk}', 'products')
+
+
+def _category_tags(pk):
+    # listing rows carry the category name, so products go stale as well
+    return (f'category:{pk}', 'categories', 'products')
+
+
+def _design_tags(pk):
+    return (f'design:{pk}', 'designs')
+
+
+def _design_category_tags(pk):
+    return (f'design-category:{pk}', 'design-categories', 'designs')
+
+
+def _order_tags(pk):
+    return (f'order:{pk}', 'orders')
+
+
+def _connect(model, tags_for, get_pk=lambda instance: instance.pk, generations=()):
+    def handler(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        pk = get_pk(instance)
+        if pk is not None:
+            catalog_cache.invalidate(*tags_for(pk))
+        if generations:
+            # retires every cached fragment / page built from this data at once
+            catalog_cache.bump_generation(*generations)
+            # every data generation is also part of the in-memory snapshot
+            bump_catalog_version()
+
+    uid = f'catalog-cache-{model._meta.label_lower}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}-save')
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}-delete')
+
+
+for _model, _tags, _generations in (
+    (Product, _product_tags, ('products', 'pages')),
+    (Category, _category_tags, ('products', 'pages')),
+    (DesignAsset, _design_tags, ('designs', 'pages')),
+    (DesignCategory, _design_category_tags, ('designs', 'pages')),
+):
+    _connect(_model, _tags, generations=_generations)
+    _connect(_model._parler_meta.root_model, _tags, lambda instance: instance.master_id, _generations)
+
+_connect(AssetImage, _design_tags, lambda instance: instance.asset_id, ('designs', 'pages'))
+# reviews change the rating stats stored on the reviewed object
+_connect(Review, lambda pk: (f'product:{pk}',), lambda instance: instance.product_id, ('pages',))
+_connect(DesignReview, lambda pk: (f'design:{pk}',), lambda instance: instance.asset_id, ('pages',))
+_connect(Order, _order_tags)
+_connect(OrderItem, _order_tags, lambda instance: instance.order_id)
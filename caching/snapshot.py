@@ -0,0 +1,281 @@
+"""
+Opt-in, per-process snapshot of the active catalog (``CATALOG_SNAPSHOT``).
+
+A snapshot holds, per card language, the listing rows of active products and
+design assets as read-only ``__slots__`` rows in every listing order, the
+sidebar categories and the "bought together" lists. Views serve listings,
+slug lookups and related blocks from it without queries; the model instance
+behind a detail page is loaded on demand (through ``catalog_cache``).
+
+Freshness comes from :class:`~caching.models.CatalogVersion`: catalog writes
+bump it in their own transaction, workers compare it with their snapshot at
+most every ``CHECK_INTERVAL`` seconds and swap in a rebuilt snapshot when it
+moved. Requests keep using the previous snapshot while one is being built.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone, translation
+
+from designs.cards import CARD_FIELDS as DESIGN_CARD_FIELDS, design_cards
+from designs.models import DesignCategory
+from products.cards import (
+    CARD_FIELDS as PRODUCT_CARD_FIELDS, CARD_ORDERINGS, card_languages, current_card_language, product_cards,
+)
+from products.managers import prefetch_translations
+from products.models import Category
+from recommendations.models import CoPurchase
+
+from .models import CatalogVersion
+
+logger = logging.getLogger(__name__)
+
+VERSION_PK = 1
+
+
+def _options():
+    return getattr(settings, 'CATALOG_SNAPSHOT', {})
+
+
+def enabled():
+    return bool(_options().get('ENABLED', False))
+
+
+def current_version():
+    return CatalogVersion.objects.filter(pk=VERSION_PK).values_list('version', flat=True).first() or 0
+
+
+def bump_catalog_version():
+    """Count a catalog write; call inside the writing transaction. No-op unless snapshots are on."""
+    if not enabled():
+        return
+    rows = CatalogVersion.objects.filter(pk=VERSION_PK)
+    if rows.update(version=F('version') + 1, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            CatalogVersion.objects.create(pk=VERSION_PK, version=1)
+    except IntegrityError:
+        # created concurrently
+        rows.update(version=F('version') + 1, updated_at=timezone.now())
+
+
+# -- rows --------------------------------------------------------------------
+
+class Row:
+    """Immutable listing row; reads like the card ``.values()`` dicts it stands in for."""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+    @property
+    def pk(self):
+        return self.id
+
+
+class ProductRow(Row):
+    __slots__ = PRODUCT_CARD_FIELDS
+
+
+class DesignRow(Row):
+    __slots__ = (*DESIGN_CARD_FIELDS, 'type_label')
+
+
+class CategoryRow(Row):
+    __slots__ = ('id', 'name')
+
+
+class DesignCategoryRow(Row):
+    __slots__ = ('id', 'slug', 'type', 'name', 'type_display')
+
+    def get_type_display(self):
+        return self.type_display
+
+
+def _ordered(rows, ordering):
+    rows = list(rows)
+    # stable sorts from the last key to the first give the combined order
+    for field in reversed(ordering):
+        rows.sort(key=attrgetter(field.lstrip('-')), reverse=field.startswith('-'))
+    return tuple(rows)
+
+
+class Listing:
+    """Active rows of one kind in one language, plus what the detail pages need."""
+
+    __slots__ = ('orderings', 'by_object', 'categories', 'details', 'related', 'hot_deals', 'object_field')
+
+    def __init__(self, rows, object_field, categories, related):
+        self.object_field = object_field
+        self.orderings = {sort: _ordered(rows, ordering) for sort, ordering in CARD_ORDERINGS.items()}
+        self.by_object = {getattr(row, object_field): row for row in rows}
+        self.categories = tuple(categories)
+        self.details = {row.slug: row for row in rows}
+        self.related = related
+        self.hot_deals = tuple(row for row in self.orderings['newest'] if row.discount >= 10)
+
+    def select(self, sort=None, min_price=None, max_price=None):
+        """Rows in ``sort`` order within the price range (on the discounted price)."""
+        rows = self.orderings.get(sort or 'newest', self.orderings['newest'])
+        if min_price is None and max_price is None:
+            return rows
+        return [
+            row for row in rows
+            if (min_price is None or row.final_price >= min_price)
+            and (max_price is None or row.final_price <= max_price)
+        ]
+
+    @staticmethod
+    def facet_counts(rows, *fields):
+        """Same shape as :func:`products.cards.facet_counts`."""
+        return Counter(tuple(getattr(row, field) for field in fields) for row in rows)
+
+    def detail(self, slug):
+        """Row of the active object at ``slug``, or ``None``."""
+        return self.details.get(slug)
+
+    def related_rows(self, pk, category_field, category_id, limit=8):
+        """Bought-together rows of ``pk``, or the category's newest without order history."""
+        rows = [self.by_object[target] for target in self.related.get(pk, ()) if target in self.by_object]
+        rows = [row for row in rows if getattr(row, self.object_field) != pk][:limit]
+        if rows:
+            return rows
+        return [
+            row for row in self.orderings['newest']
+            if getattr(row, category_field) == category_id and getattr(row, self.object_field) != pk
+        ][:limit]
+
+
+class CatalogSnapshot:
+    __slots__ = ('version', 'products', 'designs', 'built_at')
+
+    def __init__(self, version, products, designs):
+        self.version = version
+        self.products = products
+        self.designs = designs
+        self.built_at = time.time()
+
+    def product_listing(self, language_code=None):
+        return self.products[current_card_language(language_code)]
+
+    def design_listing(self, language_code=None):
+        return self.designs[current_card_language(language_code)]
+
+
+# -- building ----------------------------------------------------------------
+
+def _related(kind):
+    related = defaultdict(list)
+    for source, target in CoPurchase.objects.filter(kind=kind).order_by('source_id', 'rank').values_list('source_id', 'target_id'):
+        related[source].append(target)
+    return {source: tuple(targets) for source, targets in related.items()}
+
+
+def _name(obj, code):
+    return obj.safe_translation_getter('name', language_code=code, any_language=True) or ''
+
+
+def _product_listing(code, related):
+    rows = [ProductRow(*values) for values in product_cards(code).filter(is_active=True).values_list(*PRODUCT_CARD_FIELDS)]
+    categories = prefetch_translations(list(Category.objects.all()), code)
+    return Listing(rows, 'product_id', [CategoryRow(cat.pk, _name(cat, code)) for cat in categories], related)
+
+
+def _design_listing(code, related):
+    rows = [
+        DesignRow(*values)
+        for values in design_cards(code).filter(is_active=True).values_list(*DESIGN_CARD_FIELDS, 'type_label')
+    ]
+    with translation.override(code):
+        categories = list(DesignCategory.objects.all())
+        category_rows = sorted(
+            (DesignCategoryRow(cat.pk, cat.slug, cat.type, _name(cat, code), str(cat.get_type_display()))
+             for cat in prefetch_translations(categories, code)),
+            key=lambda cat: (cat.type, cat.name.lower()),
+        )
+    return Listing(rows, 'asset_id', category_rows, related)
+
+
+def build_snapshot(version):
+    products, designs = _related('product'), _related('design')
+    return CatalogSnapshot(
+        version,
+        {code: _product_listing(code, products) for code in card_languages()},
+        {code: _design_listing(code, designs) for code in card_languages()},
+    )
+
+
+class SnapshotHolder:
+    """
+    The worker's current snapshot. Readers take ``current()`` once per
+    request and never lock; rebuilds swap the reference in one assignment.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def current(self):
+        """The snapshot to serve from, or ``None`` when disabled (callers query the DB)."""
+        if not enabled():
+            return None
+        snapshot = self._snapshot
+        interval = _options().get('CHECK_INTERVAL', 1.0)
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < interval:
+            return snapshot
+        self._checked_at = now
+        # read before the data, so a snapshot never claims a newer version than its rows
+        version = current_version()
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        # with a snapshot to fall back on, one thread rebuilds and the others keep serving
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is snapshot or self._snapshot.version != version:
+                started = time.monotonic()
+                self._snapshot = build_snapshot(version)
+                logger.info('Catalog snapshot v%s built in %.2fs', version, time.monotonic() - started)
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def preload(self):
+        """Build the snapshot up front (worker start) instead of on the first request."""
+        try:
+            return self.current()
+        except Exception:
+            # e.g. migrations not applied yet; the first request retries
+            logger.exception('Could not preload the catalog snapshot')
+            return None
+
+    def reset(self):
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+
+catalog_snapshot = SnapshotHolder()
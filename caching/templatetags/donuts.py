@@ -0,0 +1,16 @@
+from django import template
+
+from ..donuts import collecting, filler, placeholder
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def donut(context, name):
+    """Per-visitor value ``name``; a placeholder while rendering for the page cache."""
+    request = context.get('request')
+    if request is None:
+        return ''
+    if collecting(request):
+        return placeholder(name)
+    return filler(name)(request)
@@ -0,0 +1,236 @@
+import pickle
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from designs.models import DesignAsset, DesignCategory
+from products import views
+from products.models import Category, Product
+
+from .snapshot import catalog_snapshot
+from .tiered import LRUCache, TieredCache, catalog_cache
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_entries=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        self.cache = TieredCache(alias='shared', max_entries=10)
+
+    def test_tiers_and_counters(self):
+        self.assertIsNone(self.cache.get('k'))
+        self.cache.set('k', 'v', tags=('product:1',))
+        self.assertEqual(self.cache.get('k'), 'v')
+        self.cache.local.clear()
+        self.assertEqual(self.cache.get('k'), 'v')
+        stats = self.cache.stats()
+        self.assertEqual((stats['misses'], stats['local_hits'], stats['shared_hits']), (1, 1, 1))
+
+    def test_invalidate_by_tag(self):
+        self.cache.set('a', 1, tags=('product:1', 'lang:ru'))
+        self.cache.set('b', 2, tags=('product:2',))
+        self.cache.invalidate('product:1')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), 2)
+
+
+class CatalogInvalidationTests(TestCase):
+    def test_category_change_refreshes_store_sidebar(self):
+        Category.objects.create(name="Laptops")
+        self.client.get(reverse('store'))
+        self.assertIsNotNone(catalog_cache.get('store-categories:ru'))
+        Category.objects.create(name="Monitors")
+        self.assertContains(self.client.get(reverse('store')), "Monitors")
+
+    def test_product_save_refreshes_detail(self):
+        cat = Category.objects.create(name="Laptops")
+        product = Product.objects.create(category=cat, name="Old name", price=Decimal('1.00'), slug="p")
+        self.assertContains(self.client.get(reverse('product_detail', args=['p'])), "Old name")
+        product.name = "New name"
+        product.save()
+        self.assertContains(self.client.get(reverse('product_detail', args=['p'])), "New name")
+
+    def test_stats_endpoint_requires_superuser(self):
+        self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 302)
+        admin = get_user_model().objects.create_superuser(email="root@example.com", password="pw")
+        self.client.force_login(admin)
+        self.assertIn('hit_ratio', self.client.get(reverse('cache_stats')).json())
+
+
+class GridFragmentTests(TestCase):
+    XHR = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+    def setUp(self):
+        self.cat = Category.objects.create(name="Laptops")
+        self.product = Product.objects.create(category=self.cat, name="Alpha", price=Decimal('2.00'), slug="alpha")
+
+    def test_repeated_page_served_without_queries(self):
+        first = self.client.get(reverse('store'), {'page_size': 9}, **self.XHR).json()
+        with self.assertNumQueries(0):
+            again = self.client.get(reverse('store'), {'page_size': 9}, **self.XHR).json()
+        self.assertEqual(first, again)
+        self.assertIn("Alpha", again['html'])
+
+    def test_product_save_bumps_generation(self):
+        self.client.get(reverse('store'), **self.XHR)
+        self.product.name = "Beta"
+        self.product.save()
+        self.assertIn("Beta", self.client.get(reverse('store'), **self.XHR).json()['html'])
+
+    def test_fragments_are_per_language(self):
+        self.client.get('/en/store/', **self.XHR)
+        ru = self.client.get('/store/', **self.XHR).json()
+        self.assertIn("сум", ru['html'])
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cat = Category.objects.create(name="Laptops")
+        self.product = Product.objects.create(category=cat, name="Alpha", price=Decimal('2.00'), slug="alpha")
+
+    def test_second_anonymous_get_is_a_hit_with_fresh_csrf_token(self):
+        first = self.client.get(reverse('about'))
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        second = self.client.get(reverse('about'))
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertNotIn(b'__donut_', second.content)
+        self.assertIn(b'name="csrfmiddlewaretoken"', second.content)
+
+    def test_cart_badge_is_filled_per_visitor(self):
+        self.client.get(reverse('store'))
+        self.client.post(reverse('add_to_cart'), {'product_id': self.product.pk, 'qty': 3})
+        response = self.client.get(reverse('store'))
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, '<span id="nav-cart-count" class="badge badge-pill badge-primary">3</span>', html=False)
+
+    def test_unknown_query_parameters_bypass(self):
+        self.client.get(reverse('store'), {'x': '1'})
+        self.assertFalse(self.client.get(reverse('store'), {'x': '1'}).has_header('X-Page-Cache'))
+        self.client.get(reverse('store') + '?sort=price&page=1')
+        self.assertEqual(self.client.get(reverse('store') + '?page=1&sort=price')['X-Page-Cache'], 'hit')
+
+    def test_authenticated_users_bypass(self):
+        user = get_user_model().objects.create_user(email="u@example.com", password="pw")
+        self.client.force_login(user)
+        self.client.get(reverse('about'))
+        self.assertFalse(self.client.get(reverse('about')).has_header('X-Page-Cache'))
+
+    def test_product_change_retires_cached_pages(self):
+        self.client.get(reverse('product_detail', args=['alpha']))
+        self.product.name = "Beta"
+        self.product.save()
+        response = self.client.get(reverse('product_detail', args=['alpha']))
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, "Beta")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name="Laptops")
+        self.product = Product.objects.create(category=self.cat, name="Alpha", price=Decimal('2.00'), slug="alpha")
+
+    def test_repeat_visit_gets_304_without_queries(self):
+        url = reverse('product_detail', args=['alpha'])
+        first = self.client.get(url)
+        self.assertTrue(first.has_header('Last-Modified'))
+        self.assertIn('no-cache', first['Cache-Control'])
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_page_cache_hits_are_validated(self):
+        first = self.client.get(reverse('store'))
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        response = self.client.get(reverse('store'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_xhr_grid_has_its_own_validator(self):
+        page = self.client.get(reverse('store'))
+        xhr = self.client.get(reverse('store'), HTTP_X_REQUESTED_WITH='XMLHttpRequest', HTTP_IF_NONE_MATCH=page['ETag'])
+        self.assertEqual(xhr.status_code, 200)
+        again = self.client.get(reverse('store'), HTTP_X_REQUESTED_WITH='XMLHttpRequest', HTTP_IF_NONE_MATCH=xhr['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_changes_invalidate_the_validator(self):
+        url = reverse('product_detail', args=['alpha'])
+        etag = self.client.get(url)['ETag']
+        self.product.name = "Beta"
+        self.product.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('add_to_cart'), {'product_id': self.product.pk})
+        # the navbar cart badge is part of the page
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CATALOG_SNAPSHOT={'ENABLED': True, 'CHECK_INTERVAL': 3600})
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name="Laptops")
+        self.cheap = Product.objects.create(category=self.cat, name="Cheap", price=Decimal('2.00'), slug="cheap")
+        self.dear = Product.objects.create(category=self.cat, name="Dear", price=Decimal('9.00'), slug="dear", discount=20)
+        catalog_snapshot.preload()
+
+    def test_listing_and_detail_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('store'), {'sort': '-price', 'max_price': '8'})
+        self.assertEqual([row.slug for row in response.context['products']], ['dear', 'cheap'])
+        self.assertEqual(response.context['category_facets'][0][1], 2)
+        # detail objects are not held in the snapshot: loaded once, then cached
+        self.assertEqual(views._cached_product('cheap', 'ru'), self.cheap)
+        with self.assertNumQueries(0):
+            self.assertEqual(views._cached_product('cheap', 'ru'), self.cheap)
+            self.assertIn('dear', [row.slug for row in self.client.get(reverse('home')).context['products']])
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            views._cached_product('missing', 'ru')
+
+    def test_marketplace_and_asset_detail(self):
+        dcat = DesignCategory.objects.create(name="Rooms", type="interior")
+        asset = DesignAsset.objects.create(category=dcat, name="Loft", price=Decimal('3.00'), slug="loft")
+        catalog_snapshot.reset()
+        catalog_snapshot.preload()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('designs:marketplace'), {'type': 'interior'})
+        self.assertEqual([row.asset_id for row in response.context['assets']], [asset.pk])
+        self.assertEqual(response.context['type_facets'], {'interior': 1})
+        self.assertContains(self.client.get(reverse('designs:asset_detail', args=['loft'])), "Loft")
+
+    def test_details_are_compact_rows(self):
+        listing = catalog_snapshot.current().product_listing('ru')
+        self.assertIs(listing.detail('cheap'), listing.by_object[self.cheap.pk])
+        self.assertFalse(hasattr(listing.detail('cheap'), '__dict__'))
+
+    def test_rows_are_read_only(self):
+        row = catalog_snapshot.current().product_listing('ru').by_object[self.cheap.pk]
+        with self.assertRaises(AttributeError):
+            row.name = "Other"
+        self.assertEqual(pickle.loads(pickle.dumps(row)).name, "Cheap")
+
+    @override_settings(CATALOG_SNAPSHOT={'ENABLED': True, 'CHECK_INTERVAL': 0})
+    def test_catalog_write_swaps_the_snapshot(self):
+        before = catalog_snapshot.current()
+        self.cheap.name = "Renamed"
+        self.cheap.save()
+        after = catalog_snapshot.current()
+        self.assertGreater(after.version, before.version)
+        self.assertEqual(after.product_listing('ru').detail('cheap').name, "Renamed")
+        self.assertEqual(before.product_listing('ru').detail('cheap').name, "Cheap")
+        with self.assertNumQueries(1):
+            self.assertIs(catalog_snapshot.current(), after)
+
+    def test_disabled_by_default(self):
+        with override_settings(CATALOG_SNAPSHOT={}):
+            self.assertIsNone(catalog_snapshot.current())
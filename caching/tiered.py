@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import get_language
+
+_MISSING = object()
+TAG_PREFIX = 'tag:'
+GENERATION_PREFIX = 'gen:'
+
+
+class LRUCache:
+    """Bounded, thread-safe in-process LRU (the first cache tier)."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Entry:
+    __slots__ = ('value', 'versions', 'expires')
+
+    def __init__(self, value, versions, expires):
+        self.value = value
+        self.versions = versions
+        self.expires = expires
+
+    def __getstate__(self):
+        return (self.value, self.versions, self.expires)
+
+    def __setstate__(self, state):
+        self.value, self.versions, self.expires = state
+
+
+class TieredCache:
+    """
+    Two-tier cache: a per-process LRU in front of a shared Django cache.
+
+    Every entry remembers the version of each of its tags. Tag versions live
+    in the shared tier only, so ``invalidate('product:42')`` issued by any
+    worker makes all entries tagged with it stale everywhere.
+    """
+
+    def __init__(self, alias='default', max_entries=1024, timeout=300, prefix='tc:'):
+        self.alias = alias
+        self.timeout = timeout
+        self.prefix = prefix
+        self.local = LRUCache(max_entries)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = dict(local_hits=0, shared_hits=0, misses=0, stale=0, sets=0, invalidations=0)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            data = dict(self._stats)
+        lookups = data['local_hits'] + data['shared_hits'] + data['misses']
+        data['hit_ratio'] = round((data['local_hits'] + data['shared_hits']) / lookups, 4) if lookups else 0.0
+        data['local_entries'] = len(self.local)
+        return data
+
+    def _tag_versions(self, tags, create=False):
+        keys = {TAG_PREFIX + tag: tag for tag in tags}
+        found = self.shared.get_many(list(keys))
+        versions = {}
+        for key, tag in keys.items():
+            version = found.get(key)
+            if version is None and create:
+                version = time.time_ns()
+                # tags must outlive the entries that reference them
+                if not self.shared.add(key, version, None):
+                    version = self.shared.get(key, version)
+            versions[tag] = version
+        return versions
+
+    def _fresh(self, entry, versions=None):
+        if entry.expires is not None and entry.expires < time.time():
+            return False
+        if not entry.versions:
+            return True
+        if versions is None:
+            versions = self._tag_versions(entry.versions)
+        return all(versions.get(tag) == version for tag, version in entry.versions.items())
+
+    def get(self, key, default=None):
+        entry = self.local.get(key)
+        tier = 'local_hits'
+        if entry is None:
+            entry = self.shared.get(self.prefix + key)
+            tier = 'shared_hits'
+        if entry is None:
+            self._count('misses')
+            return default
+        if not self._fresh(entry):
+            self.local.delete(key)
+            self._count('stale')
+            self._count('misses')
+            return default
+        if tier == 'shared_hits':
+            self.local.set(key, entry)
+        self._count(tier)
+        return entry.value
+
+    def get_many(self, keys):
+        """
+        ``{key: value}`` of the fresh entries among ``keys``. One shared read
+        for the entries missing locally and one for all their tag versions.
+        """
+        entries, tiers, missing = {}, {}, []
+        for key in keys:
+            entry = self.local.get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                entries[key], tiers[key] = entry, 'local_hits'
+        if missing:
+            found = self.shared.get_many([self.prefix + key for key in missing])
+            for key in missing:
+                entry = found.get(self.prefix + key)
+                if entry is not None:
+                    entries[key], tiers[key] = entry, 'shared_hits'
+        tags = {tag for entry in entries.values() for tag in entry.versions}
+        versions = self._tag_versions(tags) if tags else {}
+        values = {}
+        for key in keys:
+            entry = entries.get(key)
+            if entry is None:
+                self._count('misses')
+                continue
+            if not self._fresh(entry, versions):
+                self.local.delete(key)
+                self._count('stale')
+                self._count('misses')
+                continue
+            if tiers[key] == 'shared_hits':
+                self.local.set(key, entry)
+            self._count(tiers[key])
+            values[key] = entry.value
+        return values
+
+    def set(self, key, value, tags=(), timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        entry = Entry(value, self._tag_versions(tags, create=True), time.time() + timeout)
+        self.local.set(key, entry)
+        self.shared.set(self.prefix + key, entry, timeout)
+        self._count('sets')
+
+    def get_or_set(self, key, default, tags=(), timeout=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            self.set(key, value, tags=tags, timeout=timeout)
+        return value
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(self.prefix + key)
+
+    def invalidate(self, *tags):
+        """Bump the version of ``tags``; entries carrying any of them become stale."""
+        if not tags:
+            return
+        version = time.time_ns()
+        self.shared.set_many({TAG_PREFIX + tag: version for tag in tags}, None)
+        self._count('invalidations')
+
+    def versions(self, *tags):
+        """``{tag: version}`` of ``tags``; versions are ``time_ns`` of the last invalidation."""
+        return self._tag_versions(tags, create=True)
+
+    def generation(self, scope):
+        """Current generation of ``scope``; fold it into keys to version them wholesale."""
+        key = GENERATION_PREFIX + scope
+        value = self.shared.get(key)
+        if value is None:
+            self.shared.add(key, time.time_ns(), None)
+            value = self.shared.get(key)
+        return value
+
+    def bump_generation(self, *scopes):
+        # a timestamp rather than incr(): backends may apply their default
+        # timeout on incr, and a reset counter would resurrect old keys
+        version = time.time_ns()
+        self.shared.set_many({GENERATION_PREFIX + scope: version for scope in scopes}, None)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def lang_tag(language_code=None):
+    return 'lang:%s' % (language_code or get_language() or settings.LANGUAGE_CODE)
+
+
+_options = getattr(settings, 'CATALOG_CACHE', {})
+catalog_cache = TieredCache(
+    alias=_options.get('ALIAS', 'default'),
+    max_entries=_options.get('MAX_ENTRIES', 1024),
+    timeout=_options.get('TIMEOUT', 300),
+)
@@ -0,0 +1,18 @@
+import os
+
+from django.contrib.auth.decorators import user_passes_test
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .tiered import catalog_cache
+
+
+def _is_superuser(user):
+    return user.is_authenticated and user.is_superuser
+
+
+@require_GET
+@user_passes_test(_is_superuser)
+def cache_stats(request):
+    """Hit/miss counters of the catalog cache in the worker serving this request."""
+    return JsonResponse({'pid': os.getpid(), **catalog_cache.stats()})
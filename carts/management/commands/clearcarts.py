@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from carts.store import purge_expired_carts
+
+
+class Command(BaseCommand):
+    help = 'Delete expired shopping carts (run periodically, like clearsessions)'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_carts()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired cart rows'))
@@ -0,0 +1,38 @@
+from django.conf import settings
+
+from .store import (
+    COOKIE_SALT, COUNT_COOKIE_SALT, CartStore, cookie_age, cookie_name, count_cookie_name,
+)
+
+
+class CartMiddleware:
+    """
+    Attach ``request.cart`` and keep the signed ``cart`` cookie in sync, plus
+    a signed ``cart_count`` cookie that lets pages render the cart badge
+    without touching the database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.cart = CartStore(request)
+        response = self.get_response(request)
+        cart = request.cart
+        if cart.cookie_action == 'delete':
+            response.delete_cookie(cookie_name(), samesite='Lax')
+            response.delete_cookie(count_cookie_name(), samesite='Lax')
+            return response
+        if cart.count_changed and cart.cart is None:
+            response.delete_cookie(count_cookie_name(), samesite='Lax')
+        elif cart.count_changed or cart.cookie_action == 'set':
+            # re-issuing the id cookie keeps it alive as long as the sliding cart expiry
+            self._set_cookie(response, cookie_name(), str(cart.cart.pk), COOKIE_SALT)
+            self._set_cookie(response, count_cookie_name(), cart.count_cookie_value(), COUNT_COOKIE_SALT)
+        return response
+
+    def _set_cookie(self, response, name, value, salt):
+        response.set_signed_cookie(
+            name, value, salt=salt, max_age=cookie_age(), httponly=True,
+            samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('donation_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Cart',
+                'verbose_name_plural': 'Carts',
+                'db_table': 'carts',
+            },
+        ),
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='carts.cart')),
+            ],
+            options={
+                'verbose_name': 'Cart item',
+                'verbose_name_plural': 'Cart items',
+                'db_table': 'cart_items',
+                'ordering': ['created_at', 'id'],
+                'unique_together': {('cart', 'key')},
+            },
+        ),
+    ]
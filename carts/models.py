@@ -0,0 +1,42 @@
+import uuid
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class Cart(models.Model):
+    """A shopping cart identified by the ``cart`` cookie instead of the session."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    donation_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # denormalized sum of line quantities, read by the navbar badge
+    item_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = _("Cart")
+        verbose_name_plural = _("Carts")
+        db_table = "carts"
+
+    def __str__(self):
+        return f"Cart {self.pk} ({self.item_count})"
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, related_name='items', on_delete=models.CASCADE)
+    # same "P:<id>" / "D:<id>" / "C:DONATION" keys the cart templates and JS use
+    key = models.CharField(max_length=64)
+    quantity = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Cart item")
+        verbose_name_plural = _("Cart items")
+        db_table = "cart_items"
+        ordering = ["created_at", "id"]
+        unique_together = (("cart", "key"),)
+
+    def __str__(self):
+        return f"{self.key} x{self.quantity}"
@@ -0,0 +1,213 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+COOKIE_SALT = 'carts.cart'
+COUNT_COOKIE_SALT = 'carts.count'
+_UNLOADED = object()
+
+
+def cookie_name():
+    return getattr(settings, 'CART_COOKIE_NAME', 'cart')
+
+
+def count_cookie_name():
+    return getattr(settings, 'CART_COUNT_COOKIE_NAME', 'cart_count')
+
+
+def cookie_age():
+    return getattr(settings, 'CART_COOKIE_AGE', 60 * 60 * 24 * 30)
+
+
+def _expiry():
+    return timezone.now() + timedelta(seconds=cookie_age())
+
+
+def purge_expired_carts():
+    return Cart.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+class CartStore:
+    """
+    Per-request handle on the visitor's cart row (``request.cart``).
+
+    Nothing is read until the cart is used and nothing is created until the
+    first write; every write touches only the affected line plus the
+    denormalized ``item_count``. Items are exposed as the ``{key: qty}``
+    mapping the session cart used to hold.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.cookie_action = None
+        # set when the ``cart_count`` cookie no longer matches the cart row
+        self.count_changed = False
+        self._cart = _UNLOADED
+        self._items = None
+
+    # -- loading -----------------------------------------------------------
+
+    def _cookie_id(self):
+        try:
+            value = self.request.get_signed_cookie(cookie_name(), default=None, salt=COOKIE_SALT)
+            return uuid.UUID(value) if value else None
+        except (signing.BadSignature, ValueError):
+            return None
+
+    @property
+    def cart(self):
+        if self._cart is _UNLOADED:
+            cart_id = self._cookie_id()
+            self._cart = None
+            if cart_id is not None:
+                self._cart = Cart.objects.filter(pk=cart_id, expires_at__gt=timezone.now()).first()
+            if self._cart is None:
+                self._import_session_cart()
+        return self._cart
+
+    def _cookie_count(self):
+        """Item count from the signed ``cart_count`` cookie, if it belongs to this cart."""
+        cart_id = self._cookie_id()
+        if cart_id is None:
+            return 0
+        try:
+            value = self.request.get_signed_cookie(count_cookie_name(), default=None, salt=COUNT_COOKIE_SALT)
+            owner, count = value.split(':', 1)
+            if owner == str(cart_id):
+                return max(0, int(count))
+        except (signing.BadSignature, AttributeError, ValueError):
+            pass
+        return None
+
+    def count_cookie_value(self):
+        return f'{self.cart.pk}:{self.count}'
+
+    def _import_session_cart(self):
+        # carts started before the cart table existed live in the session
+        session = getattr(self.request, 'session', None)
+        if session is None or settings.SESSION_COOKIE_NAME not in self.request.COOKIES:
+            return
+        legacy = session.get('cart')
+        if not isinstance(legacy, dict) or not legacy:
+            return
+        donation_price = session.get('donation_price')
+        cart = self._create(donation_price=donation_price)
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, key=key, quantity=max(1, int(qty))) for key, qty in legacy.items()],
+            ignore_conflicts=True,
+        )
+        self._refresh_count()
+        session.pop('cart', None)
+        session.pop('donation_price', None)
+
+    def _create(self, **fields):
+        self._cart = Cart.objects.create(expires_at=_expiry(), **fields)
+        self._items = {}
+        self.cookie_action = 'set'
+        return self._cart
+
+    def _ensure(self):
+        return self.cart or self._create()
+
+    # -- reading -----------------------------------------------------------
+
+    def items(self):
+        if self._items is None:
+            cart = self.cart
+            self._items = {} if cart is None else dict(
+                cart.items.order_by('created_at', 'id').values_list('key', 'quantity')
+            )
+        return dict(self._items)
+
+    def quantity(self, key):
+        return self.items().get(key, 0)
+
+    def __contains__(self, key):
+        return key in self.items()
+
+    def __bool__(self):
+        return bool(self.count)
+
+    @property
+    def count(self):
+        if self._cart is _UNLOADED:
+            # the navbar badge is rendered on every page; avoid the query
+            count = self._cookie_count()
+            if count is not None:
+                return count
+            self.count_changed = True
+        cart = self.cart
+        return cart.item_count if cart is not None else 0
+
+    @property
+    def donation_price(self):
+        cart = self.cart
+        return cart.donation_price if cart is not None else None
+
+    # -- writing -----------------------------------------------------------
+
+    def _write(self, key, qty, quantity):
+        """Update the ``key`` line to ``quantity`` (a value or expression), or create it with ``qty``."""
+        cart = self._ensure()
+        with transaction.atomic():
+            lines = CartItem.objects.filter(cart=cart, key=key)
+            if not lines.update(quantity=quantity):
+                try:
+                    with transaction.atomic():
+                        CartItem.objects.create(cart=cart, key=key, quantity=qty)
+                except IntegrityError:
+                    # a concurrent request created the line first
+                    lines.update(quantity=quantity)
+            self._refresh_count()
+
+    def add(self, key, qty=1):
+        self._write(key, qty, F('quantity') + qty)
+
+    def set(self, key, qty):
+        self._write(key, qty, qty)
+
+    def remove(self, key):
+        cart = self.cart
+        if cart is None:
+            return
+        with transaction.atomic():
+            CartItem.objects.filter(cart=cart, key=key).delete()
+            self._refresh_count()
+
+    def set_donation_price(self, value):
+        cart = self._ensure()
+        cart.donation_price = value
+        cart.expires_at = _expiry()
+        cart.save(update_fields=['donation_price', 'expires_at', 'updated_at'])
+
+    def clear(self):
+        cart = self.cart
+        if cart is not None:
+            cart.delete()
+        self._cart = None
+        self._items = {}
+        self.cookie_action = 'delete'
+
+    def _refresh_count(self):
+        total = (
+            CartItem.objects.filter(cart=OuterRef('pk'))
+            .values('cart')
+            .annotate(total=Sum('quantity'))
+            .values('total')
+        )
+        Cart.objects.filter(pk=self._cart.pk).update(
+            item_count=Coalesce(Subquery(total), 0),
+            expires_at=_expiry(),
+            updated_at=timezone.now(),
+        )
+        self._cart.refresh_from_db(fields=['item_count', 'expires_at'])
+        self._items = None
+        self.count_changed = True
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Category, Product
+
+from .models import Cart, CartItem
+from .store import CartStore
+
+
+class CartStoreTests(TestCase):
+    def setUp(self):
+        cat = Category.objects.create(name="Cat")
+        self.product = Product.objects.create(category=cat, name="Item", price=Decimal('2.00'), slug="item")
+        self.key = f"P:{self.product.pk}"
+
+    def add(self, qty=1):
+        return self.client.post(reverse('add_to_cart'), {'product_id': self.product.pk, 'qty': qty}).json()
+
+    def test_cart_lives_in_its_own_table_not_the_session(self):
+        self.assertEqual(self.add(2)['count'], 2)
+        self.assertEqual(self.add(3)['count'], 5)
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(CartItem.objects.get().quantity, 5)
+        self.assertEqual(self.client.get(reverse('cart_count')).json(), {'count': 5})
+
+    def test_count_comes_from_the_signed_cookie(self):
+        self.add(2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('cart_count')).json(), {'count': 2})
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(reverse('about')), '<span id="nav-cart-count" class="badge badge-pill badge-primary">2</span>')
+
+    def test_forged_count_cookie_falls_back_to_the_cart_row(self):
+        self.add(2)
+        self.client.cookies['cart_count'] = '99'
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('cart_count')).json(), {'count': 2})
+        self.assertIn('cart_count', self.client.cookies)
+
+    def test_update_and_remove(self):
+        self.add(2)
+        data = self.client.post(reverse('update_cart_item'), {'product_id': self.key, 'action': 'dec'}).json()
+        self.assertEqual((data['qty'], data['count']), (1, 1))
+        data = self.client.post(reverse('update_cart_item'), {'product_id': self.key, 'action': 'remove'}).json()
+        self.assertTrue(data['removed'])
+        self.assertEqual(Cart.objects.get().item_count, 0)
+
+    def test_set_survives_a_concurrently_created_line(self):
+        store = CartStore(RequestFactory().get('/'))
+        store.add(self.key, 7)
+        real_update = QuerySet.update
+        calls = []
+
+        def update(queryset, **kwargs):
+            calls.append(kwargs)
+            # the first lookup ran before the other request inserted the line
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update):
+            store.set(self.key, 3)
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+        self.assertEqual(store.count, 3)
+
+    def test_tampered_cookie_starts_a_new_cart(self):
+        self.add(1)
+        self.client.cookies['cart'] = 'not-a-signed-id'
+        self.assertEqual(self.client.get(reverse('cart_count')).json(), {'count': 0})
+
+    def test_expired_carts_are_ignored_and_purged(self):
+        self.add(1)
+        Cart.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.get(reverse('cart')).context['items'], [])
+        call_command('clearcarts', stdout=StringIO())
+        self.assertFalse(Cart.objects.exists())
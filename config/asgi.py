@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# build the catalog snapshot (if enabled) before the first request arrives
+from caching.snapshot import catalog_snapshot  # noqa: E402
+
+catalog_snapshot.preload()
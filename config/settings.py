@@ -35,6 +35,10 @@ INSTALLED_APPS = [
     'designs',
     'orders',
     'payment',
+    'search',
+    'caching',
+    'carts',
+    'recommendations',
     # 'rosetta',  # disabled
     'rest_framework',
 ]
@@ -50,6 +54,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'carts.middleware.CartMiddleware',
+    'caching.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -67,6 +73,7 @@ TEMPLATES = [
                 'django.template.context_processors.i18n',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'caching.context_processors.donut_holes',
             ],
         },
     },
@@ -89,6 +96,60 @@ DATABASES = {
     }
 }
 
+# Two cache aliases: 'default' is per-process (also used by parler), 'shared'
+# is visible to every worker and holds the catalog cache entries and tag
+# versions. Point CACHE_SHARED_BACKEND at DatabaseCache/Redis in production.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tech-store',
+    },
+    'shared': {
+        'BACKEND': config('CACHE_SHARED_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_SHARED_LOCATION', default=str(BASE_DIR / '.cache' / 'shared')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Tiered catalog cache (caching.tiered): in-process LRU in front of CACHES[ALIAS]
+CATALOG_CACHE = {
+    'ALIAS': 'shared',
+    'MAX_ENTRIES': config('CATALOG_CACHE_MAX_ENTRIES', default=1024, cast=int),
+    'TIMEOUT': config('CATALOG_CACHE_TIMEOUT', default=300, cast=int),
+    'FRAGMENT_TIMEOUT': config('CATALOG_FRAGMENT_TIMEOUT', default=600, cast=int),
+}
+
+# Carts (carts app): signed cookie naming the cart row, sliding expiry
+CART_COOKIE_NAME = 'cart'
+CART_COOKIE_AGE = config('CART_COOKIE_AGE', default=60 * 60 * 24 * 30, cast=int)
+
+# Anonymous full-page cache (caching.middleware); url names of cacheable views
+# and the query parameters they read (requests with any other one are not cached)
+PAGE_CACHE = {
+    'VIEWS': ('home', 'store', 'product_detail', 'about', 'news', 'public_offer'),
+    'PARAMS': ('category', 'q', 'sort', 'min_price', 'max_price', 'page', 'page_size', 'cursor', 'reviews_page'),
+    'TIMEOUT': config('PAGE_CACHE_TIMEOUT', default=120, cast=int),
+}
+
+# Per-worker in-memory catalog snapshot (caching.snapshot); when enabled,
+# listings and detail lookups are served from it and each worker checks the
+# catalog version row at most every CHECK_INTERVAL seconds
+CATALOG_SNAPSHOT = {
+    'ENABLED': config('CATALOG_SNAPSHOT', default=False, cast=bool),
+    'CHECK_INTERVAL': config('CATALOG_SNAPSHOT_CHECK_INTERVAL', default=1.0, cast=float),
+}
+
+# Search-box suggestions (search.suggest): results per query and how often
+# (seconds) each worker checks the catalog generations for changes
+SEARCH_SUGGEST = {
+    'LIMIT': 8,
+    'CHECK_INTERVAL': config('SEARCH_SUGGEST_CHECK_INTERVAL', default=1.0, cast=float),
+}
+
+# Widths (px) of the WebP/JPEG renditions built for catalog images (products.thumbnails)
+IMAGE_VARIANT_WIDTHS = (160, 320, 640, 1280)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
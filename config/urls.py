@@ -5,10 +5,12 @@ from django.conf.urls.i18n import i18n_patterns
 from django.http import HttpResponse
 from django.conf import settings
 from django.conf.urls.static import static
+from caching.views import cache_stats
 
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
     path('healthz/', lambda request: JsonResponse({'status': 'ok'})),
+    path('cache-stats/', cache_stats, name='cache_stats'),
 ]
 
 urlpatterns += i18n_patterns(
@@ -17,6 +19,7 @@ urlpatterns += i18n_patterns(
     path('designs/', include('designs.urls', namespace='designs')),
     path('orders/', include('orders.urls', namespace='orders')),
     path('payment/', include('payment.urls')),
+    path('search/', include('search.urls', namespace='search')),
     path('', include('products.urls')),  # do not prefix default 'ru' in URLs
     prefix_default_language=False,
 )
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    # Cache entries outlive the per-test database rollback.
+    from django.core.cache import caches
+    from caching.snapshot import catalog_snapshot
+    from caching.tiered import catalog_cache
+
+    for cache in caches.all():
+        cache.clear()
+    catalog_cache.local.clear()
+    catalog_cache.reset_stats()
+    catalog_snapshot.reset()
+    yield
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class DesignsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'designs'
-    verbose_name = 'Design Marketplace'
\ No newline at end of file
+    verbose_name = 'Design Marketplace'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+
+from products.cards import card_languages, current_card_language, translated
+
+from .models import DesignAsset, DesignCard, DesignCategory
+
+CARD_FIELDS = (
+    'id', 'asset_id', 'name', 'price', 'final_price', 'discount', 'slug', 'cover_image',
+    'category_id', 'category_slug', 'category_type', 'created_at',
+)
+
+
+def design_cards(language_code=None):
+    """Lightweight ``.values()`` rows for marketplace listings in one language."""
+    type_label = Case(
+        *[When(category_type=code, then=Value(str(label))) for code, label in DesignCategory.TYPE_CHOICES],
+        default=Value(''),
+        output_field=CharField(),
+    )
+    return (
+        DesignCard.objects.filter(language_code=current_card_language(language_code))
+        .annotate(type_label=type_label)
+        .values(*CARD_FIELDS, 'type_label')
+    )
+
+
+def build_design_cards(assets):
+    for asset in assets:
+        if not asset.translations.all():
+            continue
+        for code in card_languages():
+            yield DesignCard(
+                asset=asset,
+                language_code=code,
+                name=translated(asset, 'name', code) or '',
+                price=asset.price,
+                final_price=asset.final_price,
+                discount=asset.discount,
+                slug=asset.slug,
+                cover_image=asset.cover_image.name or '',
+                category_id=asset.category_id,
+                category_slug=asset.category.slug,
+                category_type=asset.category.type,
+                is_active=asset.is_active,
+                created_at=asset.created_at,
+            )
+
+
+def refresh_design_cards(pks):
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return 0
+    assets = (
+        DesignAsset.objects.filter(pk__in=pks)
+        .select_related('category')
+        .prefetch_related('translations')
+    )
+    cards = list(build_design_cards(assets))
+    with transaction.atomic():
+        DesignCard.objects.filter(asset_id__in=pks).delete()
+        DesignCard.objects.bulk_create(cards, batch_size=500)
+    return len(cards)
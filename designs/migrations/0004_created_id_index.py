@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0003_designassettranslation_designcategorytranslation_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='designasset',
+            index=models.Index(fields=['created_at', 'id'], name='designasset_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0005_designcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3, verbose_name='Average rating'),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Rating count'),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
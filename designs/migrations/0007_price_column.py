@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:29
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0006_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designasset',
+            name='final_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Final price'),
+        ),
+        migrations.AddField(
+            model_name='designasset',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Price'),
+        ),
+        migrations.AddField(
+            model_name='designcard',
+            name='final_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='designasset',
+            index=models.Index(fields=['is_active', 'category', 'final_price'], name='designasset_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='designcard',
+            index=models.Index(fields=['language_code', 'is_active', 'final_price'], name='designcard_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='designcard',
+            index=models.Index(fields=['language_code', 'category_slug', 'final_price'], name='designcard_cat_price_idx'),
+        ),
+    ]
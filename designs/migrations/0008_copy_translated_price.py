@@ -0,0 +1,46 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import migrations
+
+
+def _discounted(price, discount):
+    price = Decimal(price or 0)
+    if discount:
+        price = price * (100 - discount) / 100
+    return price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def copy_prices(apps, schema_editor):
+    """Keep the default language's price (or any translation's) as the asset price."""
+    DesignAsset = apps.get_model('designs', 'DesignAsset')
+    DesignAssetTranslation = apps.get_model('designs', 'DesignAssetTranslation')
+    DesignCard = apps.get_model('designs', 'DesignCard')
+    prices = {}
+    rows = DesignAssetTranslation.objects.order_by('pk').values_list('master_id', 'language_code', 'price')
+    for master_id, language_code, price in rows:
+        if master_id not in prices or language_code == settings.LANGUAGE_CODE:
+            prices[master_id] = price
+    for pk, discount in DesignAsset.objects.filter(pk__in=list(prices)).values_list('pk', 'discount'):
+        price = prices[pk] or Decimal('0')
+        final_price = _discounted(price, discount)
+        DesignAsset.objects.filter(pk=pk).update(price=price, final_price=final_price)
+        DesignCard.objects.filter(asset_id=pk).update(price=price, final_price=final_price)
+
+
+def restore_prices(apps, schema_editor):
+    DesignAsset = apps.get_model('designs', 'DesignAsset')
+    DesignAssetTranslation = apps.get_model('designs', 'DesignAssetTranslation')
+    for pk, price in DesignAsset.objects.values_list('pk', 'price'):
+        DesignAssetTranslation.objects.filter(master_id=pk).update(price=price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0007_price_column'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_prices, restore_prices),
+    ]
@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+
+def _translations(model, field, master_ids):
+    """``{master_id: {language_code: value}}`` in pk order."""
+    values = defaultdict(dict)
+    rows = model.objects.filter(master_id__in=master_ids).order_by('pk')
+    for master_id, language_code, value in rows.values_list('master_id', 'language_code', field):
+        values[master_id][language_code] = value
+    return values
+
+
+def _translated(values, code):
+    # parler's fallbacks: the language, then the default one, then any
+    for candidate in (code, settings.LANGUAGE_CODE):
+        if values.get(candidate):
+            return values[candidate]
+    return next((value for value in values.values() if value), '')
+
+
+def backfill_cards(apps, schema_editor):
+    """Build the listing cards of assets that have none yet (``rebuild_catalog_cards``)."""
+    DesignAsset = apps.get_model('designs', 'DesignAsset')
+    DesignAssetTranslation = apps.get_model('designs', 'DesignAssetTranslation')
+    DesignCard = apps.get_model('designs', 'DesignCard')
+    languages = [code for code, _name in settings.LANGUAGES]
+    pks = list(DesignAsset.objects.exclude(cards__isnull=False).values_list('pk', flat=True))
+    for start in range(0, len(pks), 500):
+        assets = list(DesignAsset.objects.filter(pk__in=pks[start:start + 500]).select_related('category'))
+        names = _translations(DesignAssetTranslation, 'name', [asset.pk for asset in assets])
+        cards = [
+            DesignCard(
+                asset_id=asset.pk,
+                language_code=code,
+                name=_translated(names[asset.pk], code),
+                price=asset.price,
+                final_price=asset.final_price,
+                discount=asset.discount,
+                slug=asset.slug,
+                cover_image=asset.cover_image.name or '',
+                category_id=asset.category_id,
+                category_slug=asset.category.slug,
+                category_type=asset.category.type,
+                is_active=asset.is_active,
+                created_at=asset.created_at,
+            )
+            # assets without any translation are not listable
+            for asset in assets if asset.pk in names
+            for code in languages
+        ]
+        DesignCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0009_remove_designassettranslation_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cards, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,10 @@ from parler.models import TranslatableModel, TranslatedFields
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from products.managers import CatalogManager
+from products.prices import Priced
+from products.ratings import RatingStats, TracksRating
+from products.thumbnails import TracksImages
 
 
 class BaseModel(models.Model):
@@ -27,6 +31,8 @@ class DesignCategory(TranslatableModel, BaseModel):
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     slug = models.SlugField(max_length=220, unique=True, blank=True)
 
+    objects = CatalogManager()
+
     class Meta:
         verbose_name = 'Design Category'
         verbose_name_plural = 'Design Categories'
@@ -48,23 +54,29 @@ class DesignCategory(TranslatableModel, BaseModel):
         super().save(*args, **kwargs)
 
 
-class DesignAsset(TranslatableModel, BaseModel):
+class DesignAsset(TranslatableModel, BaseModel, RatingStats, Priced, TracksImages):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     category = models.ForeignKey(DesignCategory, related_name='assets', on_delete=models.CASCADE)
     translations = TranslatedFields(
         name = models.CharField(max_length=255),
         description = models.TextField(blank=True),
-        price = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
     )
     slug = models.SlugField(max_length=280, unique=True, blank=True)
     cover_image = models.ImageField(upload_to='designs/covers/', blank=True, null=True)
     discount = models.PositiveIntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(90)])
     is_active = models.BooleanField(default=True)
 
+    objects = CatalogManager()
+    image_fields = ('cover_image',)
+
     class Meta:
         verbose_name = 'Design Asset'
         verbose_name_plural = 'Design Assets'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='designasset_created_id_idx'),
+            models.Index(fields=['is_active', 'category', 'final_price'], name='designasset_active_price_idx'),
+        ]
 
     def __str__(self):
         return self.safe_translation_getter('name', any_language=True) or str(self.pk)
@@ -80,19 +92,45 @@ class DesignAsset(TranslatableModel, BaseModel):
             self.slug = candidate
         super().save(*args, **kwargs)
 
-    @property
-    def final_price(self):
-        if self.discount:
-            return self.price * (100 - self.discount) / 100
-        return self.price
 
+class DesignCard(models.Model):
+    """Denormalized marketplace listing row: one per design asset and language."""
+    asset = models.ForeignKey(DesignAsset, related_name='cards', on_delete=models.CASCADE)
+    language_code = models.CharField(max_length=15)
+    name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    final_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    discount = models.PositiveIntegerField(default=0)
+    slug = models.SlugField(max_length=280)
+    cover_image = models.CharField(max_length=255, blank=True)
+    category_id = models.UUIDField()
+    category_slug = models.SlugField(max_length=220, blank=True)
+    category_type = models.CharField(max_length=20, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        unique_together = (('asset', 'language_code'),)
+        indexes = [
+            models.Index(fields=['language_code', 'is_active', 'created_at', 'id'], name='designcard_listing_idx'),
+            models.Index(fields=['language_code', 'category_type', 'category_slug'], name='designcard_category_idx'),
+            models.Index(fields=['language_code', 'is_active', 'final_price'], name='designcard_price_idx'),
+            models.Index(fields=['language_code', 'category_slug', 'final_price'], name='designcard_cat_price_idx'),
+        ]
 
-class AssetImage(BaseModel):
+    def __str__(self):
+        return f"{self.name} [{self.language_code}]"
+
+
+class AssetImage(BaseModel, TracksImages):
     asset = models.ForeignKey(DesignAsset, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='designs/gallery/')
     alt_text = models.CharField(max_length=180, blank=True)
     ordering = models.PositiveIntegerField(default=0)
 
+    image_fields = ('image',)
+
     class Meta:
         ordering = ['ordering', 'id']
         verbose_name = 'Asset Image'
@@ -102,7 +140,7 @@ class AssetImage(BaseModel):
         return f"Image for {self.asset.name} ({self.ordering})"
 
 
-class DesignReview(BaseModel):
+class DesignReview(TracksRating, BaseModel):
     asset = models.ForeignKey(DesignAsset, related_name='reviews', on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='design_reviews', on_delete=models.CASCADE)
     rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save
+
+from products.ratings import review_deleted, review_saved
+from products.thumbnails import schedule_variants
+
+from .cards import refresh_design_cards
+from .models import AssetImage, DesignAsset, DesignCategory, DesignReview
+
+
+def _asset_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_design_cards([instance.pk])
+        schedule_variants(instance, 'cover_image')
+
+
+def _asset_image_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_variants(instance, 'image')
+
+
+def _asset_translation_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.master_id:
+        refresh_design_cards([instance.master_id])
+
+
+def _category_saved(sender, instance, raw=False, **kwargs):
+    # slug and type are copied onto the cards
+    if not raw:
+        refresh_design_cards(list(instance.assets.values_list('pk', flat=True)))
+
+
+def _review_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        review_saved(DesignAsset, 'asset', instance, created)
+
+
+def _review_deleted(sender, instance, **kwargs):
+    review_deleted(DesignAsset, 'asset', instance)
+
+
+# Card rows of deleted assets go away through the FK cascade.
+post_save.connect(_asset_saved, sender=DesignAsset, dispatch_uid='design-cards-save')
+post_save.connect(_asset_translation_changed, sender=DesignAsset._parler_meta.root_model,
+                  dispatch_uid='design-cards-tr-save')
+post_delete.connect(_asset_translation_changed, sender=DesignAsset._parler_meta.root_model,
+                    dispatch_uid='design-cards-tr-delete')
+post_save.connect(_asset_image_saved, sender=AssetImage, dispatch_uid='design-image-variants-save')
+post_save.connect(_category_saved, sender=DesignCategory, dispatch_uid='design-cards-category-save')
+post_save.connect(_review_saved, sender=DesignReview, dispatch_uid='design-ratings-review-save')
+post_delete.connect(_review_deleted, sender=DesignReview, dispatch_uid='design-ratings-review-delete')
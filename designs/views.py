@@ -1,63 +1,197 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.template.loader import render_to_string
 from .models import DesignAsset, DesignCategory, DesignReview
 from django.db.models import Q
 from .forms import DesignReviewForm
 from django.contrib import messages
+from search.index import apply_search
+from recommendations.index import apply_recommendations
+from products.pagination import cursor_mode_requested, cursor_paginate
+from django.utils.translation import get_language
+from caching.conditional import conditional_catalog
+from caching.fragments import fragment_key, get_fragment, set_fragment
+from caching.snapshot import catalog_snapshot
+from caching.tiered import catalog_cache, lang_tag
+from products.managers import prefetch_translations
+from products.cards import CARD_ORDERINGS, facet_counts, filter_cards, parse_price
+from .cards import design_cards
 
 
+def _marketplace_versions(request):
+    return [catalog_cache.generation('designs')]
+
+
+@conditional_catalog(_marketplace_versions)
 def marketplace(request):
-    qs = DesignAsset.objects.filter(is_active=True).select_related('category')
     cat_type = request.GET.get('type')
     cat_slug = request.GET.get('category')
-    if cat_type:
-        qs = qs.filter(category__type=cat_type)
-    if cat_slug:
-        qs = qs.filter(category__slug=cat_slug)
     search = request.GET.get('q')
-    if search:
-        qs = qs.filter(translations__name__icontains=search)
+    sort = request.GET.get('sort')
+    if sort not in CARD_ORDERINGS:
+        sort = None
+    min_price = parse_price(request.GET.get('min_price'))
+    max_price = parse_price(request.GET.get('max_price'))
     try:
         per_page = int(request.GET.get('page_size', '12'))
     except ValueError:
         per_page = 12
     per_page = max(6, min(per_page, 60))
-    paginator = Paginator(qs, per_page)
-    page = request.GET.get('page')
-    try:
-        page_obj = paginator.page(page)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    cursor_mode = cursor_mode_requested(request) and not search and sort in (None, 'newest')
+    is_xhr = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    if is_xhr:
+        key = fragment_key(
+            'designs', type=cat_type, category=cat_slug, q=search, sort=sort,
+            min_price=min_price, max_price=max_price, page_size=per_page,
+            page=request.GET.get('page'), cursor=request.GET.get('cursor') if cursor_mode else None,
+        )
+        fragments = get_fragment(key)
+        if fragments is not None:
+            return JsonResponse(fragments)
+
+    lang = get_language()
+    # search and cursor paging need the card table (see store_view)
+    snapshot = None if search or cursor_mode else catalog_snapshot.current()
+    if snapshot is not None:
+        listing = snapshot.design_listing(lang)
+        qs = listing.select(sort, min_price, max_price)
+        facets = _count_design_facets(listing.facet_counts(qs, 'category_type', 'category_slug'))
+        if cat_type:
+            qs = [row for row in qs if row.category_type == cat_type]
+        if cat_slug:
+            qs = [row for row in qs if row.category_slug == cat_slug]
+        categories = listing.categories
+    else:
+        qs = design_cards().filter(is_active=True)
+        if search:
+            qs = apply_search(qs, 'design', search, field='asset_id')
+        qs = filter_cards(qs, sort, min_price, max_price)
+        # counted before the type/category filters so every option shows its own count
+        facets = _design_facets(qs, search, min_price, max_price)
+        if cat_type:
+            qs = qs.filter(category_type=cat_type)
+        if cat_slug:
+            qs = qs.filter(category_slug=cat_slug)
+        categories = catalog_cache.get_or_set(
+            f'design-categories:{lang}',
+            lambda: _sorted_categories(DesignCategory.objects.with_translations()),
+            tags=('design-categories', lang_tag(lang)),
+        )
+    if cursor_mode:
+        paginator = None
+        page_obj = cursor_paginate(qs, request.GET.get('cursor'), per_page)
+    else:
+        paginator = Paginator(qs, per_page)
+        page = request.GET.get('page')
+        try:
+            page_obj = paginator.page(page)
+        except PageNotAnInteger:
+            page_obj = paginator.page(1)
+        except EmptyPage:
+            page_obj = paginator.page(paginator.num_pages)
 
-    categories = DesignCategory.objects.all().order_by('type', 'translations__name')
     context = {
         'assets': page_obj.object_list,
         'page_obj': page_obj,
         'paginator': paginator,
         'is_paginated': page_obj.has_other_pages(),
+        'cursor_mode': cursor_mode,
         'categories': categories,
+        'category_facets': [(cat, facets['category'].get(cat.slug, 0)) for cat in categories],
+        'type_facets': facets['type'],
         'current_type': cat_type,
         'current_category': cat_slug,
         'search_query': search,
+        'sort': sort or '',
+        'min_price': min_price,
+        'max_price': max_price,
         'page_size': per_page,
         'page_size_options': [12, 24, 36, 48],
     }
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        html = render_to_string('designs/partials/_asset_grid.html', context, request=request)
-        pagination = render_to_string('designs/partials/_pagination.html', context, request=request)
-        return JsonResponse({'html': html, 'pagination': pagination})
+    if is_xhr:
+        return JsonResponse(set_fragment(key, {
+            'html': render_to_string('designs/partials/_asset_grid.html', context, request=request),
+            'pagination': render_to_string('designs/partials/_pagination.html', context, request=request),
+            'facets': facets,
+        }))
     return render(request, 'designs/marketplace.html', context)
 
 
+def _sorted_categories(categories):
+    # sorted here: ordering by ``translations__name`` yields a row per translation
+    return sorted(categories, key=lambda cat: (cat.type, (cat.safe_translation_getter('name', any_language=True) or '').lower()))
+
+
+def _design_facets(cards, search, min_price, max_price):
+    """Active assets per category slug and per type, cached per language and filters."""
+    key = fragment_key('designs', facets='category', q=search, min_price=min_price, max_price=max_price)
+    facets = get_fragment(key)
+    if facets is None:
+        facets = set_fragment(key, _count_design_facets(facet_counts(cards, 'category_type', 'category_slug')))
+    return facets
+
+
+def _count_design_facets(counts):
+    facets = {'category': {}, 'type': {}}
+    for (cat_type, slug), count in counts.items():
+        facets['category'][slug] = count
+        facets['type'][cat_type] = facets['type'].get(cat_type, 0) + count
+    return facets
+
+
+REVIEWS_PER_PAGE = 10
+
+
+def _cached_asset(slug, lang):
+    snapshot = catalog_snapshot.current()
+    # the snapshot only knows which slugs exist; the object is loaded on demand
+    if snapshot is not None and snapshot.design_listing(lang).detail(slug) is None:
+        raise Http404('No DesignAsset matches the given query.')
+    key = f'asset-detail:{lang}:{slug}'
+    cached = catalog_cache.get(key)
+    if cached is None:
+        asset = get_object_or_404(DesignAsset.objects.select_related('category'), slug=slug, is_active=True)
+        prefetch_translations([asset])
+        prefetch_translations([asset.category])
+        cached = (asset, list(asset.images.all()))
+        catalog_cache.set(key, cached, tags=(
+            f'design:{asset.pk}', f'design-category:{asset.category_id}', lang_tag(lang),
+        ))
+    return cached
+
+
+def _related_assets(asset, lang, limit=8):
+    """Bought-together assets, or the category's newest when there is no order history."""
+    cards = design_cards(lang).filter(is_active=True).exclude(asset_id=asset.pk)
+    related = list(apply_recommendations(cards, 'design', asset.pk, 'asset_id')[:limit])
+    return related or list(cards.filter(category_id=asset.category_id)[:limit])
+
+
+def _asset_versions(request, slug):
+    asset, _images = _cached_asset(slug, get_language())
+    versions = catalog_cache.versions(
+        f'design:{asset.pk}', f'design-category:{asset.category_id}', 'designs', 'recommendations', 'images',
+    )
+    return [*versions.values(), catalog_cache.generation('designs')]
+
+
+@conditional_catalog(_asset_versions)
 def asset_detail(request, slug):
-    asset = get_object_or_404(DesignAsset, slug=slug, is_active=True)
-    images = asset.images.all()
-    related = DesignAsset.objects.filter(category=asset.category, is_active=True).exclude(pk=asset.pk)[:8]
-    reviews = asset.reviews.select_related('user')
+    lang = get_language()
+    asset, images = _cached_asset(slug, lang)
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        related = snapshot.design_listing(lang).related_rows(asset.pk, 'category_id', asset.category_id)
+    else:
+        related = catalog_cache.get_or_set(
+            f'asset-related:{lang}:{asset.pk}',
+            lambda: _related_assets(asset, lang),
+            tags=('designs', 'recommendations', f'design-category:{asset.category_id}', lang_tag(lang)),
+        )
+    reviews = Paginator(
+        asset.reviews.select_related('user').order_by('-created_at', '-pk'), REVIEWS_PER_PAGE,
+    ).get_page(request.GET.get('reviews_page'))
     form = None
     if request.method == 'POST' and request.POST.get('form_type') == 'review':
         if not request.user.is_authenticated:
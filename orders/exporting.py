@@ -0,0 +1,124 @@
+"""
+Bulk export of orders with their items and transactions
+(``manage.py export_orders`` and the dashboard's export link).
+
+Orders are read with ``.iterator(chunk_size=...)`` (items and transactions
+prefetched per chunk) and serialized one at a time, so memory stays constant
+whatever the number of rows.
+
+JSON Lines: one object per order, with ``items`` and ``transactions`` lists.
+CSV: one row per order, item and transaction, told apart by the ``record``
+column and linked by ``order_id``; columns that don't apply are empty, and
+text starting with a formula character is prefixed with ``'``.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils import timezone
+
+from payment.models import Transaction
+
+from .models import Order, OrderItem
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+CHUNK_SIZE = 500
+# leading characters that make spreadsheets read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+ORDER_FIELDS = (
+    'currency', 'total_price', 'first_name', 'last_name', 'email', 'phone',
+    'address1', 'address2', 'country', 'state', 'zip', 'created_at',
+)
+ITEM_FIELDS = ('kind', 'product_id', 'design_asset_id', 'name', 'quantity', 'unit_price', 'line_total')
+TRANSACTION_FIELDS = ('id', 'transaction_id', 'status', 'amount', 'currency', 'payment_time', 'created_at')
+CSV_COLUMNS = (
+    'record', 'order_id', *ORDER_FIELDS,
+    *(f'item_{field}' for field in ITEM_FIELDS),
+    *(f'tx_{field}' for field in TRANSACTION_FIELDS),
+)
+
+
+def export_queryset(since=None, until=None, status=None):
+    """
+    Orders created on the local days ``since`` through ``until`` (dates,
+    inclusive; an open end is unbounded), optionally only those with a
+    transaction in ``status``.
+    """
+    tz = timezone.get_current_timezone()
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min), tz))
+    if until is not None:
+        end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min), tz)
+        orders = orders.filter(created_at__lt=end)
+    if status:
+        orders = orders.filter(Exists(Transaction.objects.filter(order_id=OuterRef('pk'), status=status)))
+    return orders.order_by('created_at', 'pk').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.order_by('pk')),
+        Prefetch('transactions', queryset=Transaction.objects.order_by('created_at', 'pk')),
+    )
+
+
+def _value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, (int, str)):
+        return value
+    return str(value)
+
+
+def _fields(obj, fields):
+    return {field: _value(getattr(obj, field)) for field in fields}
+
+
+def _csv_fields(obj, fields, prefix=''):
+    row = {}
+    for field in fields:
+        value = getattr(obj, field)
+        # text columns (customer input) only: prefixed so a spreadsheet opens
+        # them as text, not as a formula
+        if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+            value = "'" + value
+        row[prefix + field] = _value(value)
+    return row
+
+
+def jsonl_lines(queryset, chunk_size=CHUNK_SIZE):
+    for order in queryset.iterator(chunk_size=chunk_size):
+        record = {'id': str(order.pk), **_fields(order, ORDER_FIELDS)}
+        record['items'] = [_fields(item, ITEM_FIELDS) for item in order.items.all()]
+        record['transactions'] = [_fields(tx, TRANSACTION_FIELDS) for tx in order.transactions.all()]
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the formatted line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(queryset, chunk_size=CHUNK_SIZE):
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS)
+    yield writer.writeheader()
+    for order in queryset.iterator(chunk_size=chunk_size):
+        order_id = str(order.pk)
+        yield writer.writerow({'record': 'order', 'order_id': order_id, **_csv_fields(order, ORDER_FIELDS)})
+        for item in order.items.all():
+            yield writer.writerow({'record': 'item', 'order_id': order_id, **_csv_fields(item, ITEM_FIELDS, 'item_')})
+        for tx in order.transactions.all():
+            yield writer.writerow({
+                'record': 'transaction', 'order_id': order_id, **_csv_fields(tx, TRANSACTION_FIELDS, 'tx_'),
+            })
+
+
+def export_lines(queryset, fmt, chunk_size=CHUNK_SIZE):
+    """Lazily serialized lines of ``queryset`` in ``fmt`` (one of ``FORMATS``)."""
+    if fmt == 'jsonl':
+        return jsonl_lines(queryset, chunk_size)
+    return csv_lines(queryset, chunk_size)
@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exporting import CHUNK_SIZE, FORMATS, export_lines, export_queryset
+from payment.models import TransactionStatus
+
+
+class Command(BaseCommand):
+    help = 'Stream orders with their items and transactions as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--since', help='First local day of order creation, YYYY-MM-DD')
+        parser.add_argument('--until', help='Last local day of order creation, YYYY-MM-DD')
+        parser.add_argument('--status', choices=TransactionStatus.values,
+                            help='Only orders with a transaction in this status')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Orders fetched per query')
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ('since', 'until'):
+            if options[name]:
+                try:
+                    bounds[name] = date.fromisoformat(options[name])
+                except ValueError:
+                    raise CommandError(f'--{name} must be a date (YYYY-MM-DD)')
+        queryset = export_queryset(status=options['status'], **bounds)
+        lines = export_lines(queryset, options['format'], chunk_size=max(1, options['chunk_size']))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        try:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                count = 0
+                for line in lines:
+                    fh.write(line)
+                    count += 1
+        except OSError as exc:
+            raise CommandError(f'Cannot write {options["output"]}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} lines to {options["output"]}'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_remove_orderitem_currency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='orders_order_created_idx'),
+        ),
+    ]
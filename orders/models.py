@@ -1,11 +1,31 @@
 import uuid
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from products.models import Product
 from designs.models import DesignAsset
 
 
+class OrderManager(models.Manager):
+    def create_with_items(self, items, **fields):
+        """
+        Create an order from unsaved ``OrderItem`` instances in one transaction:
+        line totals and the order total are computed in memory and the items
+        are written with a single ``bulk_create``. (``OrderItem.save()`` still
+        recalculates the total after every single-item edit, e.g. in the admin.)
+        """
+        items = list(items)
+        order = self.model(**fields)
+        for item in items:
+            item.order = order
+            item.line_total = item.compute_line_total()
+        order.total_price = sum((item.line_total for item in items), Decimal('0'))
+        with transaction.atomic(using=self.db):
+            order.save(force_insert=True, using=self.db)
+            OrderItem.objects.using(self.db).bulk_create(items)
+        return order
+
+
 class Order(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     currency = models.CharField(_('Currency'), max_length=8, default='UZS')
@@ -23,10 +43,15 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderManager()
+
     class Meta:
         verbose_name = _('Order')
         verbose_name_plural = _('Orders')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='orders_order_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.pk} ({self.currency} {self.total_price})"
@@ -65,8 +90,11 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.name} x{self.quantity}"
 
+    def compute_line_total(self):
+        return (self.unit_price or Decimal('0')) * self.quantity
+
     def save(self, *args, **kwargs):
-        self.line_total = (self.unit_price or Decimal('0')) * self.quantity
+        self.line_total = self.compute_line_total()
         super().save(*args, **kwargs)
         if self.order_id:
             self.order.recalc_total(commit=True)
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from payment.models import Transaction, TransactionStatus
+from products.models import Category, Product
+
+from .models import Order, OrderItem
+
+
+class OrderAssemblyTests(TestCase):
+    def setUp(self):
+        cat = Category.objects.create(name="Cat")
+        self.products = [
+            Product.objects.create(category=cat, name=f"Item {i}", price=Decimal('1.25'), slug=f"item-{i}")
+            for i in range(5)
+        ]
+
+    def test_create_with_items_is_constant_in_queries(self):
+        items = [
+            OrderItem(kind='product', product=p, name=p.name, quantity=2, unit_price=Decimal('1.25'))
+            for p in self.products
+        ]
+        # savepoint, order insert, one bulk insert, release
+        with self.assertNumQueries(4):
+            order = Order.objects.create_with_items(items, currency='UZS')
+        self.assertEqual(order.total_price, Decimal('12.50'))
+        self.assertEqual(order.items.count(), 5)
+
+    def test_item_save_still_recalculates_total(self):
+        order = Order.objects.create_with_items([
+            OrderItem(kind='donation', name="Advance", quantity=1, unit_price=Decimal('3.00')),
+        ])
+        item = order.items.get()
+        item.quantity = 4
+        item.save()
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('12.00'))
+
+    def test_create_order_from_cart(self):
+        for p in self.products:
+            self.client.post(reverse('add_to_cart'), {'product_id': p.pk, 'qty': 1})
+        response = self.client.post(reverse('orders:create'), {'first_name': "Ann"})
+        self.assertEqual(response.status_code, 302)
+        order = Order.objects.get()
+        self.assertEqual(order.total_price, Decimal('6.25'))
+        self.assertEqual(Transaction.objects.get(order=order).amount, 625)
+        self.assertEqual(self.client.cookies['cart'].value, '')
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(email="admin@example.com", password="pw")
+        self.client.force_login(admin)
+        for i in range(25):
+            order = Order.objects.create(first_name="Ann" if i % 5 == 0 else "Bob", total_price=1)
+            Transaction.objects.create(
+                order=order, amount=100, currency="UZS",
+                status=TransactionStatus.SUCCESS if i % 2 else TransactionStatus.WAITING,
+            )
+
+    def test_cursor_pages_cover_every_transaction_once(self):
+        first = self.client.get(reverse('orders:dashboard')).context['page_obj']
+        self.assertEqual(len(first), 20)
+        second = self.client.get(reverse('orders:dashboard'), {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual(len(second), 5)
+        self.assertFalse(second.has_next())
+        ids = [tx.pk for tx in first] + [tx.pk for tx in second]
+        self.assertEqual(ids, list(Transaction.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+
+    def test_filters(self):
+        response = self.client.get(reverse('orders:dashboard'), {'status': 'success', 'q': 'ann'})
+        rows = list(response.context['page_obj'])
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(tx.status == TransactionStatus.SUCCESS and tx.order.first_name == "Ann" for tx in rows))
+        self.assertIn('q=ann', response.context['filter_query'])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.paid = Order.objects.create_with_items([
+            OrderItem(kind='donation', name="Advance", quantity=2, unit_price=Decimal('3.00')),
+        ], first_name="Ann")
+        Transaction.objects.create(order=self.paid, amount=600, currency="UZS", status=TransactionStatus.SUCCESS)
+        self.unpaid = Order.objects.create(first_name="Bob")
+        Transaction.objects.create(order=self.unpaid, amount=100, currency="UZS")
+
+    def test_command_jsonl_nests_items_and_transactions(self):
+        out = io.StringIO()
+        call_command('export_orders', format='jsonl', status='success', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record['id'] for record in records], [str(self.paid.pk)])
+        self.assertEqual(records[0]['items'][0]['line_total'], '6.00')
+        self.assertEqual(records[0]['transactions'][0]['amount'], 600)
+
+    def test_endpoint_streams_csv(self):
+        admin = get_user_model().objects.create_superuser(email="admin@example.com", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse('orders:dashboard_export'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['record'] for row in rows], ['order', 'item', 'transaction', 'order', 'transaction'])
+        self.assertEqual(rows[1]['order_id'], str(self.paid.pk))
+
+    def test_csv_neutralizes_formulas(self):
+        self.unpaid.first_name = "=HYPERLINK(\"http://x\")"
+        self.unpaid.phone = "+998901234567"
+        self.unpaid.save()
+        out = io.StringIO()
+        call_command('export_orders', stdout=out)
+        row = next(row for row in csv.DictReader(io.StringIO(out.getvalue())) if row['order_id'] == str(self.unpaid.pk))
+        self.assertEqual((row['first_name'], row['phone']), ("'=HYPERLINK(\"http://x\")", "'+998901234567"))
+
+    def test_endpoint_requires_superuser(self):
+        response = self.client.get(reverse('orders:dashboard_export'))
+        self.assertEqual(response.status_code, 302)
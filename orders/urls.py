@@ -5,6 +5,7 @@ app_name = 'orders'
 
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/export/', views.dashboard_export, name='dashboard_export'),
     path('dashboard/order/<uuid:order_id>/', views.dashboard_order_detail, name='dashboard_order_detail'),
     path('create/', views.create_order, name='create'),
     path('success/<uuid:order_id>/', views.order_success, name='success'),
@@ -1,131 +1,79 @@
+import uuid
+from datetime import date, datetime, time, timedelta
+from urllib.parse import urlencode
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from decimal import Decimal, InvalidOperation
+from django.db import transaction as db_transaction
 from django.utils.translation import gettext as _
-from django.core.paginator import Paginator
+from django.db.models import Q
 from django.contrib.auth.decorators import user_passes_test
+from django.utils import timezone
 
-from payment.models import Transaction
+from payment import rollups
+from payment.models import DailyRevenue, HourlyRevenue, Transaction
 from payment.provider import InterforumClient
-from products.models import Product
-from designs.models import DesignAsset
+from products.pagination import cursor_paginate
+from products.pricing import CartPricer
+from . import exporting
 from .models import Order, OrderItem
 from payment.models import TransactionStatus
 from django.views.decorators.http import require_GET
+from caching.tiered import catalog_cache
 
 
 def order_success(request, order_id):
-    order = get_object_or_404(Order, pk=order_id)
+    order = catalog_cache.get(f'order:{order_id}')
+    if order is None:
+        order = get_object_or_404(Order.objects.prefetch_related('items'), pk=order_id)
+        catalog_cache.set(f'order:{order_id}', order, tags=(f'order:{order.pk}',))
     return render(request, 'orders/order_success.html', {'order': order})
 
 
-def _get_cart(session):
-    return session.get('cart', {})
-
-
 @require_POST
 def create_order(request):
-    cart = _get_cart(request.session)
-    if not cart:
+    if not request.cart:
         messages.info(request, _('Your cart is empty.'))
         return redirect('store')
 
     posted_currency = (request.POST.get('currency') or '').upper()
     currency = 'USD' if posted_currency == 'USD' else 'UZS'
-    order = Order.objects.create(
-        currency=currency,
-        first_name=request.POST.get('first_name') or '',
-        last_name=request.POST.get('last_name') or '',
-        email=request.POST.get('email') or '',
-        phone=request.POST.get('phone') or '',
-        address1=request.POST.get('address1') or '',
-        address2=request.POST.get('address2') or '',
-        country=request.POST.get('country') or '',
-        state=request.POST.get('state') or '',
-        zip=request.POST.get('zip') or '',
-    )
-
-    product_ids = [k.split(':', 1)[1] for k in cart if k.startswith('P:')]
-    design_ids = [k.split(':', 1)[1] for k in cart if k.startswith('D:')]
-    products = {str(p.pk): p for p in Product.objects.filter(pk__in=product_ids)}
-    designs = {str(d.pk): d for d in DesignAsset.objects.filter(pk__in=design_ids)}
-    donation_price = request.session.get('donation_price')
-
-    for key, qty in cart.items():
-        try:
-            qty_int = int(qty)
-        except (TypeError, ValueError):
-            qty_int = 1
-        if qty_int < 1:
-            qty_int = 1
-
-        if key.startswith('P:'):
-            pid = key.split(':', 1)[1]
-            product = products.get(pid)
-            if not product:
-                continue
-            price_val = product.safe_translation_getter('price', any_language=True)
-            try:
-                unit_price = Decimal(str(price_val))
-            except (InvalidOperation, TypeError):
-                unit_price = Decimal('0')
-            OrderItem.objects.create(
-                order=order,
-                kind='product',
-                product=product,
-                name=product.safe_translation_getter('name', any_language=True) or str(product.pk),
-                quantity=qty_int,
-                unit_price=unit_price,
-            )
-            continue
-
-        if key.startswith('D:'):
-            did = key.split(':', 1)[1]
-            design = designs.get(did)
-            if not design:
-                continue
-            price_val = design.safe_translation_getter('price', any_language=True)
-            try:
-                unit_price = Decimal(str(price_val))
-            except (InvalidOperation, TypeError):
-                unit_price = Decimal('0')
-            OrderItem.objects.create(
-                order=order,
-                kind='design',
-                design_asset=design,
-                name=design.safe_translation_getter('name', any_language=True) or str(design.pk),
-                quantity=qty_int,
-                unit_price=unit_price,
-            )
-            continue
-
-        if key.startswith('C:') and donation_price is not None:
-            try:
-                unit_price = Decimal(str(donation_price))
-            except (InvalidOperation, TypeError):
-                unit_price = Decimal('0')
-            OrderItem.objects.create(
-                order=order,
-                kind='donation',
-                name=_('Advance Payment'),
-                quantity=qty_int,
-                unit_price=unit_price,
-            )
-
-
-    order.recalc_total(commit=True)
-    transaction = Transaction.objects.create(
-        order=order,
-        amount=order.total_price*100,
-        currency=order.currency
-    )
+    items = [
+        OrderItem(
+            kind=line.kind,
+            product=line.obj if line.kind == 'product' else None,
+            design_asset=line.obj if line.kind == 'design' else None,
+            name=line.name,
+            quantity=line.qty,
+            unit_price=line.unit_price,
+        )
+        for line in CartPricer.for_request(request)
+    ]
+    with db_transaction.atomic():
+        order = Order.objects.create_with_items(
+            items,
+            currency=currency,
+            first_name=request.POST.get('first_name') or '',
+            last_name=request.POST.get('last_name') or '',
+            email=request.POST.get('email') or '',
+            phone=request.POST.get('phone') or '',
+            address1=request.POST.get('address1') or '',
+            address2=request.POST.get('address2') or '',
+            country=request.POST.get('country') or '',
+            state=request.POST.get('state') or '',
+            zip=request.POST.get('zip') or '',
+        )
+        transaction = Transaction.objects.create(
+            order=order,
+            amount=order.total_price*100,
+            currency=order.currency
+        )
 
     payment_link = InterforumClient.create_payment_link(transaction)
 
-    request.session.pop('cart', None)
-    request.session.pop('donation_price', None)
-    request.session.modified = True
+    request.cart.clear()
     messages.success(request, _('Order created successfully.'))
     return redirect(payment_link)
 
@@ -142,27 +90,111 @@ def payment_return(request):
     return render(request, 'orders/order_success.html', {'order': tx.order})
 
 
+CHART_DAYS = 30
+CHART_HOURS = 48
+DASHBOARD_PAGE_SIZE = 20
+
 
 def _is_superuser(user):
     return user.is_authenticated and user.is_superuser
 
 
+def _local_day(value, end=False):
+    """Start of the local day ``value`` (YYYY-MM-DD), or of the next one for ``end``; ``None`` if invalid."""
+    try:
+        day = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if end:
+        day += timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _filter_transactions(qs, params):
+    """
+    Apply the dashboard filters; returns the queryset and the active filters.
+    ``q`` matches an order id, a transaction id or Paylov id, or the customer's
+    name, email or phone.
+    """
+    active = {}
+    status = params.get('status')
+    if status in TransactionStatus.values:
+        qs = qs.filter(status=status)
+        active['status'] = status
+    currency = params.get('currency')
+    if currency:
+        qs = qs.filter(currency=currency)
+        active['currency'] = currency
+    start = _local_day(params.get('date_from'))
+    if start:
+        qs = qs.filter(created_at__gte=start)
+        active['date_from'] = params['date_from']
+    end = _local_day(params.get('date_to'), end=True)
+    if end:
+        qs = qs.filter(created_at__lt=end)
+        active['date_to'] = params['date_to']
+    q = (params.get('q') or '').strip()
+    if q:
+        try:
+            qs = qs.filter(order_id=uuid.UUID(q))
+        except ValueError:
+            match = Q(transaction_id=q)
+            if q.isdigit():
+                match |= Q(pk=int(q))
+            for field in ('first_name', 'last_name', 'email', 'phone'):
+                match |= Q(**{f'order__{field}__icontains': q})
+            qs = qs.filter(match)
+        active['q'] = q
+    return qs, active
+
+
 @user_passes_test(_is_superuser)
 def dashboard(request):
-    tx_qs = (
-        Transaction.objects.select_related('order')
-        .order_by('-created_at')
-    )
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(tx_qs, 20)
-    page_obj = paginator.get_page(page_number)
+    tx_qs, filters = _filter_transactions(Transaction.objects.select_related('order'), request.GET)
+    # keyset pages over (-created_at, -id); the total is a cached approximate COUNT
+    page_obj = cursor_paginate(tx_qs, request.GET.get('cursor'), DASHBOARD_PAGE_SIZE)
+    # charts read only the rollup tables, never the transactions themselves
+    currency = filters.get('currency')
+    now = timezone.localtime()
+    since_day = now.date() - timedelta(days=CHART_DAYS - 1)
+    since_hour = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=CHART_HOURS - 1)
     context = {
         'page_obj': page_obj,
-        'paginator': paginator,
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'statuses': TransactionStatus.choices,
+        'currency': currency,
+        'currencies': DailyRevenue.objects.order_by('currency').values_list('currency', flat=True).distinct(),
+        'daily': rollups.series(DailyRevenue, since_day, currency),
+        'hourly': rollups.series(HourlyRevenue, timezone.localtime(since_hour), currency),
+        'status_totals': rollups.status_totals(since_day, currency),
+        'chart_days': CHART_DAYS,
+        'chart_hours': CHART_HOURS,
     }
     return render(request, 'orders/dashboard.html', context)
 
 
+@user_passes_test(_is_superuser)
+@require_GET
+def dashboard_export(request):
+    """Stream the orders matching ``date_from``/``date_to``/``status`` as CSV or JSON Lines (``?format=``)."""
+    fmt = request.GET.get('format')
+    if fmt not in exporting.FORMATS:
+        fmt = 'csv'
+    bounds = {}
+    for param, name in (('date_from', 'since'), ('date_to', 'until')):
+        try:
+            bounds[name] = date.fromisoformat(request.GET[param])
+        except (KeyError, ValueError):
+            pass
+    status = request.GET.get('status')
+    queryset = exporting.export_queryset(status=status if status in TransactionStatus.values else None, **bounds)
+    response = StreamingHttpResponse(exporting.export_lines(queryset, fmt), content_type=exporting.CONTENT_TYPES[fmt])
+    filename = f"orders-{timezone.localdate():%Y%m%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @user_passes_test(_is_superuser)
 def dashboard_order_detail(request, order_id):
     order = get_object_or_404(
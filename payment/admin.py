@@ -1,7 +1,24 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import DailyRevenue, HourlyRevenue, Transaction
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ('id','currency','amount','created_at')
-    list_filter = ('currency','created_at')
\ No newline at end of file
+    list_display = ('id','transaction_id','status','currency','amount','created_at')
+    list_filter = ('currency','status','created_at')
+    search_fields = ('transaction_id',)
+
+@admin.register(DailyRevenue, HourlyRevenue)
+class RevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ('bucket','currency','status','count','amount','items')
+    list_filter = ('currency','status')
+    date_hierarchy = 'bucket'
+
+    # rebuilt with ``manage.py backfill_revenue``, never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payment.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily and hourly revenue rollups from the transactions table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First local day to rebuild, YYYY-MM-DD (default: all history)')
+        parser.add_argument('--until', help='Last local day to rebuild, YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ('since', 'until'):
+            if options[name]:
+                try:
+                    bounds[name] = date.fromisoformat(options[name])
+                except ValueError:
+                    raise CommandError(f'--{name} must be a date (YYYY-MM-DD)')
+        written = rebuild_rollups(**bounds)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows'))
@@ -0,0 +1,82 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from orders.models import Order
+from payment.simulator import StandInProvider, find_anomalies, fire, place_order, plan_calls, summarize
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Load-test the Paylov webhook with a local stand-in provider (creates real orders)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=50, help='Orders placed through orders:create')
+        parser.add_argument('--retries', type=int, default=3, help='transaction.perform callbacks per order')
+        parser.add_argument('--distinct-ids', action='store_true',
+                            help='Give every perform callback its own transaction_id (conflicting payments)')
+        parser.add_argument('--rate', type=float, default=0, help='Callbacks per second (0: unthrottled)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Callbacks in flight at once')
+        parser.add_argument('--product', help='Slug of the product to order (default: any active one)')
+        parser.add_argument('--base-url', help='Send callbacks over HTTP to this server instead of in-process')
+        parser.add_argument('--username', help='Basic auth user (default: PAYLOV_USERNAME)')
+        parser.add_argument('--password', help='Basic auth password (default: PAYLOV_PASSWORD)')
+        parser.add_argument('--keep', action='store_true', help='Keep the created orders')
+
+    def handle(self, *args, **options):
+        products = Product.objects.filter(is_active=True)
+        if options['product']:
+            products = products.filter(slug=options['product'])
+        product_id = products.values_list('pk', flat=True).first()
+        if product_id is None:
+            raise CommandError('No active product to order')
+
+        started = time.perf_counter()
+        try:
+            links = [place_order(product_id) for _n in range(max(1, options['orders']))]
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f'Placed {len(links)} orders in {time.perf_counter() - started:.1f}s')
+
+        if connection.vendor == 'sqlite' and options['concurrency'] > 1 and not options['base_url']:
+            self.stderr.write(self.style.WARNING('SQLite allows one writer at a time: expect "database is locked" errors'))
+        provider = StandInProvider(options['base_url'], options['username'], options['password'])
+        # failed callbacks are counted and sampled below instead of logged one by one
+        request_log = logging.getLogger('django.request')
+        request_log.disabled = True
+        try:
+            calls, elapsed = fire(
+                provider,
+                plan_calls(links, retries=max(1, options['retries']), distinct_ids=options['distinct_ids']),
+                rate=options['rate'],
+                concurrency=options['concurrency'],
+            )
+        finally:
+            request_log.disabled = False
+        self._report(summarize(calls, elapsed), elapsed)
+        for call in [call for call in calls if call.error][:10]:
+            self.stderr.write(f'{call.method} {call.account_id}: {call.error}')
+
+        anomalies = find_anomalies(calls)
+        for anomaly in anomalies:
+            self.stderr.write(self.style.ERROR(anomaly))
+        if not options['keep']:
+            order_ids = {link['account.order_id'] for link in links}
+            Order.objects.filter(transactions__id__in=order_ids).delete()
+        if anomalies:
+            raise CommandError(f'{len(anomalies)} double-payment anomalies')
+        self.stdout.write(self.style.SUCCESS('No double-payment anomalies'))
+
+    def _report(self, report, elapsed):
+        self.stdout.write(f'{report["total"]["calls"]} callbacks in {elapsed:.2f}s')
+        self.stdout.write(f'{"method":<22}{"calls":>7}{"err":>5}{"req/s":>9}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}'
+                          f'{"queries":>9}  statuses')
+        for method, row in report.items():
+            queries = '-' if row['queries_mean'] is None else f'{row["queries_mean"]:.1f}/{row["queries_max"]}'
+            statuses = ' '.join(f'{status}:{count}' for status, count in sorted(row['statuses'].items()))
+            self.stdout.write(
+                f'{method:<22}{row["calls"]:>7}{row["errors"]:>5}{row["throughput"]:>9.1f}'
+                f'{row["p50"]:>7.1f}ms{row["p90"]:>7.1f}ms{row["p99"]:>7.1f}ms{row["max"]:>7.1f}ms{queries:>9}  {statuses}'
+            )
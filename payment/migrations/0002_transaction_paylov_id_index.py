@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_remove_orderitem_currency'),
+        ('payment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_id'], name='payment_tx_paylov_id_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0002_transaction_paylov_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=5, verbose_name='Currency')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=255, verbose_name='Status')),
+                ('count', models.IntegerField(default=0, verbose_name='Transactions')),
+                ('amount', models.BigIntegerField(default=0, verbose_name='Amount')),
+                ('items', models.IntegerField(default=0, verbose_name='Items')),
+                ('bucket', models.DateField(verbose_name='Day')),
+            ],
+            options={
+                'verbose_name': 'Daily revenue',
+                'verbose_name_plural': 'Daily revenue',
+                'db_table': 'payment_revenue_daily',
+                'ordering': ['bucket', 'currency', 'status'],
+                'unique_together': {('bucket', 'currency', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=5, verbose_name='Currency')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=255, verbose_name='Status')),
+                ('count', models.IntegerField(default=0, verbose_name='Transactions')),
+                ('amount', models.BigIntegerField(default=0, verbose_name='Amount')),
+                ('items', models.IntegerField(default=0, verbose_name='Items')),
+                ('bucket', models.DateTimeField(verbose_name='Hour')),
+            ],
+            options={
+                'verbose_name': 'Hourly revenue',
+                'verbose_name_plural': 'Hourly revenue',
+                'db_table': 'payment_revenue_hourly',
+                'ordering': ['bucket', 'currency', 'status'],
+                'unique_together': {('bucket', 'currency', 'status')},
+            },
+        ),
+    ]
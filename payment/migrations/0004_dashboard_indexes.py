@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_dashboard_indexes'),
+        ('payment', '0003_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='payment_tx_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at', 'id'], name='payment_tx_created_idx'),
+        ),
+    ]
@@ -37,22 +37,98 @@ class Transaction(BaseModel):
         verbose_name=_("Payment url"), null=True, blank=True, max_length=1255
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # lets the revenue rollups apply a status change as a delta
+        instance._loaded_state = (instance.__dict__.get("status"), instance.__dict__.get("amount"))
+        return instance
+
     def process_after_succesful_payment(self, tr_id):
-        order = self.order
-        with db_transaction.atomic():
+        from .rollups import record_status_change
+
+        # joins the webhook's transaction instead of adding a savepoint
+        with db_transaction.atomic(savepoint=False):
             self.transaction_id = tr_id
             self.status = TransactionStatus.SUCCESS
             self.payment_time = timezone.now()
-            self.save()
+            self.save(update_fields=["transaction_id", "status", "payment_time", "updated_at"])
 
             # cancel all other waiting transactions
-            order.transactions.filter(status=TransactionStatus.WAITING).exclude(
-                id=self.id
-            ).update(status=TransactionStatus.CANCELLED)
+            siblings = list(
+                Transaction.objects.filter(order_id=self.order_id, status=TransactionStatus.WAITING)
+                .exclude(id=self.id)
+                .select_for_update()
+            )
+            if siblings:
+                Transaction.objects.filter(pk__in=[tx.pk for tx in siblings]).update(
+                    status=TransactionStatus.CANCELLED
+                )
+                # update() sends no post_save
+                record_status_change(siblings, TransactionStatus.CANCELLED)
+
+    def mark_failed(self, tr_id):
+        self.transaction_id = tr_id
+        self.status = TransactionStatus.FAILED
+        self.save(update_fields=["transaction_id", "status", "updated_at"])
 
     class Meta:
         verbose_name = _("Transaction")
         verbose_name_plural = _("Transactions")
+        indexes = [
+            # Paylov's id of the payment: replay checks and support lookups
+            models.Index(fields=["transaction_id"], name="payment_tx_paylov_id_idx"),
+            # dashboard keyset pages: (-created_at, -id), optionally within one status
+            models.Index(fields=["status", "created_at", "id"], name="payment_tx_status_created_idx"),
+            models.Index(fields=["created_at", "id"], name="payment_tx_created_idx"),
+        ]
 
     def __str__(self):
         return f"#{self.id} - {self.amount} - {self.status}"
+
+
+class RevenueRollup(models.Model):
+    """
+    Transactions per time bucket, currency and status.
+
+    Buckets follow the transaction's creation time (in ``TIME_ZONE``), so a
+    status change moves a transaction between rows of the same bucket.
+    Maintained by ``payment.rollups`` after every commit that creates,
+    changes or deletes transactions; ``manage.py backfill_revenue`` rebuilds it.
+    """
+
+    currency = models.CharField(_("Currency"), max_length=5)
+    status = models.CharField(_("Status"), max_length=255, choices=TransactionStatus.choices)
+    count = models.IntegerField(_("Transactions"), default=0)
+    # in tiyin / cents, like Transaction.amount
+    amount = models.BigIntegerField(_("Amount"), default=0)
+    items = models.IntegerField(_("Items"), default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_order_value(self):
+        return self.amount / self.count if self.count else 0
+
+
+class DailyRevenue(RevenueRollup):
+    bucket = models.DateField(_("Day"))
+
+    class Meta:
+        verbose_name = _("Daily revenue")
+        verbose_name_plural = _("Daily revenue")
+        db_table = "payment_revenue_daily"
+        ordering = ["bucket", "currency", "status"]
+        unique_together = (("bucket", "currency", "status"),)
+
+
+class HourlyRevenue(RevenueRollup):
+    bucket = models.DateTimeField(_("Hour"))
+
+    class Meta:
+        verbose_name = _("Hourly revenue")
+        verbose_name_plural = _("Hourly revenue")
+        db_table = "payment_revenue_hourly"
+        ordering = ["bucket", "currency", "status"]
+        unique_together = (("bucket", "currency", "status"),)
@@ -16,19 +16,25 @@ class InterforumClient:
     SUCCESS_STATUS_TEXT = "OK"
     ERROR_STATUS_TEXT = "ERROR"
 
-    def __init__(self, params: dict = None):
+    def __init__(self, params: dict = None, lock: bool = False):
         # for merchant
         self.params = params
         self.code = self.SUCCESS
         self.error = False
-        self.transaction = self.get_transaction()
+        self.replayed = False
+        self.transaction = self.get_transaction(lock)
 
-    def get_transaction(self):
+    def get_transaction(self, lock=False):
         if not self.params or not self.params.get("account"):
             return
+        transactions = Transaction.objects.select_related("order")
+        if lock:
+            # locks the transaction and its order until the caller's atomic
+            # block ends, so duplicate callbacks are processed one at a time
+            transactions = transactions.select_for_update()
         try:
-            return Transaction.objects.get(id=self.params["account"]["order_id"])
-        except Transaction.DoesNotExist:
+            return transactions.get(id=self.params["account"]["order_id"])
+        except (Transaction.DoesNotExist, KeyError, TypeError, ValueError):
             return
 
     @classmethod
@@ -64,7 +70,7 @@ class InterforumClient:
         base_link = "https://my.paylov.uz/checkout/create"
         url = f"{base_link}/{encode_params}"
         transaction.payment_url=url
-        transaction.save()
+        transaction.save(update_fields=["payment_url", "updated_at"])
         return url
 
     def check_transaction(self):
@@ -75,19 +81,39 @@ class InterforumClient:
         self.validate_amount(self.params["amount_tiyin"])
         return self.error, self.code
 
+    def is_replay(self):
+        """Whether this callback repeats the one that already settled the transaction."""
+        recorded = self.transaction.transaction_id
+        return (
+            recorded is not None
+            and recorded == str(self.params.get("transaction_id"))
+            and self.params.get("amount_tiyin") == int(self.transaction.amount)
+            and self.transaction.status in (TransactionStatus.SUCCESS, TransactionStatus.FAILED)
+        )
+
     def perform_transaction(self):
         if not self.transaction:
             return True, self.ORDER_NOT_FOUND
 
+        if self.is_replay():
+            self.replayed = True
+            if self.transaction.status == TransactionStatus.FAILED:
+                return True, self.SERVER_ERROR
+            return False, self.SUCCESS
+
         if self.transaction.status == TransactionStatus.FAILED:
             return True, self.SERVER_ERROR
 
         self.validate_transaction()
+        if self.error:
+            # already paid: answered as such whatever the amount
+            return self.error, self.code
         self.validate_amount(self.params["amount_tiyin"])
         return self.error, self.code
 
     def validate_transaction(self):
-        if self.transaction.status == TransactionStatus.SUCCESS:
+        # a cancelled transaction lost to a sibling that paid the order
+        if self.transaction.status in (TransactionStatus.SUCCESS, TransactionStatus.CANCELLED):
             self.error = True
             self.code = self.ORDER_ALREADY_PAID
 
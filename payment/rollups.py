@@ -0,0 +1,202 @@
+"""
+Daily and hourly revenue rollups (:class:`DailyRevenue`, :class:`HourlyRevenue`).
+
+Transaction writes are turned into ``Change`` deltas that are applied with
+relative UPDATEs once the writing transaction commits, so webhooks never
+wait on the (hot) rollup rows. ``backfill_revenue`` rebuilds the tables from
+scratch with :func:`rebuild_rollups`.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncHour
+from django.utils import timezone
+
+from orders.models import OrderItem
+
+from .models import DailyRevenue, HourlyRevenue, Transaction, TransactionStatus
+
+
+class Change:
+    __slots__ = ('created_at', 'currency', 'status', 'count', 'amount', 'order_id')
+
+    def __init__(self, tx, status, amount, sign):
+        self.created_at = tx.created_at
+        self.currency = tx.currency or ''
+        self.status = status
+        self.count = sign
+        self.amount = sign * int(amount or 0)
+        self.order_id = tx.order_id
+
+
+def buckets(created_at):
+    """``{rollup model: bucket}`` of a transaction created at ``created_at``."""
+    local = timezone.localtime(created_at)
+    return {
+        DailyRevenue: local.date(),
+        HourlyRevenue: local.replace(minute=0, second=0, microsecond=0),
+    }
+
+
+def _order_items(order_ids):
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values('order_id').annotate(total=Sum('quantity')).values_list('order_id', 'total')
+    )
+    return dict(rows.order_by())
+
+
+def _add(model, key, deltas):
+    rows = model.objects.filter(bucket=key[0], currency=key[1], status=key[2])
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates or rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(bucket=key[0], currency=key[1], status=key[2], **deltas)
+    except IntegrityError:
+        # created concurrently
+        rows.update(**updates)
+
+
+def apply_changes(changes):
+    """Fold ``changes`` into one relative UPDATE (or INSERT) per touched rollup row."""
+    items = _order_items({change.order_id for change in changes})
+    totals = defaultdict(lambda: {'count': 0, 'amount': 0, 'items': 0})
+    for change in changes:
+        for model, bucket in buckets(change.created_at).items():
+            row = totals[model, (bucket, change.currency, change.status)]
+            row['count'] += change.count
+            row['amount'] += change.amount
+            row['items'] += change.count * (items.get(change.order_id) or 0)
+    for (model, key), deltas in totals.items():
+        _add(model, key, deltas)
+
+
+def schedule(changes):
+    """
+    Apply ``changes`` after the current transaction commits (immediately in
+    autocommit). Robust: a failing rollup update is logged and never reaches
+    the caller (e.g. the Paylov webhook, whose payment is already committed).
+    """
+    changes = [change for change in changes if change.count]
+    if changes:
+        transaction.on_commit(lambda: apply_changes(changes), robust=True)
+
+
+def record_status_change(transactions, status):
+    """Rollup deltas for loaded ``transactions`` that were moved to ``status`` with ``update()``."""
+    schedule([
+        change
+        for tx in transactions
+        for change in (Change(tx, tx.status, tx.amount, -1), Change(tx, status, tx.amount, 1))
+    ])
+
+
+def transaction_saved(tx, created):
+    """post_save helper."""
+    state = (tx.status, tx.amount)
+    if created:
+        schedule([Change(tx, tx.status, tx.amount, 1)])
+    elif not hasattr(tx, '_loaded_state'):
+        # previous status unknown (instance not loaded from the DB)
+        day = timezone.localtime(tx.created_at).date()
+        transaction.on_commit(lambda: rebuild_rollups(day, day), robust=True)
+    elif tx._loaded_state != state:
+        old_status, old_amount = tx._loaded_state
+        schedule([Change(tx, old_status, old_amount, -1), Change(tx, tx.status, tx.amount, 1)])
+    tx._loaded_state = state
+
+
+def transaction_deleted(tx):
+    status, amount = getattr(tx, '_loaded_state', (tx.status, tx.amount))
+    schedule([Change(tx, status, amount, -1)])
+
+
+def rebuild_rollups(since=None, until=None):
+    """
+    Recompute the rollup rows of the local days ``since`` through ``until``
+    (dates, inclusive; an open end is unbounded) from ``Transaction``.
+    Returns the number of rows written.
+    """
+    tz = timezone.get_current_timezone()
+    transactions = Transaction.objects.all()
+    daily, hourly = DailyRevenue.objects.all(), HourlyRevenue.objects.all()
+    if since is not None:
+        start = timezone.make_aware(datetime.combine(since, time.min), tz)
+        transactions = transactions.filter(created_at__gte=start)
+        daily, hourly = daily.filter(bucket__gte=since), hourly.filter(bucket__gte=start)
+    if until is not None:
+        end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min), tz)
+        transactions = transactions.filter(created_at__lt=end)
+        daily, hourly = daily.filter(bucket__lt=until + timedelta(days=1)), hourly.filter(bucket__lt=end)
+    items = (
+        OrderItem.objects.filter(order_id=OuterRef('order_id'))
+        .values('order_id').annotate(total=Sum('quantity')).values('total')
+    )
+    transactions = transactions.annotate(
+        order_items=Coalesce(Subquery(items, output_field=IntegerField()), Value(0)),
+    )
+    written = 0
+    with transaction.atomic():
+        for model, rows, trunc in ((DailyRevenue, daily, TruncDate), (HourlyRevenue, hourly, TruncHour)):
+            rows.delete()
+            stats = (
+                transactions.annotate(period=trunc('created_at', tzinfo=tz))
+                .values('period', 'currency', 'status')
+                .annotate(n=Count('id'), total=Sum('amount'), quantity=Sum('order_items'))
+                .order_by()
+            )
+            objs = [
+                model(bucket=row['period'], currency=row['currency'] or '', status=row['status'],
+                      count=row['n'], amount=row['total'] or 0, items=row['quantity'] or 0)
+                for row in stats
+            ]
+            model.objects.bulk_create(objs, batch_size=500)
+            written += len(objs)
+    return written
+
+
+def series(model, since, currency=None, status=TransactionStatus.SUCCESS):
+    """
+    Per-bucket totals of ``model`` from ``since`` (a bucket value) to now, for
+    the dashboard charts: every bucket is present (zeros for gaps) and carries
+    its bar ``height`` in percent of the busiest one. Amounts are in tiyin.
+    """
+    rows = model.objects.filter(bucket__gte=since, status=status)
+    if currency:
+        rows = rows.filter(currency=currency)
+    totals = {
+        row['bucket']: row
+        for row in rows.values('bucket').annotate(count=Sum('count'), amount=Sum('amount'), items=Sum('items'))
+        .order_by()
+    }
+    now = buckets(timezone.now())[model]
+    step = timedelta(days=1) if model is DailyRevenue else timedelta(hours=1)
+    points = []
+    bucket = since
+    while bucket <= now:
+        row = totals.get(bucket, {})
+        count, amount = row.get('count') or 0, row.get('amount') or 0
+        points.append({
+            'bucket': bucket, 'count': count, 'amount': amount, 'items': row.get('items') or 0,
+            'average': amount / count if count else 0,
+        })
+        bucket = timezone.localtime(bucket + step) if model is HourlyRevenue else bucket + step
+    peak = max((point['amount'] for point in points), default=0)
+    for point in points:
+        point['height'] = round(100 * point['amount'] / peak, 1) if peak else 0
+    return points
+
+
+def status_totals(since, currency=None):
+    """``[{status, count, amount, items}]`` over the daily rollups from the day ``since``."""
+    rows = DailyRevenue.objects.filter(bucket__gte=since)
+    if currency:
+        rows = rows.filter(currency=currency)
+    return list(
+        rows.values('status').annotate(count=Sum('count'), amount=Sum('amount'), items=Sum('items'))
+        .order_by('status')
+    )
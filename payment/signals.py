@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import Transaction
+from .rollups import transaction_deleted, transaction_saved
+
+
+def _transaction_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        transaction_saved(instance, created)
+
+
+def _transaction_deleted(sender, instance, **kwargs):
+    transaction_deleted(instance)
+
+
+post_save.connect(_transaction_saved, sender=Transaction, dispatch_uid='payment-revenue-save')
+post_delete.connect(_transaction_deleted, sender=Transaction, dispatch_uid='payment-revenue-delete')
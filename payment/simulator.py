@@ -0,0 +1,223 @@
+"""
+Local stand-in for Paylov, for load-testing the webhook (``manage.py simulate_paylov``).
+
+Orders are placed through the real ``orders:create`` view; the checkout link
+it redirects to is decoded like Paylov would, and ``transaction.check`` /
+``transaction.perform`` JSON-RPC callbacks are then fired at the webhook with
+Basic auth, from a thread pool at a fixed rate. Calls go through Django's
+test client in-process (queries are counted per call) or, with
+``base_url``, over HTTP to a running server sharing the database.
+"""
+import base64
+import json
+import statistics
+import threading
+import time
+import urllib.parse
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Transaction, TransactionStatus
+from .utils import PaylovMethods
+
+
+def decode_payment_link(url):
+    """The query parameters encoded in a ``create_payment_link`` URL, as a flat dict."""
+    encoded = url.rstrip('/').rsplit('/', 1)[-1]
+    query = base64.b64decode(encoded).decode('utf-8')
+    return dict(urllib.parse.parse_qsl(query))
+
+
+def _host():
+    hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+    return hosts[0] if hosts else 'localhost'
+
+
+def place_order(product_id, qty=1):
+    """Create an order for ``qty`` of a product like a shopper would; returns the decoded payment link."""
+    client = Client(HTTP_HOST=_host())
+    # secure: without DEBUG, SECURE_SSL_REDIRECT answers plain http with a 301
+    client.post(reverse('add_to_cart'), {'product_id': product_id, 'qty': qty}, secure=True)
+    response = client.post(reverse('orders:create'), {'first_name': 'Load', 'last_name': 'Test'}, secure=True)
+    location = response.get('Location', '')
+    if response.status_code != 302 or 'paylov' not in location:
+        raise RuntimeError(f'order was not created (HTTP {response.status_code}, {location or "no redirect"})')
+    return decode_payment_link(location)
+
+
+class Call:
+    # ``account_id`` is the link's ``account.order_id``, i.e. our Transaction pk
+    __slots__ = ('account_id', 'method', 'transaction_id', 'status', 'latency', 'queries', 'error')
+
+    def __init__(self, account_id, method, transaction_id):
+        self.account_id = account_id
+        self.method = method
+        self.transaction_id = transaction_id
+        self.status = None
+        self.latency = None
+        self.queries = None
+        self.error = None
+
+
+class StandInProvider:
+    """Sends the JSON-RPC callbacks Paylov would send for decoded payment links."""
+
+    def __init__(self, base_url=None, username=None, password=None):
+        self.base_url = base_url.rstrip('/') if base_url else None
+        username = settings.PAYLOV_USERNAME if username is None else username
+        password = settings.PAYLOV_PASSWORD if password is None else password
+        self.authorization = 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
+        self._local = threading.local()
+        self._ids = iter(range(1, 1 << 62))
+        self._ids_lock = threading.Lock()
+
+    def payload(self, method, link, transaction_id):
+        with self._ids_lock:
+            rpc_id = next(self._ids)
+        # the link carries the amount as rendered from the model, e.g. "500.00"
+        params = {'amount_tiyin': int(Decimal(link['amount'])), 'account': {'order_id': link['account.order_id']}}
+        if method == PaylovMethods.PERFORM_TRANSACTION:
+            params['transaction_id'] = transaction_id
+        return {'jsonrpc': '2.0', 'id': rpc_id, 'method': method, 'params': params}
+
+    def _post_local(self, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(HTTP_HOST=_host())
+        response = client.post(reverse('api'), payload, content_type='application/json', secure=True,
+                               HTTP_AUTHORIZATION=self.authorization)
+        return response.status_code, response.json() if response.status_code == 200 else None
+
+    def _post_remote(self, payload):
+        import requests
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        response = session.post(f'{self.base_url}{reverse("api")}', data=json.dumps(payload), timeout=30,
+                                headers={'Content-Type': 'application/json', 'Authorization': self.authorization})
+        return response.status_code, response.json() if response.status_code == 200 else None
+
+    def send(self, call, link):
+        started = time.perf_counter()
+        try:
+            payload = self.payload(call.method, link, call.transaction_id)
+            if self.base_url:
+                code, body = self._post_remote(payload)
+            else:
+                with CaptureQueriesContext(connection) as queries:
+                    code, body = self._post_local(payload)
+                call.queries = len(queries)
+            if body is None:
+                call.error = f'HTTP {code}'
+            else:
+                call.status = body['result']['status']
+        except Exception as exc:
+            call.error = f'{type(exc).__name__}: {exc}'
+        call.latency = time.perf_counter() - started
+        return call
+
+
+def plan_calls(links, retries=1, distinct_ids=False):
+    """One check and ``retries`` performs per order; retries reuse the transaction_id unless ``distinct_ids``."""
+    calls = []
+    for link in links:
+        account_id = link['account.order_id']
+        calls.append((Call(account_id, PaylovMethods.CHECK_TRANSACTION, None), link))
+        for attempt in range(retries):
+            transaction_id = f'sim-{account_id}-{attempt if distinct_ids else 0}'
+            calls.append((Call(account_id, PaylovMethods.PERFORM_TRANSACTION, transaction_id), link))
+    return calls
+
+
+def fire(provider, calls, rate=0, concurrency=8):
+    """Send ``calls`` at ``rate`` per second (0: as fast as possible); returns them and the wall time."""
+    started = time.perf_counter()
+    if concurrency <= 1:
+        # in the calling thread: sees the caller's uncommitted data (tests)
+        for n, (call, link) in enumerate(calls):
+            _wait(started, n, rate)
+            provider.send(call, link)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = []
+            for n, (call, link) in enumerate(calls):
+                _wait(started, n, rate)
+                futures.append(pool.submit(provider.send, call, link))
+            for future in futures:
+                future.result()
+    return [call for call, _link in calls], time.perf_counter() - started
+
+
+def _wait(started, n, rate):
+    if rate > 0:
+        delay = started + n / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def summarize(calls, elapsed):
+    """``{method: {...}}`` throughput, latency (ms) and query statistics, plus ``'total'``."""
+    by_method = defaultdict(list)
+    for call in calls:
+        by_method[call.method].append(call)
+    report = {}
+    for method, group in [*sorted(by_method.items()), ('total', calls)]:
+        latencies = [call.latency * 1000 for call in group if call.latency is not None]
+        queries = [call.queries for call in group if call.queries is not None]
+        report[method] = {
+            'calls': len(group),
+            'errors': sum(1 for call in group if call.error),
+            'statuses': dict(Counter(call.status for call in group if call.status is not None)),
+            'throughput': len(group) / elapsed if elapsed else 0.0,
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies, default=0.0),
+            'queries_mean': statistics.fmean(queries) if queries else None,
+            'queries_max': max(queries, default=None),
+        }
+    return report
+
+
+def find_anomalies(calls):
+    """
+    Double-payment symptoms per order: several successful transactions,
+    several Paylov ids acknowledged as paid, or a payment acknowledged while
+    no transaction is marked paid.
+    """
+    orders = dict(
+        Transaction.objects.filter(id__in={int(call.account_id) for call in calls}).values_list('id', 'order_id')
+    )
+    acknowledged = defaultdict(set)
+    for call in calls:
+        if call.method == PaylovMethods.PERFORM_TRANSACTION and call.status == '0':
+            acknowledged[orders.get(int(call.account_id))].add(call.transaction_id)
+    paid = Counter(
+        Transaction.objects.filter(order_id__in=set(orders.values()), status=TransactionStatus.SUCCESS)
+        .values_list('order_id', flat=True)
+    )
+    anomalies = []
+    for order_id in sorted(set(orders.values()), key=str):
+        ids = acknowledged.get(order_id, set())
+        if paid[order_id] > 1:
+            anomalies.append(f'order {order_id}: {paid[order_id]} successful transactions')
+        if len(ids) > 1:
+            anomalies.append(f'order {order_id}: {len(ids)} Paylov ids acknowledged ({", ".join(sorted(ids))})')
+        if ids and not paid[order_id]:
+            anomalies.append(f'order {order_id}: payment acknowledged but not recorded')
+    return anomalies
@@ -1,3 +1,168 @@
-from django.test import TestCase
+import base64
+import io
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from caching.tiered import catalog_cache
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+
+from .models import DailyRevenue, HourlyRevenue, Transaction, TransactionStatus
+from .rollups import buckets
+
+
+@override_settings(PAYLOV_USERNAME="paylov", PAYLOV_PASSWORD="secret")
+class PaylovWebhookTests(TestCase):
+    AUTH = {'HTTP_AUTHORIZATION': 'Basic ' + base64.b64encode(b"paylov:secret").decode()}
+
+    def setUp(self):
+        self.order = Order.objects.create(total_price=10)
+        self.tx = Transaction.objects.create(order=self.order, amount=1000, currency="UZS")
+        self.sibling = Transaction.objects.create(order=self.order, amount=1000, currency="UZS")
+
+    def _perform(self, transaction_id="pl-1", amount=1000, tx=None):
+        account = {'order_id': (tx or self.tx).pk}
+        payload = {
+            'id': 1,
+            'method': 'transaction.perform',
+            'params': {'transaction_id': transaction_id, 'amount_tiyin': amount, 'account': account},
+        }
+        response = self.client.post(reverse('api'), payload, content_type='application/json', **self.AUTH)
+        return response.json()['result']['status']
+
+    def test_success_locks_once_and_cancels_siblings(self):
+        # savepoint, locked select, update, locked sibling select, sibling update, release
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(6):
+            self.assertEqual(self._perform(), "0")
+        self.tx.refresh_from_db()
+        self.assertEqual((self.tx.status, self.tx.transaction_id), (TransactionStatus.SUCCESS, "pl-1"))
+        self.sibling.refresh_from_db()
+        self.assertEqual(self.sibling.status, TransactionStatus.CANCELLED)
+
+    def test_replayed_callback_gets_the_first_answer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._perform()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._perform(), "0")
+        catalog_cache.shared.clear()
+        # without the cached answer the recorded transaction_id is recognised
+        self.assertEqual(self._perform(), "0")
+
+    def test_replay_cache_only_answers_the_same_account_and_amount(self):
+        other = Transaction.objects.create(order=Order.objects.create(total_price=10), amount=1000, currency="UZS")
+        with self.captureOnCommitCallbacks(execute=True):
+            self._perform()
+        self.assertEqual(self._perform(amount=5), "201")
+        with self.captureOnCommitCallbacks(execute=True):
+            status = self._perform(tx=other)
+        other.refresh_from_db()
+        # answered from the database, so the answer matches what was recorded
+        self.assertEqual((status, other.status), ("0", TransactionStatus.SUCCESS))
+
+    def test_wrong_amount_does_not_fail_a_paid_transaction(self):
+        self._perform(transaction_id="X")
+        self.assertEqual(self._perform(transaction_id="Y", amount=5), "201")
+        self.tx.refresh_from_db()
+        self.assertEqual((self.tx.status, self.tx.transaction_id), (TransactionStatus.SUCCESS, "X"))
+
+    def test_other_callback_does_not_fail_a_paid_transaction(self):
+        self._perform()
+        self.assertEqual(self._perform(transaction_id="pl-2"), "201")
+        self.tx.refresh_from_db()
+        self.assertEqual((self.tx.status, self.tx.transaction_id), (TransactionStatus.SUCCESS, "pl-1"))
+
+    def test_wrong_amount_marks_failed(self):
+        self.assertEqual(self._perform(amount=5), "5")
+        self.tx.refresh_from_db()
+        self.assertEqual(self.tx.status, TransactionStatus.FAILED)
+
+
+@override_settings(PAYLOV_USERNAME="paylov", PAYLOV_PASSWORD="secret")
+class PaylovSimulatorTests(TestCase):
+    def test_simulated_callbacks_pay_each_order_once(self):
+        cat = Category.objects.create(name="Cat")
+        Product.objects.create(category=cat, name="Widget", price="2.00", slug="widget")
+        out = io.StringIO()
+        call_command('simulate_paylov', orders=2, retries=3, distinct_ids=True, concurrency=1, keep=True, stdout=out)
+        self.assertIn("No double-payment anomalies", out.getvalue())
+        self.assertRegex(out.getvalue(), r"transaction.perform\s+6\s+0 ")
+        self.assertEqual(Transaction.objects.filter(status=TransactionStatus.SUCCESS).count(), 2)
+
+    @override_settings(DEBUG=False, SECURE_SSL_REDIRECT=True)
+    def test_runs_without_debug(self):
+        cat = Category.objects.create(name="Cat")
+        Product.objects.create(category=cat, name="Widget", price="2.00", slug="widget")
+        out = io.StringIO()
+        call_command('simulate_paylov', orders=1, retries=1, concurrency=1, keep=True, stdout=out)
+        self.assertIn("No double-payment anomalies", out.getvalue())
+
+
+@override_settings(PAYLOV_USERNAME="paylov", PAYLOV_PASSWORD="secret")
+class RevenueRollupTests(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(total_price=10)
+        OrderItem.objects.create(order=self.order, kind="product", name="Widget", unit_price=5, quantity=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tx = Transaction.objects.create(order=self.order, amount=1000, currency="UZS")
+            Transaction.objects.create(order=self.order, amount=1000, currency="UZS")
+
+    def _rollups(self, model):
+        return {
+            row.status: (row.count, row.amount, row.items)
+            for row in model.objects.filter(bucket=buckets(self.tx.created_at)[model], currency="UZS")
+        }
+
+    def test_payment_moves_counts_between_statuses(self):
+        self.assertEqual(self._rollups(DailyRevenue), {TransactionStatus.WAITING: (2, 2000, 4)})
+        payload = {
+            'id': 1,
+            'method': 'transaction.perform',
+            'params': {'transaction_id': 'pl-1', 'amount_tiyin': 1000, 'account': {'order_id': self.tx.pk}},
+        }
+        auth = 'Basic ' + base64.b64encode(b"paylov:secret").decode()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('api'), payload, content_type='application/json', HTTP_AUTHORIZATION=auth)
+        expected = {
+            TransactionStatus.WAITING: (0, 0, 0),
+            TransactionStatus.SUCCESS: (1, 1000, 2),
+            TransactionStatus.CANCELLED: (1, 1000, 2),
+        }
+        self.assertEqual(self._rollups(DailyRevenue), expected)
+        self.assertEqual(self._rollups(HourlyRevenue), expected)
+
+    def test_rollup_failure_does_not_break_the_webhook(self):
+        from unittest import mock
+        from django.db import DatabaseError
+        from .views import _replay_key
+        params = {'transaction_id': 'pl-1', 'amount_tiyin': 1000, 'account': {'order_id': self.tx.pk}}
+        auth = 'Basic ' + base64.b64encode(b"paylov:secret").decode()
+        with mock.patch('payment.rollups.apply_changes', side_effect=DatabaseError), self.assertLogs(level='ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('api'), {'id': 1, 'method': 'transaction.perform', 'params': params},
+                                        content_type='application/json', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.json()['result']['status'], "0")
+        self.assertIsNotNone(catalog_cache.shared.get(_replay_key(params)))
+
+    def test_backfill_matches_incremental_rollups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tx.status = TransactionStatus.FAILED
+            self.tx.save()
+        incremental = self._rollups(DailyRevenue), self._rollups(HourlyRevenue)
+        DailyRevenue.objects.all().delete()
+        call_command('backfill_revenue', stdout=io.StringIO())
+        # the backfill does not keep empty rows
+        self.assertEqual(
+            (self._rollups(DailyRevenue), self._rollups(HourlyRevenue)),
+            tuple({status: row for status, row in rollups.items() if row[0]} for rollups in incremental),
+        )
+
+    def test_dashboard_charts(self):
+        admin = get_user_model().objects.create_superuser(email="admin@example.com", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse('orders:dashboard'), {'currency': 'UZS'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['daily']), 30)
+        self.assertEqual(response.context['status_totals'][0]['count'], 2)
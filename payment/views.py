@@ -5,13 +5,34 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from caching.tiered import catalog_cache
 from payment.auth import authentication as paylov_auth
 from payment.provider import InterforumClient as PaylovProvider
+from payment.models import TransactionStatus
 from payment.utils import PaylovMethods
 
-from .models import Transaction, TransactionStatus
 from .serializers import PaylovSerializer
 
+# how long the result of a performed transaction_id is replayed from the cache
+REPLAY_TIMEOUT = 60 * 60 * 24
+
+
+def _replay_key(params):
+    """
+    Cache key of a perform callback: a reused ``transaction_id`` for another
+    account or amount misses and goes through the locked DB path.
+    """
+    transaction_id = params.get("transaction_id")
+    account = params.get("account") or {}
+    if not transaction_id or not isinstance(account, dict):
+        return None
+    return f"paylov:perform:{transaction_id}:{account.get('order_id')}:{params.get('amount_tiyin')}"
+
+
+def _replay_cache():
+    # shared by all workers, unlike the per-process default cache
+    return catalog_cache.shared
+
 
 class PaylovAPIView(APIView):
     permission_classes = [AllowAny]
@@ -36,8 +57,10 @@ class PaylovAPIView(APIView):
         method = serializer.validated_data["method"]
         self.params = serializer.validated_data["params"]
 
-        with db_transaction.atomic():
-            response_data = self.METHODS[method]()
+        response_data = self.replayed() if method == PaylovMethods.PERFORM_TRANSACTION else None
+        if response_data is None:
+            with db_transaction.atomic():
+                response_data = self.METHODS[method]()
 
         if isinstance(response_data, dict):
             response_data.update({"jsonrpc": "2.0", "id": request.data.get("id", None)})
@@ -55,8 +78,16 @@ class PaylovAPIView(APIView):
             result=dict(status=code, statusText=PaylovProvider.SUCCESS_STATUS_TEXT)
         )
 
+    def replayed(self):
+        """The cached answer to an already performed ``transaction_id``, if any."""
+        key = _replay_key(self.params)
+        result = _replay_cache().get(key) if key else None
+        return None if result is None else dict(result=dict(result))
+
     def perform(self):
-        error, code = PaylovProvider(self.params).perform_transaction()
+        transaction_id = self.params.get("transaction_id")
+        provider = PaylovProvider(self.params, lock=True)
+        error, code = provider.perform_transaction()
 
         # when order is not found
         if error and code == PaylovProvider.ORDER_NOT_FOUND:
@@ -64,19 +95,21 @@ class PaylovAPIView(APIView):
                 result=dict(status=code, statusText=PaylovProvider.ERROR_STATUS_TEXT)
             )
 
-        transaction = Transaction.objects.get(id=self.params["account"]["order_id"])
-        transaction_id = self.params["transaction_id"]
-        # when order found and transaction created but error occurred
-        if error:
-            transaction.transaction_id = transaction_id
-            transaction.status = TransactionStatus.FAILED
-            transaction.save()
-            return dict(
-                result=dict(status=code, statusText=PaylovProvider.ERROR_STATUS_TEXT)
-            )
+        transaction = provider.transaction
+        # when order found and transaction created but error occurred;
+        # only a waiting transaction can fail: a paid or cancelled one stays
+        # as it is whatever a later callback says
+        if error and not provider.replayed and transaction.status == TransactionStatus.WAITING:
+            transaction.mark_failed(transaction_id)
         # if everything is ok
-        transaction.process_after_succesful_payment(transaction_id)
+        elif not error and not provider.replayed:
+            transaction.process_after_succesful_payment(transaction_id)
 
-        return dict(
-            result=dict(status=code, statusText=PaylovProvider.SUCCESS_STATUS_TEXT)
+        result = dict(
+            status=code,
+            statusText=PaylovProvider.ERROR_STATUS_TEXT if error else PaylovProvider.SUCCESS_STATUS_TEXT,
         )
+        key = _replay_key(self.params)
+        if key:
+            db_transaction.on_commit(lambda: _replay_cache().set(key, result, REPLAY_TIMEOUT))
+        return dict(result=dict(result))
@@ -0,0 +1,112 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils.translation import get_language
+
+from .models import Product, ProductCard
+
+CARD_FIELDS = (
+    'id', 'product_id', 'name', 'price', 'final_price', 'discount', 'slug', 'image',
+    'category_id', 'category_name', 'created_at',
+)
+
+# ``?sort=`` values of the listings; each ends on the pk so paging is stable
+CARD_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'price': ('final_price', 'id'),
+    '-price': ('-final_price', '-id'),
+    'discount': ('-discount', '-created_at', '-id'),
+}
+
+
+def card_languages():
+    return [code for code, _name in settings.LANGUAGES]
+
+
+def current_card_language(language_code=None):
+    code = (language_code or get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    return code if code in card_languages() else settings.LANGUAGE_CODE
+
+
+def translated(obj, field, language_code):
+    """Value of ``field`` in ``language_code`` with parler's fallbacks applied."""
+    if obj is None:
+        return None
+    return obj.safe_translation_getter(field, language_code=language_code, any_language=True)
+
+
+def product_cards(language_code=None):
+    """Lightweight ``.values()`` rows for product listings in one language."""
+    return ProductCard.objects.filter(
+        language_code=current_card_language(language_code)
+    ).values(*CARD_FIELDS)
+
+
+def parse_price(value):
+    """A ``min_price``/``max_price`` query value as a Decimal, or ``None`` when absent/invalid."""
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
+def filter_cards(cards, sort=None, min_price=None, max_price=None):
+    """Apply the listing price range (on the discounted price) and ``sort`` to card rows."""
+    if min_price is not None:
+        cards = cards.filter(final_price__gte=min_price)
+    if max_price is not None:
+        cards = cards.filter(final_price__lte=max_price)
+    if sort in CARD_ORDERINGS:
+        cards = cards.order_by(*CARD_ORDERINGS[sort])
+    return cards
+
+
+def facet_counts(cards, *fields):
+    """
+    ``{(value, ...): count}`` of card rows grouped by ``fields``, in one
+    grouped query. ``cards`` carries the listing's other filters (search,
+    price range) but not the facet's own.
+    """
+    rows = cards.order_by().values(*fields).annotate(count=Count('id')).values_list(*fields, 'count')
+    return {tuple(row[:-1]): row[-1] for row in rows}
+
+
+def build_product_cards(products):
+    for product in products:
+        # objects without any translation are not listable (and may be mid-delete)
+        if not product.translations.all():
+            continue
+        for code in card_languages():
+            yield ProductCard(
+                product=product,
+                language_code=code,
+                name=translated(product, 'name', code) or '',
+                price=product.price,
+                final_price=product.final_price,
+                discount=product.discount,
+                slug=product.slug,
+                image=product.image.name or '',
+                category_id=product.category_id,
+                category_name=translated(product.category, 'name', code) or '',
+                is_active=product.is_active,
+                created_at=product.created_at,
+            )
+
+
+def refresh_product_cards(pks):
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return 0
+    products = (
+        Product.objects.filter(pk__in=pks)
+        .select_related('category')
+        .prefetch_related('translations', 'category__translations')
+    )
+    cards = list(build_product_cards(products))
+    with transaction.atomic():
+        ProductCard.objects.filter(product_id__in=pks).delete()
+        ProductCard.objects.bulk_create(cards, batch_size=500)
+    return len(cards)
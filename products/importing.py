@@ -0,0 +1,393 @@
+"""
+Bulk catalog import (``manage.py import_catalog``).
+
+Rows are read lazily from CSV or JSON Lines files and applied a chunk at a
+time: each chunk costs a fixed number of queries (slug lookup, bulk
+inserts/updates, translation upserts, card and search refresh) inside its
+own transaction, whatever its size.
+
+A row describes one product::
+
+    slug, name / name_<lang>, category / category_<lang>, price, discount, is_active, image
+
+``name`` and ``category`` are the default-language values; in JSON Lines
+they may also be ``{"ru": ..., "en": ...}`` objects. Rows are matched to
+existing products by ``slug`` and to categories by their default-language
+name. Rows without a slug always create a product; their slug is derived
+from the name as ``Product.save`` would.
+"""
+import csv
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from caching.snapshot import bump_catalog_version
+from caching.tiered import catalog_cache
+from search import index
+
+from .cards import card_languages, refresh_product_cards
+from .models import Category, Product
+from .prices import CENT, discounted_price
+
+FORMATS = ('csv', 'jsonl')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'off'}
+# prefix lookups per query when resolving colliding slugs
+SLUG_LOOKUP_BATCH = 100
+# skipped rows are all counted, but only the first ones are kept for the report
+MAX_ERRORS = 100
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path):
+    for fmt in FORMATS:
+        if path.endswith(f'.{fmt}'):
+            return fmt
+    return 'jsonl' if path.endswith(('.ndjson', '.json')) else 'csv'
+
+
+def read_rows(fh, fmt, on_error):
+    """Yield ``(line, row)`` from an open text file; undecodable lines go to ``on_error``."""
+    if fmt == 'csv':
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(fh, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            on_error(line, f'invalid JSON: {exc}')
+            continue
+        if isinstance(row, dict):
+            yield line, row
+        else:
+            on_error(line, 'expected a JSON object')
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _translations(row, field):
+    """``{language: value}`` from ``field`` (default language or an object) and ``field_<lang>``."""
+    value = row.get(field)
+    values = dict(value) if isinstance(value, dict) else {settings.LANGUAGE_CODE: value}
+    for code in card_languages():
+        if not _blank(row.get(f'{field}_{code}')):
+            values[code] = row[f'{field}_{code}']
+    return {code: str(text).strip() for code, text in values.items() if code in card_languages() and not _blank(text)}
+
+
+def _price(value):
+    try:
+        price = Decimal(str(value).strip()).quantize(CENT)
+    except (InvalidOperation, ValueError):
+        raise RowError(f'invalid price {value!r}') from None
+    if not price.is_finite() or price < 0:
+        raise RowError(f'invalid price {value!r}')
+    return price
+
+
+def _discount(value):
+    try:
+        discount = int(str(value).strip())
+    except ValueError:
+        raise RowError(f'invalid discount {value!r}') from None
+    if not 0 <= discount <= 90:
+        raise RowError(f'discount {discount} outside 0-90')
+    return discount
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise RowError(f'invalid is_active {value!r}')
+
+
+def parse_row(row):
+    """Normalize one input row; absent/blank optional values are left out."""
+    parsed = {
+        'slug': None if _blank(row.get('slug')) else slugify(str(row['slug'])),
+        'names': _translations(row, 'name'),
+        'category': _translations(row, 'category'),
+    }
+    if not _blank(row.get('price')):
+        parsed['price'] = _price(row['price'])
+    if not _blank(row.get('discount')):
+        parsed['discount'] = _discount(row['discount'])
+    if not _blank(row.get('is_active')):
+        parsed['is_active'] = _bool(row['is_active'])
+    if not _blank(row.get('image')):
+        parsed['image'] = str(row['image']).strip()
+    if parsed['category'] and settings.LANGUAGE_CODE not in parsed['category']:
+        raise RowError(f'category needs a {settings.LANGUAGE_CODE} name')
+    return parsed
+
+
+def slug_base(names, fallback):
+    # non-latin names slugify to nothing, so try every language before the fallback
+    for code in (settings.LANGUAGE_CODE, *card_languages()):
+        base = slugify(names.get(code) or '')[:50]
+        if base:
+            return base
+    return fallback
+
+
+class CatalogImporter:
+    """
+    Applies parsed rows to products, categories and their translations.
+
+    ``import_rows`` returns once the input is exhausted; counters are on the
+    instance (``created``, ``updated``, ``skipped``, ``categories_created``
+    and the first ``MAX_ERRORS`` ``errors`` as ``(line, message)``).
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.created = self.updated = self.skipped = self.categories_created = 0
+        self.errors = []
+        self._product_translation = Product._parler_meta.root_model
+        self._category_translation = Category._parler_meta.root_model
+        # categories are few: keep all their names for the whole import.
+        # ``_category_ids`` maps a row's default-language category name to its
+        # pk; existing categories are matched on a name in any language
+        self._category_ids = {}
+        self._category_names = {}
+        self._category_lookup = {}
+        self._changed_categories = set()
+        rows = self._category_translation.objects.order_by('master_id').values_list('master_id', 'language_code', 'name')
+        for pk, code, name in rows:
+            self._category_names.setdefault(pk, {})[code] = name
+            self._category_lookup.setdefault((code, name), pk)
+
+    @property
+    def processed(self):
+        return self.created + self.updated
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    def import_rows(self, rows):
+        for chunk in chunked(rows, self.batch_size):
+            parsed = []
+            for line, row in chunk:
+                try:
+                    parsed.append((line, parse_row(row)))
+                except RowError as exc:
+                    self.error(line, str(exc))
+            if parsed:
+                with transaction.atomic():
+                    self._apply(parsed)
+        self._refresh_changed_categories()
+        catalog_cache.invalidate('categories')
+        catalog_cache.bump_generation('products', 'pages')
+        bump_catalog_version()
+
+    # -- categories --------------------------------------------------------
+
+    def _resolve_categories(self, rows):
+        """Create the rows' missing categories and upsert their changed names."""
+        wanted = {}
+        for names in (row['category'] for row in rows if row['category']):
+            wanted.setdefault(names[settings.LANGUAGE_CODE], {}).update(names)
+        for name, names in wanted.items():
+            if name not in self._category_ids:
+                # the default language first, then any other name of the row
+                pk = next(filter(None, (
+                    self._category_lookup.get((code, text))
+                    for code, text in sorted(names.items(), key=lambda item: item[0] != settings.LANGUAGE_CODE)
+                )), None)
+                if pk is not None:
+                    self._category_ids[name] = pk
+        missing = [name for name in wanted if name not in self._category_ids]
+        if missing:
+            categories = [Category() for _name in missing]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Category.objects.bulk_create(categories)
+            else:
+                for category in categories:
+                    category.save()
+            for name, category in zip(missing, categories):
+                self._category_ids[name] = category.pk
+                self._category_names[category.pk] = {}
+            self.categories_created += len(missing)
+        translations = []
+        for name, names in wanted.items():
+            pk = self._category_ids[name]
+            known = self._category_names[pk]
+            for code, text in names.items():
+                if known.get(code) != text:
+                    translations.append(self._category_translation(master_id=pk, language_code=code, name=text))
+                    known[code] = text
+                    self._category_lookup.setdefault((code, text), pk)
+                    if name not in missing:
+                        self._changed_categories.add(pk)
+        self._upsert(self._category_translation, translations)
+
+    def _refresh_changed_categories(self):
+        if not self._changed_categories:
+            return
+        pks = Product.objects.filter(category_id__in=self._changed_categories).values_list('pk', flat=True)
+        for batch in chunked(pks.iterator(chunk_size=self.batch_size), self.batch_size):
+            refresh_product_cards(batch)
+        catalog_cache.invalidate(*[f'category:{pk}' for pk in self._changed_categories])
+        self._changed_categories.clear()
+
+    # -- products ----------------------------------------------------------
+
+    def _upsert(self, model, translations):
+        if not translations:
+            return
+        options = {'update_conflicts': True, 'update_fields': ['name']}
+        # MySQL upserts on any unique key (ON DUPLICATE KEY) and rejects a target
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['language_code', 'master']
+        model.objects.bulk_create(translations, batch_size=self.batch_size, **options)
+
+    def _resolve_slugs(self, rows, reserved):
+        """Give every slug-less new row a unique slug, with one lookup per ``SLUG_LOOKUP_BATCH`` collisions."""
+        if not rows:
+            return
+        bases = [row['base'] for row in rows]
+        taken = set(reserved)
+        taken.update(Product.objects.filter(slug__in=set(bases)).values_list('slug', flat=True))
+        seen, colliding = set(), set()
+        for base in bases:
+            if base in taken or base in seen:
+                colliding.add(base)
+            seen.add(base)
+        colliding = sorted(colliding)
+        for start in range(0, len(colliding), SLUG_LOOKUP_BATCH):
+            group = colliding[start:start + SLUG_LOOKUP_BATCH]
+            lookup = reduce(or_, (Q(slug__startswith=f'{base}-') for base in group))
+            taken.update(Product.objects.filter(lookup).values_list('slug', flat=True))
+        for row in rows:
+            candidate, counter = row['base'], 1
+            while candidate in taken:
+                counter += 1
+                candidate = f"{row['base']}-{counter}"[:70]
+            taken.add(candidate)
+            row['slug'] = candidate
+
+    def _apply(self, parsed):
+        rows, by_slug = [], {}
+        for line, row in parsed:
+            earlier = by_slug.get(row['slug']) if row['slug'] else None
+            if earlier is not None:
+                # a later row naming the same slug wins, field by field
+                earlier.update({
+                    **row,
+                    'names': {**earlier['names'], **row['names']},
+                    'category': row['category'] or earlier['category'],
+                })
+                continue
+            if row['slug']:
+                by_slug[row['slug']] = row
+            rows.append((line, row))
+        existing = {product.slug: product for product in Product.objects.filter(slug__in=list(by_slug))}
+        creates, updates = [], []
+        for line, row in rows:
+            product = existing.get(row['slug'])
+            if product is not None:
+                updates.append((product, row))
+                continue
+            problem = self._missing_for_create(row)
+            if problem:
+                self.error(line, problem)
+            else:
+                creates.append(row)
+
+        self._resolve_categories([*creates, *(row for _product, row in updates)])
+        unnamed = [row for row in creates if not row['slug']]
+        for row in unnamed:
+            row['base'] = slug_base(row['names'], uuid.uuid4().hex[:12])
+        self._resolve_slugs(unnamed, reserved={row['slug'] for row in creates if row['slug']})
+
+        now = timezone.now()
+        translations = []
+        new_products = []
+        for row in creates:
+            price, discount = row['price'], row.get('discount', 0)
+            product = Product(
+                slug=row['slug'],
+                category_id=self._category_ids[row['category'][settings.LANGUAGE_CODE]],
+                price=price,
+                # bulk_create skips save(), which normally derives it
+                final_price=discounted_price(price, discount),
+                discount=discount,
+                is_active=row.get('is_active', True),
+                image=row.get('image', ''),
+            )
+            new_products.append(product)
+            translations.extend(self._names(product.pk, row['names']))
+        for product, row in updates:
+            if row['category']:
+                product.category_id = self._category_ids[row['category'][settings.LANGUAGE_CODE]]
+            for field in ('price', 'discount', 'is_active', 'image'):
+                if field in row:
+                    setattr(product, field, row[field])
+            product.final_price = discounted_price(product.price, product.discount)
+            product.updated_at = now
+            translations.extend(self._names(product.pk, row['names']))
+
+        Product.objects.bulk_create(new_products, batch_size=self.batch_size)
+        if updates:
+            Product.objects.bulk_update(
+                [product for product, _row in updates],
+                ['category', 'price', 'final_price', 'discount', 'is_active', 'image', 'updated_at'],
+                batch_size=self.batch_size,
+            )
+        self._upsert(self._product_translation, translations)
+        # bulk writes send no signals: refresh what the product signals maintain
+        pks = [product.pk for product in new_products] + [product.pk for product, _row in updates]
+        refresh_product_cards(pks)
+        index.index_objects(Product, pks)
+        if updates:
+            catalog_cache.invalidate(*[f'product:{product.pk}' for product, _row in updates])
+        self.created += len(new_products)
+        self.updated += len(updates)
+
+    def _names(self, pk, names):
+        return [self._product_translation(master_id=pk, language_code=code, name=name) for code, name in names.items()]
+
+    @staticmethod
+    def _missing_for_create(row):
+        if not row['names']:
+            return 'a new product needs a name'
+        if 'price' not in row:
+            return 'a new product needs a price'
+        if not row['category']:
+            return 'a new product needs a category'
+        return None
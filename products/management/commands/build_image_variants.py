@@ -0,0 +1,44 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from caching.tiered import catalog_cache
+from designs.models import AssetImage, DesignAsset
+from products.models import Product
+from products.thumbnails import generate_variants
+
+
+def _build(name, force):
+    # runs in a worker process: storage only, no database access
+    try:
+        generate_variants(name, force=force)
+    except Exception as exc:
+        return name, str(exc)
+    return name, None
+
+
+class Command(BaseCommand):
+    help = 'Build the responsive WebP/JPEG renditions of product and design images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Rebuild renditions that already exist')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in ((Product, 'image'), (DesignAsset, 'cover_image'), (AssetImage, 'image')):
+            names.update(model.objects.exclude(**{field: ''}).values_list(field, flat=True))
+        names.discard(None)
+
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_build, name, options['force']) for name in sorted(names)]
+            for future in as_completed(futures):
+                name, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+
+        catalog_cache.invalidate('images')
+        catalog_cache.bump_generation('products', 'designs', 'pages')
+        self.stdout.write(self.style.SUCCESS(f'Built renditions of {len(names) - failed} images ({failed} failed)'))
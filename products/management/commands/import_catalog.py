@@ -0,0 +1,41 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importing import FORMATS, CatalogImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create or update products, categories and their translations from CSV / JSON Lines files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files to import ("-" reads stdin)')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format (default: from the file extension, stdin is read as CSV)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        importer = CatalogImporter(batch_size=max(1, options['batch_size']))
+        started = time.perf_counter()
+        for path in options['paths']:
+            fmt = options['format'] or detect_format(path)
+            try:
+                fh = nullcontext(sys.stdin) if path == '-' else open(path, newline='', encoding='utf-8-sig')
+            except OSError as exc:
+                raise CommandError(f'Cannot read {path}: {exc}')
+            with fh as stream:
+                importer.import_rows(read_rows(stream, fmt, importer.error))
+        elapsed = time.perf_counter() - started
+
+        for line, message in importer.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if importer.skipped > len(importer.errors):
+            self.stderr.write(f'... and {importer.skipped - len(importer.errors)} more skipped rows')
+        rate = importer.processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.processed} rows ({importer.created} created, {importer.updated} updated, '
+            f'{importer.skipped} skipped, {importer.categories_created} new categories) '
+            f'in {elapsed:.1f}s ({rate:.0f} rows/s)'
+        ))
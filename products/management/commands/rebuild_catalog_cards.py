@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from caching.snapshot import bump_catalog_version
+from caching.tiered import catalog_cache
+from designs.cards import refresh_design_cards
+from designs.models import DesignAsset
+from products.cards import refresh_product_cards
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized product and design card tables used by listings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Objects refreshed per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, refresh, label in (
+            (Product, refresh_product_cards, 'product'),
+            (DesignAsset, refresh_design_cards, 'design'),
+        ):
+            total = 0
+            batch = []
+            for pk in model.objects.values_list('pk', flat=True).iterator(chunk_size=batch_size):
+                batch.append(pk)
+                if len(batch) >= batch_size:
+                    total += refresh(batch)
+                    batch = []
+            total += refresh(batch)
+            catalog_cache.bump_generation(f'{label}s', 'pages')
+            bump_catalog_version()
+            self.stdout.write(self.style.SUCCESS(f'Built {total} {label} cards'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from caching.snapshot import bump_catalog_version
+
+from designs.models import DesignAsset, DesignReview
+from products.models import Product, Review
+from products.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized review stats of products and design assets'
+
+    def handle(self, *args, **options):
+        for model, review_model, fk_name, label in (
+            (Product, Review, 'product', 'products'),
+            (DesignAsset, DesignReview, 'asset', 'design assets'),
+        ):
+            updated = recompute_ratings(model, review_model, fk_name)
+            self.stdout.write(self.style.SUCCESS(f'Recomputed ratings of {updated} reviewed {label}'))
+        # snapshots hold the objects with their rating stats
+        bump_catalog_version()
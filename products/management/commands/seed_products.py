@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 from decimal import Decimal
 import random
 import uuid
-from products.models import Category, Product
+from products.importing import CatalogImporter
+from products.models import Product
 
 CATEGORIES = [
     'Laptops', 'Phones', 'Accessories', 'Gaming', 'Audio'
@@ -21,26 +23,28 @@ class Command(BaseCommand):
         force = options['force']
         created_total = 0
         for name in CATEGORIES:
-            cat, _ = Category.objects.get_or_create(name=name)
-            existing = cat.products.count()
+            # the importer creates missing categories, matched by their default-language name
+            existing = Product.objects.filter(
+                category__translations__language_code=settings.LANGUAGE_CODE, category__translations__name=name,
+            ).count()
             if existing >= per and not force:
                 self.stdout.write(self.style.WARNING(f'Skipping {name}: already has {existing} products'))
                 continue
             to_create = per if force else (per - existing)
-            products = []
+            rows = []
             for i in range(to_create):
                 base_name = f"{name} Item {existing + i + 1}"
                 price = Decimal(random.randint(50, 1500)) + Decimal(random.randint(0, 99))/100
-                discount = random.choice([0, 5, 10, 15, 20])
-                slug = slugify(f"{base_name}-{uuid.uuid4().hex[:6]}")
-                products.append(Product(
-                    name=base_name,
-                    slug=slug,
-                    price=price,
-                    discount=discount,
-                    category=cat,
-                ))
-            Product.objects.bulk_create(products)
-            created_total += len(products)
-            self.stdout.write(self.style.SUCCESS(f'Created {len(products)} products for {name}'))
+                rows.append((i + 1, {
+                    'name': base_name,
+                    'slug': slugify(f"{base_name}-{uuid.uuid4().hex[:6]}"),
+                    'price': price,
+                    'discount': random.choice([0, 5, 10, 15, 20]),
+                    'category': name,
+                }))
+            # the importer also writes the translations, cards and search documents
+            importer = CatalogImporter()
+            importer.import_rows(rows)
+            created_total += importer.created
+            self.stdout.write(self.style.SUCCESS(f'Created {importer.created} products for {name}'))
         self.stdout.write(self.style.SUCCESS(f'Done. Total created: {created_total}'))
@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from parler.cache import MISSING
+from parler.managers import TranslatableManager, TranslatableQuerySet
+from parler.utils import get_active_language_choices
+
+
+def prefetch_translations(objects, language_code=None):
+    """
+    Load the active language (plus parler fallbacks, i.e. ``ru``) for a batch
+    of translatable objects with a single query and store the rows in
+    parler's per-instance cache, so ``obj.name`` never hits the database.
+    """
+    objects = [obj for obj in objects if obj is not None and obj.pk is not None]
+    if not objects:
+        return objects
+    meta = objects[0]._parler_meta.root
+    languages = get_active_language_choices(language_code)
+
+    found = defaultdict(dict)
+    translations = meta.model.objects.filter(
+        master_id__in={obj.pk for obj in objects},
+        language_code__in=languages,
+    )
+    for translation in translations:
+        found[translation.master_id][translation.language_code] = translation
+
+    for obj in objects:
+        local_cache = obj._translations_cache[meta.model]
+        rows = found.get(obj.pk, {})
+        for code in languages:
+            translation = rows.get(code)
+            if translation is None:
+                # parler's marker for "use the fallback", avoids a lookup per object
+                local_cache.setdefault(code, MISSING)
+            else:
+                translation.master = obj
+                local_cache[code] = translation
+    return objects
+
+
+class CatalogQuerySet(TranslatableQuerySet):
+    """
+    Queryset for catalog listings.
+
+    ``with_translations()`` behaves like ``prefetch_related``: once the
+    (possibly sliced / paginated) queryset is evaluated, the translations of
+    all fetched rows and of their ``select_related`` relations listed in
+    ``related`` are loaded in one query per model.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._translation_lookups = None
+        self._translations_done = False
+
+    def _clone(self):
+        c = super()._clone()
+        c._translation_lookups = self._translation_lookups
+        return c
+
+    def with_translations(self, *related):
+        clone = self._chain()
+        clone._translation_lookups = tuple(related)
+        return clone
+
+    def _fetch_all(self):
+        super()._fetch_all()
+        if self._translation_lookups is None or self._translations_done:
+            return
+        self._translations_done = True
+        if not self._result_cache or not hasattr(self._result_cache[0], '_parler_meta'):
+            return
+        prefetch_translations(self._result_cache, self._language)
+        for name in self._translation_lookups:
+            # select_related hands out one instance per row, so fill them all
+            related = [getattr(obj, name, None) for obj in self._result_cache]
+            prefetch_translations(related, self._language)
+
+
+class CatalogManager(TranslatableManager.from_queryset(CatalogQuerySet)):
+    pass
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_remove_category_description_remove_category_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'id'], name='products_created_id_idx'),
+        ),
+    ]
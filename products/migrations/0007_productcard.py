@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_created_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language_code', models.CharField(max_length=15)),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('discount', models.PositiveIntegerField(default=0)),
+                ('slug', models.SlugField(max_length=280)),
+                ('image', models.CharField(blank=True, max_length=255)),
+                ('category_id', models.BigIntegerField()),
+                ('category_name', models.CharField(blank=True, max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cards', to='products.product')),
+            ],
+            options={
+                'db_table': 'product_cards',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['language_code', 'is_active', 'created_at', 'id'], name='product_cards_listing_idx'), models.Index(fields=['language_code', 'category_id', 'created_at'], name='product_cards_category_idx')],
+                'unique_together': {('product', 'language_code')},
+            },
+        ),
+    ]
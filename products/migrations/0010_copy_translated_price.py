@@ -0,0 +1,46 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import migrations
+
+
+def _discounted(price, discount):
+    price = Decimal(price or 0)
+    if discount:
+        price = price * (100 - discount) / 100
+    return price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def copy_prices(apps, schema_editor):
+    """Keep the default language's price (or any translation's) as the product price."""
+    Product = apps.get_model('products', 'Product')
+    ProductTranslation = apps.get_model('products', 'ProductTranslation')
+    ProductCard = apps.get_model('products', 'ProductCard')
+    prices = {}
+    rows = ProductTranslation.objects.order_by('pk').values_list('master_id', 'language_code', 'price')
+    for master_id, language_code, price in rows:
+        if master_id not in prices or language_code == settings.LANGUAGE_CODE:
+            prices[master_id] = price
+    for pk, discount in Product.objects.filter(pk__in=list(prices)).values_list('pk', 'discount'):
+        price = prices[pk] or Decimal('0')
+        final_price = _discounted(price, discount)
+        Product.objects.filter(pk=pk).update(price=price, final_price=final_price)
+        ProductCard.objects.filter(product_id=pk).update(price=price, final_price=final_price)
+
+
+def restore_prices(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductTranslation = apps.get_model('products', 'ProductTranslation')
+    for pk, price in Product.objects.values_list('pk', 'price'):
+        ProductTranslation.objects.filter(master_id=pk).update(price=price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_price_column'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_prices, restore_prices),
+    ]
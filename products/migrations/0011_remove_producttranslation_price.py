@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_copy_translated_price'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='producttranslation',
+            name='price',
+        ),
+    ]
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+
+def _translations(model, field, master_ids):
+    """``{master_id: {language_code: value}}`` in pk order."""
+    values = defaultdict(dict)
+    rows = model.objects.filter(master_id__in=master_ids).order_by('pk')
+    for master_id, language_code, value in rows.values_list('master_id', 'language_code', field):
+        values[master_id][language_code] = value
+    return values
+
+
+def _translated(values, code):
+    # parler's fallbacks: the language, then the default one, then any
+    for candidate in (code, settings.LANGUAGE_CODE):
+        if values.get(candidate):
+            return values[candidate]
+    return next((value for value in values.values() if value), '')
+
+
+def backfill_cards(apps, schema_editor):
+    """Build the listing cards of products that have none yet (``rebuild_catalog_cards``)."""
+    Product = apps.get_model('products', 'Product')
+    ProductTranslation = apps.get_model('products', 'ProductTranslation')
+    CategoryTranslation = apps.get_model('products', 'CategoryTranslation')
+    ProductCard = apps.get_model('products', 'ProductCard')
+    languages = [code for code, _name in settings.LANGUAGES]
+    pks = list(Product.objects.exclude(cards__isnull=False).values_list('pk', flat=True))
+    for start in range(0, len(pks), 500):
+        products = list(Product.objects.filter(pk__in=pks[start:start + 500]))
+        names = _translations(ProductTranslation, 'name', [product.pk for product in products])
+        categories = _translations(CategoryTranslation, 'name', {product.category_id for product in products})
+        cards = [
+            ProductCard(
+                product_id=product.pk,
+                language_code=code,
+                name=_translated(names[product.pk], code),
+                price=product.price,
+                final_price=product.final_price,
+                discount=product.discount,
+                slug=product.slug,
+                image=product.image.name or '',
+                category_id=product.category_id,
+                category_name=_translated(categories.get(product.category_id, {}), code),
+                is_active=product.is_active,
+                created_at=product.created_at,
+            )
+            # products without any translation are not listable
+            for product in products if product.pk in names
+            for code in languages
+        ]
+        ProductCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_remove_producttranslation_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cards, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,10 @@ from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
 import uuid
 from users.models import CustomUser as User
+from .managers import CatalogManager
+from .prices import Priced
+from .ratings import RatingStats, TracksRating
+from .thumbnails import TracksImages
 
 
 class BaseModel(models.Model):
@@ -24,6 +28,8 @@ class Category(TranslatableModel, BaseModel):
         description = models.TextField(_("Description"), blank=True),
     )
 
+    objects = CatalogManager()
+
     def __str__(self):
         return self.name
 
@@ -33,11 +39,10 @@ class Category(TranslatableModel, BaseModel):
         db_table = "categories"
 
 
-class Product(TranslatableModel, BaseModel):
+class Product(TranslatableModel, BaseModel, RatingStats, Priced, TracksImages):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     translations = TranslatedFields(
         name = models.CharField(_("Name"), max_length=255),
-        price = models.DecimalField(_("Price"), max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
     )
     slug = models.SlugField(_("Slug"), max_length=280, unique=True, blank=True)
     discount = models.PositiveIntegerField(_("Discount (%)"), default=0,
@@ -53,6 +58,9 @@ class Product(TranslatableModel, BaseModel):
     )
     image = models.ImageField(upload_to="products/images/", blank=True, null=True)
 
+    objects = CatalogManager()
+    image_fields = ('image',)
+
     def __str__(self):
         try:
             return f"{self.safe_translation_getter('name', any_language=True)[:20]}..."
@@ -75,10 +83,49 @@ class Product(TranslatableModel, BaseModel):
         verbose_name_plural = _("Products")
         db_table = "products"
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination on (-created_at, id)
+            models.Index(fields=["created_at", "id"], name="products_created_id_idx"),
+            models.Index(fields=["is_active", "category", "final_price"], name="products_active_price_idx"),
+        ]
         
 
 
-class Review(BaseModel):
+class ProductCard(models.Model):
+    """Denormalized listing row: one per product and language.
+
+    Maintained from signals (see ``products.cards``) so listing pages read a
+    single indexed table instead of joining products, translations and categories.
+    """
+    product = models.ForeignKey(Product, related_name='cards', on_delete=models.CASCADE)
+    language_code = models.CharField(max_length=15)
+    name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    final_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    discount = models.PositiveIntegerField(default=0)
+    slug = models.SlugField(max_length=280)
+    image = models.CharField(max_length=255, blank=True)
+    category_id = models.BigIntegerField()
+    category_name = models.CharField(max_length=255, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "product_cards"
+        ordering = ["-created_at", "-id"]
+        unique_together = (("product", "language_code"),)
+        indexes = [
+            models.Index(fields=["language_code", "is_active", "created_at", "id"], name="product_cards_listing_idx"),
+            models.Index(fields=["language_code", "category_id", "created_at"], name="product_cards_category_idx"),
+            models.Index(fields=["language_code", "is_active", "final_price"], name="product_cards_price_idx"),
+            models.Index(fields=["language_code", "category_id", "final_price"], name="product_cards_cat_price_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.language_code}]"
+
+
+class Review(TracksRating, BaseModel):
     product = models.ForeignKey(
         Product,
         verbose_name=_("Product"),
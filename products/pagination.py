@@ -0,0 +1,113 @@
+import base64
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def cursor_mode_requested(request):
+    """Cursor paging is opt-in: per request (``?cursor=``) or site-wide via settings."""
+    return 'cursor' in request.GET or getattr(settings, 'CATALOG_CURSOR_PAGINATION', False)
+
+
+def encode_cursor(obj, direction):
+    # rows may be model instances or ``.values()`` dicts (card listings)
+    if isinstance(obj, dict):
+        created_at, pk = obj['created_at'], obj['id']
+    else:
+        created_at, pk = obj.created_at, obj.pk
+    raw = f"{direction}|{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, pk_field=None):
+    """
+    Return ``(direction, created_at, pk)`` or ``None`` for a missing/broken
+    token. ``pk`` is converted with ``pk_field`` (integer when not given);
+    naive timestamps are rejected.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        direction, created_at, pk = raw.split('|', 2)
+        if direction not in ('n', 'p'):
+            return None
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            return None
+        pk = int(pk) if pk_field is None else pk_field.to_python(pk)
+        if pk is None:
+            return None
+        return direction, created_at, pk
+    except (ValueError, UnicodeDecodeError, ValidationError):
+        return None
+
+
+def cached_count(queryset, timeout=None):
+    """COUNT(*) of ``queryset`` cached by its SQL, used as an approximate total."""
+    if timeout is None:
+        timeout = getattr(settings, 'CATALOG_COUNT_CACHE_SECONDS', 60)
+    sql, params = queryset.query.sql_with_params()
+    key = 'catalog-count:' + hashlib.md5(f"{sql}|{params}".encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class CursorPage:
+    """Page of a keyset-paginated queryset ordered by ``(-created_at, -pk)``."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, total, per_page):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+        self.per_page = per_page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def cursor_paginate(queryset, token, per_page):
+    """Fetch one page after/before ``token`` without COUNT-per-request or OFFSET."""
+    total = cached_count(queryset)
+    cursor = decode_cursor(token, queryset.model._meta.pk)
+    direction = cursor[0] if cursor else 'n'
+    if cursor:
+        _, created_at, pk = cursor
+        if direction == 'n':
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+    ordering = ('-created_at', '-pk') if direction == 'n' else ('created_at', 'pk')
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'p':
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if direction == 'n':
+            has_next, has_previous = has_more, cursor is not None
+        else:
+            has_next, has_previous = True, has_more
+        if has_next:
+            next_cursor = encode_cursor(rows[-1], 'n')
+        if has_previous:
+            previous_cursor = encode_cursor(rows[0], 'p')
+    return CursorPage(rows, next_cursor, previous_cursor, total, per_page)
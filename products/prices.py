@@ -0,0 +1,39 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.validators import MinValueValidator
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def discounted_price(price, discount):
+    """``price`` less ``discount`` percent, rounded half-up to cents."""
+    price = Decimal(price or 0)
+    if discount:
+        price = price * (100 - discount) / 100
+    return price.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class Priced(models.Model):
+    """
+    Price shared by all languages plus the stored discounted price that
+    listings sort and filter on. ``final_price`` follows ``price`` and
+    ``discount`` on every ``save()``; bulk writes must set it themselves.
+    """
+
+    price = models.DecimalField(_("Price"), max_digits=12, decimal_places=2, default=0,
+                                validators=[MinValueValidator(0)])
+    final_price = models.DecimalField(_("Final price"), max_digits=12, decimal_places=2, default=0,
+                                      editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.final_price = discounted_price(self.price, self.discount)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'price', 'discount'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'final_price'}
+        super().save(*args, **kwargs)
@@ -0,0 +1,139 @@
+from decimal import Decimal, InvalidOperation
+
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from designs.models import DesignAsset
+
+from .models import Product
+from .prices import CENT, ZERO
+
+PRODUCT_PREFIX = 'P:'
+DESIGN_PREFIX = 'D:'
+DONATION_PREFIX = 'C:'
+
+
+def to_money(value):
+    """Exact two-place Decimal for a price from the DB or the session; never a float."""
+    if value is None:
+        return ZERO
+    try:
+        return Decimal(str(value)).quantize(CENT)
+    except (InvalidOperation, TypeError, ValueError):
+        return ZERO
+
+
+def to_qty(value):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+class DonationItem:
+    """Stand-in "product" of the advance payment line."""
+
+    name = _('Advance Payment')
+    image = None
+
+    def __init__(self, price):
+        self.price = price
+
+
+class CartLine:
+    def __init__(self, key, kind, obj, name, unit_price, qty):
+        self.key = key
+        self.kind = kind
+        self.obj = obj
+        self.name = name
+        self.unit_price = unit_price
+        self.qty = qty
+        self.line_total = unit_price * qty
+
+    @property
+    def product(self):
+        # templates render ``item.product.name`` / ``.price`` / ``.image``
+        return self.obj
+
+    @property
+    def is_design(self):
+        return self.kind == 'design'
+
+    @property
+    def is_donation(self):
+        return self.kind == 'donation'
+
+
+class CartPricer:
+    """
+    Prices a whole session cart: one query per item kind, translations
+    prefetched in the active language, Decimal arithmetic throughout.
+
+    Use ``CartPricer.for_request(request)`` in views; the result is memoized
+    on the request for as long as the cart contents do not change.
+    """
+
+    def __init__(self, cart, donation_price=None):
+        self.cart = dict(cart or {})
+        self.donation_price = donation_price
+
+    @classmethod
+    def for_request(cls, request):
+        cart = request.cart.items()
+        donation_price = request.cart.donation_price
+        state = (tuple(sorted(cart.items())), donation_price)
+        cached = getattr(request, '_cart_pricer', None)
+        if cached is None or cached[0] != state:
+            cached = (state, cls(cart, donation_price))
+            request._cart_pricer = cached
+        return cached[1]
+
+    def _ids(self, prefix):
+        return [key[len(prefix):] for key in self.cart if key.startswith(prefix)]
+
+    def _objects(self, model, prefix):
+        ids = self._ids(prefix)
+        if not ids:
+            return {}
+        return {
+            f'{prefix}{obj.pk}': obj
+            for obj in model.objects.filter(pk__in=ids).with_translations()
+        }
+
+    @cached_property
+    def lines(self):
+        products = self._objects(Product, PRODUCT_PREFIX)
+        designs = self._objects(DesignAsset, DESIGN_PREFIX)
+        lines = []
+        for key, qty in self.cart.items():
+            qty = to_qty(qty)
+            if key.startswith(DONATION_PREFIX):
+                if self.donation_price is None:
+                    continue
+                price = to_money(self.donation_price)
+                lines.append(CartLine(key, 'donation', DonationItem(price), DonationItem.name, price, qty))
+                continue
+            obj = products.get(key) or designs.get(key)
+            if obj is None:
+                continue
+            kind = 'design' if key.startswith(DESIGN_PREFIX) else 'product'
+            name = obj.safe_translation_getter('name', any_language=True) or str(obj.pk)
+            price = to_money(obj.price)
+            lines.append(CartLine(key, kind, obj, name, price, qty))
+        return lines
+
+    def line(self, key):
+        for line in self.lines:
+            if line.key == key:
+                return line
+        return None
+
+    @property
+    def subtotal(self):
+        return sum((line.line_total for line in self.lines), ZERO)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
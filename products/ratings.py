@@ -0,0 +1,135 @@
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils.translation import gettext_lazy as _
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def star_field(star):
+    return f'rating_{star}'
+
+
+class RatingStats(models.Model):
+    """
+    Denormalized review statistics of a reviewed object.
+
+    Kept up to date by the review signals through :func:`apply_rating_change`
+    and rebuilt by ``manage.py recompute_ratings``.
+    """
+
+    rating_count = models.PositiveIntegerField(_("Rating count"), default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.DecimalField(_("Average rating"), max_digits=3, decimal_places=2,
+                                         default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_histogram(self):
+        """``[(star, count, percent), ...]`` from 5 stars down to 1."""
+        total = self.rating_count or 1
+        return [
+            (star, getattr(self, star_field(star)), round(getattr(self, star_field(star)) * 100 / total))
+            for star in reversed(STARS)
+        ]
+
+
+class TracksRating(models.Model):
+    """
+    Remembers the rating a review was loaded with, so edits can be applied as
+    a delta. Saves and deletes run in one transaction with the stats update
+    their signals make: a review is never stored without being counted.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+def _average():
+    return Case(
+        When(rating_count=0, then=Value(0.0)),
+        default=Cast(F('rating_sum'), FloatField()) / F('rating_count'),
+        output_field=FloatField(),
+    )
+
+
+def apply_rating_change(model, pk, added=None, removed=None):
+    """
+    Add and/or remove one rating on ``model`` row ``pk`` with relative
+    UPDATEs, so concurrent reviews never overwrite each other's counts.
+    """
+    if added == removed:
+        return
+    deltas = {'rating_count': 0, 'rating_sum': 0}
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating in STARS:
+            deltas['rating_count'] += sign
+            deltas['rating_sum'] += sign * rating
+            deltas[star_field(rating)] = deltas.get(star_field(rating), 0) + sign
+    rows = model.objects.filter(pk=pk)
+    with transaction.atomic():
+        rows.update(**{name: F(name) + delta for name, delta in deltas.items() if delta})
+        # separate statement: MySQL evaluates SET clauses left to right
+        rows.update(rating_average=_average())
+
+
+def review_saved(model, fk_name, review, created):
+    """Apply a saved review to its object's stats (post_save helper)."""
+    pk = getattr(review, f'{fk_name}_id')
+    if created:
+        apply_rating_change(model, pk, added=review.rating)
+    elif hasattr(review, '_loaded_rating'):
+        apply_rating_change(model, pk, added=review.rating, removed=review._loaded_rating)
+    else:
+        # previous rating unknown (instance not loaded from the DB)
+        recompute_ratings(model, type(review), fk_name, pks=[pk])
+    review._loaded_rating = review.rating
+
+
+def review_deleted(model, fk_name, review):
+    rating = getattr(review, '_loaded_rating', review.rating)
+    apply_rating_change(model, getattr(review, f'{fk_name}_id'), removed=rating)
+
+
+def recompute_ratings(model, review_model, fk_name, pks=None):
+    """Rebuild the stats of ``model`` rows (all, or ``pks``) from ``review_model``."""
+    targets = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+    reviews = review_model.objects.all() if pks is None else review_model.objects.filter(**{f'{fk_name}__in': pks})
+    stats = reviews.values(fk_name).annotate(
+        count=Count('pk'),
+        total=Coalesce(Sum('rating'), 0),
+        **{star_field(star): Count('pk', filter=Q(rating=star)) for star in STARS},
+    )
+    updated = 0
+    with transaction.atomic():
+        targets.update(rating_count=0, rating_sum=0, rating_average=0,
+                       **{star_field(star): 0 for star in STARS})
+        for row in stats.order_by():
+            updated += model.objects.filter(pk=row[fk_name]).update(
+                rating_count=row['count'],
+                rating_sum=row['total'],
+                **{star_field(star): row[star_field(star)] for star in STARS},
+            )
+        targets.filter(rating_count__gt=0).update(rating_average=_average())
+    return updated
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save
+
+from .cards import refresh_product_cards
+from .models import Category, Product, Review
+from .ratings import review_deleted, review_saved
+from .thumbnails import schedule_variants
+
+
+def _product_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_product_cards([instance.pk])
+        schedule_variants(instance, 'image')
+
+
+def _product_translation_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.master_id:
+        refresh_product_cards([instance.master_id])
+
+
+def _category_translation_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.master_id:
+        pks = Product.objects.filter(category_id=instance.master_id).values_list('pk', flat=True)
+        refresh_product_cards(list(pks))
+
+
+def _review_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        review_saved(Product, 'product', instance, created)
+
+
+def _review_deleted(sender, instance, **kwargs):
+    review_deleted(Product, 'product', instance)
+
+
+# Card rows of deleted products go away through the FK cascade.
+post_save.connect(_product_saved, sender=Product, dispatch_uid='product-cards-save')
+post_save.connect(_product_translation_changed, sender=Product._parler_meta.root_model,
+                  dispatch_uid='product-cards-tr-save')
+post_delete.connect(_product_translation_changed, sender=Product._parler_meta.root_model,
+                    dispatch_uid='product-cards-tr-delete')
+post_save.connect(_category_translation_changed, sender=Category._parler_meta.root_model,
+                  dispatch_uid='product-cards-category-tr-save')
+post_save.connect(_review_saved, sender=Review, dispatch_uid='product-ratings-review-save')
+post_delete.connect(_review_deleted, sender=Review, dispatch_uid='product-ratings-review-delete')
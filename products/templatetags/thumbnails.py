@@ -0,0 +1,58 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from ..thumbnails import srcset, variant_name, variants, variants_many
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_manifests(rows, field):
+    """
+    Manifests of the ``field`` images of ``rows`` (card dicts or objects),
+    fetched in one batch: ``{% image_manifests products 'image' as manifests %}``
+    and then ``{% responsive_image p.image manifests=manifests %}`` per row.
+    """
+    images = (row.get(field) if isinstance(row, dict) else getattr(row, field, None) for row in rows)
+    return variants_many(getattr(image, 'name', image) for image in images)
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', picture=True, manifests=None, **attrs):
+    """
+    ``<img>`` for an uploaded image (a FieldFile or a storage name, e.g. from
+    card rows) with ``srcset`` over its renditions plus intrinsic
+    ``width``/``height``. With ``picture`` the WebP renditions are offered in
+    a ``<picture>`` with the JPEG ones as fallback; without it (images whose
+    ``src`` is swapped by scripts) only JPEG renditions are listed.
+
+    ``manifests`` (from ``{% image_manifests %}``) saves a cache lookup per
+    image. Extra keyword arguments become attributes (``data_full`` -> ``data-full``).
+    Falls back to the original file until its renditions exist.
+    """
+    name = getattr(image, 'name', image)
+    if not name:
+        return ''
+    attrs = {key.replace('_', '-'): value for key, value in attrs.items() if value is not None}
+    attrs.setdefault('loading', 'lazy')
+    manifest = manifests[name] if manifests is not None and name in manifests else variants(name)
+    if manifest is None:
+        return format_html('<img src="{}"{}>', default_storage.url(name), flatatt(attrs))
+
+    attrs.update(width=manifest['width'], height=manifest['height'], sizes=sizes)
+    # the smallest rendition wider than a grid card is a sane default src
+    fallback = next((w for w in manifest['widths'] if w >= 320), manifest['widths'][-1])
+    img = format_html(
+        '<img src="{}" srcset="{}"{}>',
+        default_storage.url(variant_name(name, fallback, 'jpg')),
+        srcset(name, manifest, 'jpg'),
+        flatatt(attrs),
+    )
+    if not picture:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        srcset(name, manifest, 'webp'), sizes, img,
+    )
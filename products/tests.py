@@ -1,3 +1,8 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.urls import reverse
 from .models import Product, Category
@@ -29,3 +34,441 @@ class ProductCartTests(TestCase):
 		resp = self.client.post(reverse('update_cart_item'), {'product_id': key, 'action': 'remove'})
 		self.assertEqual(resp.status_code, 200)
 		self.assertTrue(resp.json()['removed'])
+
+
+class CatalogTranslationPrefetchTests(TestCase):
+	def setUp(self):
+		self.cat = Category.objects.create(name="Cat")
+		for i in range(12):
+			Product.objects.create(category=self.cat, name=f"Item {i}", price=Decimal('5.00'), slug=f"item-{i}")
+
+	def _store_queries(self, page_size):
+		from django.core.cache import cache
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+		from caching.tiered import catalog_cache
+		cache.clear()  # parler also keeps translations in the default cache
+		catalog_cache.clear()
+		with CaptureQueriesContext(connection) as ctx:
+			resp = self.client.get(reverse('store'), {'page_size': page_size})
+		self.assertEqual(resp.status_code, 200)
+		return len(ctx.captured_queries)
+
+	def test_store_query_count_independent_of_page_size(self):
+		self.assertEqual(self._store_queries(3), self._store_queries(12))
+
+	def test_with_translations_fills_cache(self):
+		products = list(Product.objects.with_translations())
+		with self.assertNumQueries(0):
+			names = [p.name for p in products]
+		self.assertEqual(len(names), 12)
+
+
+class CursorPaginationTests(TestCase):
+	def setUp(self):
+		cat = Category.objects.create(name="Cat")
+		self.products = [
+			Product.objects.create(category=cat, name=f"Item {i}", price=Decimal('1.00'), slug=f"item-{i}")
+			for i in range(7)
+		]
+
+	def _page(self, **params):
+		params.setdefault('page_size', 3)
+		resp = self.client.get(reverse('store'), params)
+		self.assertEqual(resp.status_code, 200)
+		return resp.context['page_obj']
+
+	def test_walks_forward_and_back(self):
+		from .pagination import cursor_paginate
+		qs = Product.objects.all()
+		first = cursor_paginate(qs, None, 3)
+		second = cursor_paginate(qs, first.next_cursor, 3)
+		third = cursor_paginate(qs, second.next_cursor, 3)
+		seen = [p.pk for page in (first, second, third) for p in page]
+		self.assertEqual(seen, list(qs.values_list('pk', flat=True)))
+		self.assertFalse(third.has_next())
+		back = cursor_paginate(qs, second.previous_cursor, 3)
+		self.assertEqual([p.pk for p in back], [p.pk for p in first])
+		self.assertFalse(back.has_previous())
+		self.assertEqual(first.total, 7)
+
+	def test_forged_cursor_falls_back_to_first_page(self):
+		import base64
+		first = [row['id'] for row in self._page(cursor='')]
+		for raw in ('n|2020-01-01T00:00:00+00:00|abc', 'n|2020-01-01T00:00:00|1'):
+			token = base64.urlsafe_b64encode(raw.encode()).decode()
+			self.assertEqual([row['id'] for row in self._page(cursor=token)], first)
+
+	def test_store_opt_in(self):
+		page = self._page(cursor='')
+		self.assertEqual(len(page.object_list), 3)
+		self.assertTrue(page.has_next())
+		self.assertEqual(len(self._page(cursor=page.next_cursor).object_list), 3)
+		resp = self.client.get(reverse('store'), {'cursor': page.next_cursor, 'page_size': 3}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+		self.assertIn('data-cursor', resp.json()['pagination'])
+
+	def test_cursor_links_keep_the_filters(self):
+		params = {'cursor': '', 'page_size': 3, 'category': self.products[0].category_id, 'max_price': '5'}
+		resp = self.client.get(reverse('store'), params)
+		next_cursor = resp.context['page_obj'].next_cursor
+		self.assertContains(resp, f'href="?cursor={next_cursor}&amp;category={params["category"]}&amp;max_price=5')
+		self.assertContains(resp, 'page_size=3"')
+
+	def test_bad_cursor_falls_back_to_first_page(self):
+		self.assertFalse(self._page(cursor='not-a-token').has_previous())
+
+
+class ProductCardTests(TestCase):
+	def setUp(self):
+		self.cat = Category.objects.create(name="Phones")
+		self.product = Product.objects.create(category=self.cat, name="Phone X", price=Decimal('99.00'), slug="phone-x")
+
+	def test_cards_follow_translations(self):
+		from .models import ProductCard
+		self.assertEqual(ProductCard.objects.filter(product=self.product).count(), 3)
+		uz = ProductCard.objects.get(product=self.product, language_code='uz')
+		self.assertEqual(uz.name, "Phone X")  # falls back to ru
+		self.product.set_current_language('uz')
+		self.product.name = "Telefon X"
+		self.product.price = Decimal('90.00')
+		self.product.save()
+		uz = ProductCard.objects.get(product=self.product, language_code='uz')
+		self.assertEqual((uz.name, uz.price), ("Telefon X", Decimal('90.00')))
+
+	def test_category_rename_updates_cards(self):
+		from .models import ProductCard
+		self.cat.name = "Smartphones"
+		self.cat.save()
+		self.assertEqual(ProductCard.objects.get(product=self.product, language_code='ru').category_name, "Smartphones")
+
+	def test_delete_removes_cards(self):
+		from .models import ProductCard
+		self.product.delete()
+		self.assertFalse(ProductCard.objects.exists())
+
+	def test_store_reads_cards(self):
+		resp = self.client.get(reverse('store'))
+		self.assertContains(resp, "Phone X")
+		self.assertContains(resp, f'data-add="{self.product.pk}"')
+
+	def test_home_hot_deals_skip_inactive_products(self):
+		Product.objects.create(category=self.cat, name="Hidden", price=Decimal('9.00'), discount=50, is_active=False, slug="hidden")
+		Product.objects.create(category=self.cat, name="Deal", price=Decimal('9.00'), discount=50, slug="deal")
+		resp = self.client.get(reverse('home'))
+		self.assertEqual([row['name'] for row in resp.context['products']], ["Deal"])
+
+
+class CartPricerTests(TestCase):
+	def setUp(self):
+		self.cat = Category.objects.create(name="Cat")
+		self.products = [
+			Product.objects.create(category=self.cat, name=f"Item {i}", price=Decimal('0.10'), slug=f"item-{i}")
+			for i in range(3)
+		]
+
+	def test_exact_decimal_totals(self):
+		from .pricing import CartPricer
+		cart = {f"P:{p.pk}": 1 for p in self.products}
+		cart['C:DONATION'] = 2
+		pricer = CartPricer(cart, donation_price='0.20')
+		self.assertEqual(pricer.subtotal, Decimal('0.70'))
+		self.assertEqual(pricer.line('C:DONATION').line_total, Decimal('0.40'))
+
+	def test_pricing_queries_do_not_grow_with_cart(self):
+		from .pricing import CartPricer
+		cart = {f"P:{p.pk}": 2 for p in self.products}
+		with self.assertNumQueries(2):
+			lines = CartPricer(cart).lines
+		self.assertEqual([line.name for line in lines], ["Item 0", "Item 1", "Item 2"])
+
+	def test_update_returns_exact_amounts(self):
+		self.client.post(reverse('add_to_cart'), {'product_id': self.products[0].pk, 'qty': 3})
+		key = f"P:{self.products[0].pk}"
+		data = self.client.post(reverse('update_cart_item'), {'product_id': key, 'action': 'inc'}).json()
+		self.assertEqual((data['line_total'], data['subtotal']), ('0.40', '0.40'))
+
+
+class ReviewStatsTests(TestCase):
+	def setUp(self):
+		from django.contrib.auth import get_user_model
+		self.cat = Category.objects.create(name="Cat")
+		self.product = Product.objects.create(category=self.cat, name="Item", price=Decimal('5.00'), slug="item")
+		User = get_user_model()
+		self.users = [User.objects.create_user(email=f"u{i}@example.com", password="pw") for i in range(3)]
+
+	def _stats(self):
+		self.product.refresh_from_db()
+		return self.product.rating_count, self.product.rating_average, [c for _s, c, _p in self.product.rating_histogram]
+
+	def test_create_edit_delete_keep_stats_in_sync(self):
+		from .models import Review
+		reviews = [Review.objects.create(product=self.product, user=u, rating=r) for u, r in zip(self.users, (5, 4, 4))]
+		self.assertEqual(self._stats(), (3, Decimal('4.33'), [1, 2, 0, 0, 0]))
+		review = Review.objects.get(pk=reviews[0].pk)
+		review.rating = 1
+		review.save()
+		self.assertEqual(self._stats(), (3, Decimal('3.00'), [0, 2, 0, 0, 1]))
+		Review.objects.get(pk=reviews[1].pk).delete()
+		self.assertEqual(self._stats(), (2, Decimal('2.50'), [0, 1, 0, 0, 1]))
+
+	def test_review_is_not_stored_when_the_stats_update_fails(self):
+		from unittest import mock
+		from django.db import DatabaseError
+		from .models import Review
+		with mock.patch('products.ratings.apply_rating_change', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+			Review.objects.create(product=self.product, user=self.users[0], rating=5)
+		self.assertFalse(Review.objects.exists())
+
+	def test_recompute_command_rebuilds_stats(self):
+		from io import StringIO
+		from django.core.management import call_command
+		from .models import Review
+		Review.objects.create(product=self.product, user=self.users[0], rating=3)
+		Product.objects.update(rating_count=0, rating_sum=0, rating_3=0, rating_average=0)
+		call_command('recompute_ratings', stdout=StringIO())
+		self.assertEqual(self._stats(), (1, Decimal('3.00'), [0, 0, 1, 0, 0]))
+
+	def test_detail_page_paginates_reviews(self):
+		from unittest import mock
+		from .models import Review
+		for u in self.users:
+			Review.objects.create(product=self.product, user=u, rating=5)
+		with mock.patch('products.views.REVIEWS_PER_PAGE', 2):
+			resp = self.client.get(reverse('product_detail', args=['item']))
+		self.assertEqual(len(resp.context['reviews']), 2)
+		self.assertContains(resp, '?reviews_page=2')
+
+
+class ResponsiveImageTests(TestCase):
+	def setUp(self):
+		import shutil
+		import tempfile
+		from django.test import override_settings
+		media = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+		override = override_settings(MEDIA_ROOT=media, IMAGE_VARIANT_WIDTHS=(160, 320, 640))
+		override.enable()
+		self.addCleanup(override.disable)
+
+	def _upload(self, name, size=(400, 200)):
+		import io
+		from PIL import Image
+		from django.core.files.base import ContentFile
+		from django.core.files.storage import default_storage
+		buffer = io.BytesIO()
+		Image.new('RGBA', size, (200, 10, 10, 128)).save(buffer, 'PNG')
+		return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+	def _render(self, name):
+		from django.template import Context, Template
+		return Template("{% load thumbnails %}{% responsive_image name alt='x' %}").render(Context({'name': name}))
+
+	def test_generate_variants_never_upscales(self):
+		from django.core.files.storage import default_storage
+		from .thumbnails import generate_variants, variant_name
+		name = self._upload('products/images/red.png')
+		manifest = generate_variants(name)
+		self.assertEqual(manifest, {'width': 400, 'height': 200, 'widths': [160, 320]})
+		for ext in ('webp', 'jpg'):
+			self.assertTrue(default_storage.exists(variant_name(name, 320, ext)))
+		self.assertFalse(default_storage.exists(variant_name(name, 640, 'jpg')))
+
+	def test_tag_emits_srcset_and_intrinsic_size(self):
+		from .thumbnails import generate_variants
+		name = self._upload('products/images/red.png')
+		generate_variants(name)
+		html = self._render(name)
+		self.assertIn('<source type="image/webp" srcset="/media/products/images/red.160w.webp 160w', html)
+		self.assertIn('src="/media/products/images/red.320w.jpg"', html)
+		self.assertIn('width="400"', html)
+		self.assertIn('height="200"', html)
+		self.assertIn('loading="lazy"', html)
+
+	def test_tag_falls_back_to_original_without_renditions(self):
+		name = self._upload('products/images/plain.png')
+		html = self._render(name)
+		self.assertIn('src="/media/products/images/plain.png"', html)
+		self.assertNotIn('srcset', html)
+
+	def test_saving_a_product_builds_renditions_after_commit(self):
+		from .thumbnails import read_manifest
+		name = self._upload('products/images/saved.png')
+		with self.captureOnCommitCallbacks(execute=True):
+			Product.objects.create(category=Category.objects.create(name="C"), name="P", price=Decimal('1.00'), slug="p", image=name)
+			self.assertIsNone(read_manifest(name))
+		self.assertEqual(read_manifest(name)['widths'], [160, 320])
+
+	def test_only_a_new_image_rebuilds_renditions(self):
+		name = self._upload('products/images/saved.png')
+		with self.captureOnCommitCallbacks(execute=True):
+			Product.objects.create(category=Category.objects.create(name="C"), name="P", price=Decimal('1.00'), slug="p", image=name)
+		product = Product.objects.get(slug="p")
+		product.price = Decimal('2.00')
+		with self.captureOnCommitCallbacks() as callbacks:
+			product.save()
+		self.assertEqual(callbacks, [])
+		product.image = self._upload('products/images/other.png')
+		with self.captureOnCommitCallbacks() as callbacks:
+			product.save()
+		self.assertEqual(len(callbacks), 1)
+
+	def test_grid_reads_manifests_in_one_batch(self):
+		from unittest import mock
+		from django.template import Context, Template
+		from caching.tiered import catalog_cache
+		from .thumbnails import generate_variants
+		rows = [{'image': self._upload(f'products/images/{n}.png')} for n in ('a', 'b', 'c')]
+		for row in rows:
+			generate_variants(row['image'])
+		template = Template(
+			"{% load thumbnails %}{% image_manifests rows 'image' as manifests %}"
+			"{% for r in rows %}{% responsive_image r.image manifests=manifests %}{% endfor %}"
+		)
+		template.render(Context({'rows': rows}))
+		catalog_cache.local.clear()
+		shared = catalog_cache.shared
+		with mock.patch.object(catalog_cache, 'get', wraps=catalog_cache.get) as get, \
+				mock.patch.object(shared, 'get_many', wraps=shared.get_many) as get_many:
+			html = template.render(Context({'rows': rows}))
+		self.assertEqual(html.count('srcset='), 6)
+		get.assert_not_called()
+		# the entries, then all their tag versions
+		self.assertEqual(get_many.call_count, 2)
+
+
+class PriceColumnTests(TestCase):
+	def setUp(self):
+		self.cat = Category.objects.create(name="Cat")
+		self.other = Category.objects.create(name="Other")
+		self.cheap = Product.objects.create(category=self.cat, name="Cheap", price=Decimal('5.00'), slug="cheap")
+		self.pricey = Product.objects.create(category=self.cat, name="Pricey", price=Decimal('40.00'), discount=50, slug="pricey")
+		self.middle = Product.objects.create(category=self.other, name="Middle", price=Decimal('12.35'), discount=15, slug="middle")
+
+	def _names(self, **params):
+		return [p['name'] for p in self.client.get(reverse('store'), params).context['products']]
+
+	def test_final_price_is_stored(self):
+		self.assertEqual(Product.objects.get(pk=self.middle.pk).final_price, Decimal('10.50'))
+		self.pricey.discount = 0
+		self.pricey.save(update_fields=['discount'])
+		self.assertEqual(Product.objects.get(pk=self.pricey.pk).final_price, Decimal('40.00'))
+
+	def test_price_is_shared_by_languages(self):
+		self.cheap.set_current_language('en')
+		self.cheap.name = "Cheap EN"
+		self.cheap.save()
+		self.assertEqual(Product.objects.language('en').get(pk=self.cheap.pk).price, Decimal('5.00'))
+
+	def test_store_sorts_by_discounted_price(self):
+		self.assertEqual(self._names(sort='price'), ["Cheap", "Middle", "Pricey"])
+		self.assertEqual(self._names(sort='-price'), ["Pricey", "Middle", "Cheap"])
+		self.assertEqual(self._names(sort='discount')[0], "Pricey")
+
+	def test_grid_shows_the_price_it_sorts_on(self):
+		import re
+		content = self.client.get(reverse('store'), {'sort': 'price'}).content.decode()
+		shown = [v.replace(',', '.') for v in re.findall(r'<span data-price-usd="([^"]+)"', content)]
+		struck = [v.replace(',', '.') for v in re.findall(r'<del [^>]*data-price-usd="([^"]+)"', content)]
+		self.assertEqual((shown, struck), (['5.00', '10.50', '20.00'], ['12.35', '40.00']))
+
+	def test_store_filters_price_range(self):
+		self.assertEqual(self._names(sort='price', min_price='6', max_price='20'), ["Middle", "Pricey"])
+		self.assertEqual(self._names(sort='price', min_price='6', category=self.cat.pk), ["Pricey"])
+		# malformed bounds are ignored
+		self.assertEqual(len(self._names(min_price='abc')), 3)
+
+
+class FacetCountTests(TestCase):
+	def setUp(self):
+		self.laptops = Category.objects.create(name="Laptops")
+		self.phones = Category.objects.create(name="Phones")
+		Product.objects.create(category=self.laptops, name="Gaming Laptop", price=Decimal('10.00'), slug="gaming-laptop")
+		Product.objects.create(category=self.laptops, name="Office Laptop", price=Decimal('8.00'), slug="office-laptop")
+		Product.objects.create(category=self.phones, name="Gaming Phone", price=Decimal('5.00'), slug="gaming-phone")
+		Product.objects.create(category=self.phones, name="Old Phone", price=Decimal('1.00'), slug="old-phone", is_active=False)
+
+	def _facets(self, **params):
+		resp = self.client.get(reverse('store'), params)
+		return {cat.name: count for cat, count in resp.context['category_facets']}
+
+	def test_counts_active_products_per_category(self):
+		self.assertEqual(self._facets(), {"Laptops": 2, "Phones": 1})
+		# the selected category does not narrow its own facet
+		self.assertEqual(self._facets(category=self.laptops.pk), {"Laptops": 2, "Phones": 1})
+
+	def test_counts_follow_search_and_price(self):
+		self.assertEqual(self._facets(q="gaming"), {"Laptops": 1, "Phones": 1})
+		self.assertEqual(self._facets(max_price="9"), {"Laptops": 1, "Phones": 1})
+
+	def test_counts_are_cached_and_refreshed_on_change(self):
+		headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+		self.assertEqual(self.client.get(reverse('store'), {'page': 1}, **headers).json()['facets']['category'][str(self.phones.pk)], 1)
+		with self.assertNumQueries(2):
+			# grid page only: COUNT and rows, no facet query
+			self.client.get(reverse('store'), {'page': 2, 'page_size': 3}, **headers)
+		Product.objects.create(category=self.phones, name="New Phone", price=Decimal('3.00'), slug="new-phone")
+		self.assertEqual(self.client.get(reverse('store'), {'page': 1}, **headers).json()['facets']['category'][str(self.phones.pk)], 2)
+
+
+class ImportCatalogTests(TestCase):
+	def _import(self, name, content, **options):
+		path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), name)
+		with open(path, 'w', encoding='utf-8') as fh:
+			fh.write(content)
+		out, err = io.StringIO(), io.StringIO()
+		call_command('import_catalog', path, stdout=out, stderr=err, **options)
+		return out.getvalue(), err.getvalue()
+
+	def test_csv_creates_products_categories_and_translations(self):
+		out, err = self._import('catalog.csv', (
+			"name,name_en,category,category_en,price,discount\n"
+			"Ноутбук,Laptop,Ноутбуки,Laptops,100.00,10\n"
+			"Ноутбук,Laptop,Ноутбуки,Laptops,50,\n"
+			"Без цены,,Ноутбуки,,,\n"
+		), batch_size=2)
+		self.assertIn("2 created", out)
+		self.assertIn("rows/s", out)
+		self.assertIn("line 4: a new product needs a price", err)
+		first, second = Product.objects.order_by('price')
+		self.assertEqual(first.category_id, second.category_id)
+		self.assertEqual(second.final_price, Decimal('90.00'))
+		self.assertEqual({first.slug, second.slug}, {"laptop", "laptop-2"})
+		self.assertEqual(second.safe_translation_getter('name', language_code='en'), "Laptop")
+		self.assertEqual(Category.objects.count(), 1)
+		self.assertContains(self.client.get('/en/store/'), "Laptop")
+
+	def test_jsonl_updates_by_slug(self):
+		cat = Category.objects.create(name="Телефоны")
+		Product.objects.create(category=cat, name="Старый", price=Decimal('5.00'), slug="phone")
+		out, _err = self._import('catalog.jsonl', (
+			'{"slug": "phone", "name": {"ru": "Новый", "uz": "Yangi"}, "price": 7, "discount": 50}\n'
+			'not json\n'
+		))
+		self.assertIn("1 updated, 1 skipped", out)
+		product = Product.objects.get(slug="phone")
+		self.assertEqual((product.price, product.final_price, product.category_id), (Decimal('7.00'), Decimal('3.50'), cat.pk))
+		self.assertEqual(product.safe_translation_getter('name', language_code='uz'), "Yangi")
+		self.assertEqual(product.cards.get(language_code='ru').name, "Новый")
+
+	def test_matches_categories_on_any_translation(self):
+		cat = Category.objects.create()
+		cat.set_current_language('en')
+		cat.name = "Laptops"
+		cat.save()
+		out, _err = self._import('catalog.csv', "name,category,category_en,price\nНоутбук,Ноутбуки,Laptops,10\n")
+		self.assertIn("0 new categories", out)
+		self.assertEqual(Product.objects.get().category_id, cat.pk)
+		cat.refresh_from_db()
+		self.assertEqual(cat.safe_translation_getter('name', language_code='ru'), "Ноутбуки")
+
+	def test_upsert_without_conflict_target(self):
+		# MySQL: ON DUPLICATE KEY UPDATE, no unique_fields
+		from unittest import mock
+		from django.db import connection
+		from .importing import CatalogImporter
+		translation = Product._parler_meta.root_model
+		with mock.patch.object(type(connection.features), 'supports_update_conflicts_with_target', False), \
+				mock.patch.object(type(translation.objects), 'bulk_create') as bulk_create:
+			CatalogImporter()._upsert(translation, [translation(master_id=1, language_code='ru', name="X")])
+		self.assertNotIn('unique_fields', bulk_create.call_args.kwargs)
+		self.assertTrue(bulk_create.call_args.kwargs['update_conflicts'])
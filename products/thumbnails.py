@@ -0,0 +1,179 @@
+"""
+Fixed-width WebP/JPEG renditions of uploaded catalog images.
+
+For ``products/images/foo.png`` the renditions are stored next to the
+original as ``foo.320w.webp`` / ``foo.320w.jpg`` plus a ``foo.variants.json``
+manifest holding the original size and the widths that exist. Templates use
+them through ``{% responsive_image %}`` (``thumbnails`` template library).
+"""
+import io
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+
+from caching.tiered import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_widths():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (160, 320, 640, 1280)))
+
+
+def _stem(name):
+    return os.path.splitext(name)[0]
+
+
+def variant_name(name, width, ext):
+    return f'{_stem(name)}.{width}w.{ext}'
+
+
+def manifest_name(name):
+    return f'{_stem(name)}.variants.json'
+
+
+def _cache_key(name):
+    return f'image-variants:{name}'
+
+
+def _save(storage, name, data):
+    # storages rename on conflict; renditions must keep their exact name
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(data))
+
+
+def _encode(image, fmt, options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(name, storage=None, force=False):
+    """Render every configured width of image ``name``; returns the manifest."""
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    if not force and storage.exists(manifest_name(name)):
+        return read_manifest(name, storage)
+    with storage.open(name, 'rb') as fh:
+        original = ImageOps.exif_transpose(Image.open(fh))
+        original.load()
+    width, height = original.size
+    # never upscale; an image narrower than every width gets one rendition
+    widths = [w for w in variant_widths() if w <= width] or [width]
+    if original.mode in ('RGBA', 'LA', 'PA') or 'transparency' in original.info:
+        rgba = original.convert('RGBA')
+        flat = Image.new('RGB', rgba.size, (255, 255, 255))
+        flat.paste(rgba, mask=rgba.getchannel('A'))
+    else:
+        rgba, flat = None, original.convert('RGB')
+    sources = {'WEBP': rgba if rgba is not None else flat, 'JPEG': flat}
+    for target in widths:
+        size = (target, max(1, round(height * target / width)))
+        for ext, (fmt, options) in FORMATS.items():
+            data = _encode(sources[fmt].resize(size, Image.LANCZOS), fmt, options)
+            _save(storage, variant_name(name, target, ext), data)
+    manifest = {'width': width, 'height': height, 'widths': widths}
+    _save(storage, manifest_name(name), json.dumps(manifest).encode())
+    catalog_cache.invalidate(f'image:{name}')
+    return manifest
+
+
+def read_manifest(name, storage=None):
+    storage = storage or default_storage
+    try:
+        with storage.open(manifest_name(name), 'rb') as fh:
+            return json.loads(fh.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _load_manifest(name):
+    # False marks "no renditions" so missing manifests are not re-read
+    manifest = read_manifest(name) or False
+    catalog_cache.set(_cache_key(name), manifest, tags=('images', f'image:{name}'))
+    return manifest
+
+
+def variants(name):
+    """Manifest of ``name`` or ``None`` (no renditions yet); cached per process."""
+    if not name:
+        return None
+    cached = catalog_cache.get(_cache_key(name))
+    if cached is None:
+        cached = _load_manifest(name)
+    return cached or None
+
+
+def variants_many(names):
+    """``{name: manifest or None}`` for ``names``, read from the cache in one batch."""
+    names = [name for name in dict.fromkeys(names) if name]
+    cached = catalog_cache.get_many([_cache_key(name) for name in names])
+    manifests = {}
+    for name in names:
+        manifest = cached.get(_cache_key(name))
+        if manifest is None:
+            manifest = _load_manifest(name)
+        manifests[name] = manifest or None
+    return manifests
+
+
+class TracksImages(models.Model):
+    """
+    Remembers the names the ``image_fields`` were loaded with, so saves that
+    leave an image alone don't rebuild its renditions.
+    """
+
+    image_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_images = {field: instance.__dict__.get(field) for field in cls.image_fields}
+        return instance
+
+
+def ensure_variants(fieldfile):
+    """Build renditions for a newly uploaded image."""
+    name = getattr(fieldfile, 'name', None)
+    if not name:
+        return
+    try:
+        generate_variants(name, fieldfile.storage)
+    except Exception:
+        # a broken upload must not break saving the object
+        logger.exception('Could not build image variants of %s', name)
+
+
+def schedule_variants(instance, field):
+    """
+    post_save helper: build renditions of ``instance.<field>`` once the
+    transaction commits, if it holds a new upload. Pillow work stays out of
+    the open transaction.
+    """
+    fieldfile = getattr(instance, field)
+    loaded = getattr(instance, '_loaded_images', {})
+    if field in loaded and loaded[field] == fieldfile.name:
+        return
+    instance._loaded_images = {**loaded, field: fieldfile.name}
+    if fieldfile.name:
+        transaction.on_commit(lambda: ensure_variants(fieldfile))
+
+
+def srcset(name, manifest, ext, storage=None):
+    storage = storage or default_storage
+    return ', '.join(f'{storage.url(variant_name(name, w, ext))} {w}w' for w in manifest['widths'])
@@ -1,5 +1,7 @@
+from urllib.parse import urlencode
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import Http404, JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from users.models import Contact
@@ -10,9 +12,29 @@ from designs.models import DesignAsset
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_GET
+from search.index import apply_search
+from recommendations.index import apply_recommendations
+from django.utils.translation import get_language
+from caching.conditional import conditional_catalog
+from caching.fragments import fragment_key, get_fragment, set_fragment
+from caching.snapshot import catalog_snapshot
+from caching.tiered import catalog_cache, lang_tag
+from .cards import CARD_ORDERINGS, facet_counts, filter_cards, parse_price, product_cards
+from .managers import prefetch_translations
+from .pagination import cursor_mode_requested, cursor_paginate
+from .pricing import ZERO, CartPricer
 
 def home(request):
-    products = Product.objects.filter(discount__gte=10)[:6]
+    lang = get_language()
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        products = snapshot.product_listing(lang).hot_deals[:6]
+    else:
+        products = catalog_cache.get_or_set(
+            f'home-hot-deals:{lang}',
+            lambda: list(product_cards(lang).filter(is_active=True, discount__gte=10)[:6]),
+            tags=('products', lang_tag(lang)),
+        )
     message = ''
     success = False
 
@@ -67,33 +89,24 @@ def contact_page(request):
 
 @require_GET
 def cart_count(request):
-    cart = request.session.get('cart', {})
-    try:
-        count = sum(int(q) for q in cart.values()) if isinstance(cart, dict) else 0
-    except Exception:
-        count = 0
-    return JsonResponse({'count': count})
-
-
+    return JsonResponse({'count': request.cart.count})
 
-def _get_cart(session):
-    return session.get('cart', {})
 
-def _save_cart(session, cart):
-    session['cart'] = cart
-    session.modified = True
 
+def _store_versions(request):
+    # every product/category change bumps the generation the grid fragments use
+    return [catalog_cache.generation('products')]
 
 
+@conditional_catalog(_store_versions)
 def store_view(request):
     """Product listing with optional category + name search filters.
 
     Fixes:
     - Use stable category primary key instead of translated name for filtering.
-    - Query translated product names via parler translation table.
+    - Query translated product names via the full-text search index.
     - Preserve submitted search/category values in the form.
     """
-    qs = Product.objects.filter(is_active=True).select_related('category')
     category_raw = request.GET.get('category')
     current_category_id = None
     if category_raw:
@@ -101,47 +114,162 @@ def store_view(request):
             current_category_id = int(category_raw)
         except (TypeError, ValueError):
             current_category_id = None
-    if current_category_id:
-        qs = qs.filter(category_id=current_category_id)
     search = request.GET.get('q')
-    if search:
-        qs = qs.filter(translations__name__icontains=search).distinct()
+    sort = request.GET.get('sort')
+    if sort not in CARD_ORDERINGS:
+        sort = None
+    min_price = parse_price(request.GET.get('min_price'))
+    max_price = parse_price(request.GET.get('max_price'))
     try:
         per_page = int(request.GET.get('page_size', '9'))
     except ValueError:
         per_page = 9
     per_page = max(3, min(per_page, 48))
-    paginator = Paginator(qs, per_page)
-    page = request.GET.get('page')
-    try:
-        products_page = paginator.page(page)
-    except PageNotAnInteger:
-        products_page = paginator.page(1)
-    except EmptyPage:
-        products_page = paginator.page(paginator.num_pages)
-    categories = Category.objects.all()
+    # cursors follow (-created_at, -id); search results are ordered by
+    # relevance and other sorts by price/discount, so those use page numbers
+    cursor_mode = cursor_mode_requested(request) and not search and sort in (None, 'newest')
+    is_xhr = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    if is_xhr:
+        key = fragment_key(
+            'products', category=current_category_id, q=search, sort=sort,
+            min_price=min_price, max_price=max_price, page_size=per_page,
+            page=request.GET.get('page'), cursor=request.GET.get('cursor') if cursor_mode else None,
+        )
+        fragments = get_fragment(key)
+        if fragments is not None:
+            return JsonResponse(fragments)
+
+    lang = get_language()
+    # search and cursor paging need the card table; everything else can be
+    # answered from the worker's catalog snapshot when one is enabled
+    snapshot = None if search or cursor_mode else catalog_snapshot.current()
+    if snapshot is not None:
+        listing = snapshot.product_listing(lang)
+        qs = listing.select(sort, min_price, max_price)
+        facets = {category_id: count for (category_id,), count in listing.facet_counts(qs, 'category_id').items()}
+        if current_category_id:
+            qs = [row for row in qs if row.category_id == current_category_id]
+        categories = listing.categories
+    else:
+        qs = product_cards().filter(is_active=True)
+        if search:
+            qs = apply_search(qs, 'product', search, field='product_id')
+        qs = filter_cards(qs, sort, min_price, max_price)
+        # counted before the category filter so every option shows its own count
+        facets = _category_facets(qs, search, min_price, max_price)
+        if current_category_id:
+            qs = qs.filter(category_id=current_category_id)
+        categories = catalog_cache.get_or_set(
+            f'store-categories:{lang}',
+            lambda: list(Category.objects.with_translations()),
+            tags=('categories', lang_tag(lang)),
+        )
+    if cursor_mode:
+        paginator = None
+        products_page = cursor_paginate(qs, request.GET.get('cursor'), per_page)
+    else:
+        paginator = Paginator(qs, per_page)
+        page = request.GET.get('page')
+        try:
+            products_page = paginator.page(page)
+        except PageNotAnInteger:
+            products_page = paginator.page(1)
+        except EmptyPage:
+            products_page = paginator.page(paginator.num_pages)
+    # carried by the cursor links, which replace the whole query string
+    filters = {
+        'category': current_category_id, 'q': search, 'sort': sort,
+        'min_price': min_price, 'max_price': max_price, 'page_size': per_page,
+    }
     context = {
         'products': products_page.object_list,
         'page_obj': products_page,
         'paginator': paginator,
         'is_paginated': products_page.has_other_pages(),
+        'cursor_mode': cursor_mode,
         'categories': categories,
+        'category_facets': [(cat, facets.get(cat.pk, 0)) for cat in categories],
         'current_category': current_category_id,
         'search_query': search,
+        'sort': sort or '',
+        'min_price': min_price,
+        'max_price': max_price,
         'page_size': per_page,
-    'page_size_options': [9, 18, 27, 36],
+        'page_size_options': [9, 18, 27, 36],
+        'filter_query': urlencode({name: value for name, value in filters.items() if value}),
     }
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        html = render_to_string('partials/_product_grid.html', context, request=request)
-        pagination = render_to_string('partials/_pagination.html', context, request=request)
-        return JsonResponse({'html': html, 'pagination': pagination})
+    if is_xhr:
+        return JsonResponse(set_fragment(key, {
+            'html': render_to_string('partials/_product_grid.html', context, request=request),
+            'pagination': render_to_string('partials/_pagination.html', context, request=request),
+            'facets': {'category': facets},
+        }))
     return render(request, 'store.html', context)
 
 
+def _category_facets(cards, search, min_price, max_price):
+    """``{category_id: active products}`` for the sidebar, cached per language and filters."""
+    key = fragment_key('products', facets='category', q=search, min_price=min_price, max_price=max_price)
+    counts = get_fragment(key)
+    if counts is None:
+        counts = set_fragment(key, {
+            category_id: count for (category_id,), count in facet_counts(cards, 'category_id').items()
+        })
+    return counts
+
+
+REVIEWS_PER_PAGE = 10
+
+
+def _cached_product(slug, lang):
+    snapshot = catalog_snapshot.current()
+    # the snapshot only knows which slugs exist; the object is loaded on demand
+    if snapshot is not None and snapshot.product_listing(lang).detail(slug) is None:
+        raise Http404('No Product matches the given query.')
+    key = f'product-detail:{lang}:{slug}'
+    product = catalog_cache.get(key)
+    if product is None:
+        product = get_object_or_404(Product.objects.select_related('category'), slug=slug, is_active=True)
+        prefetch_translations([product])
+        prefetch_translations([product.category])
+        catalog_cache.set(key, product, tags=(
+            f'product:{product.pk}', f'category:{product.category_id}', lang_tag(lang),
+        ))
+    return product
+
+
+def _related_products(product, lang, limit=8):
+    """Bought-together products, or the category's newest when there is no order history."""
+    cards = product_cards(lang).filter(is_active=True).exclude(product_id=product.pk)
+    related = list(apply_recommendations(cards, 'product', product.pk, 'product_id')[:limit])
+    return related or list(cards.filter(category_id=product.category_id)[:limit])
+
+
+def _product_versions(request, slug):
+    product = _cached_product(slug, get_language())
+    # related cards cover other products, hence the catalog-wide versions
+    versions = catalog_cache.versions(
+        f'product:{product.pk}', f'category:{product.category_id}', 'products', 'recommendations', 'images',
+    )
+    return [*versions.values(), catalog_cache.generation('products')]
+
+
+@conditional_catalog(_product_versions)
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug, is_active=True)
-    related = Product.objects.filter(category=product.category, is_active=True).exclude(pk=product.pk)[:8]
-    reviews = product.reviews.select_related('user').order_by('-created_at')
+    lang = get_language()
+    product = _cached_product(slug, lang)
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        related = snapshot.product_listing(lang).related_rows(product.pk, 'category_id', product.category_id)
+    else:
+        related = catalog_cache.get_or_set(
+            f'product-related:{lang}:{product.pk}',
+            lambda: _related_products(product, lang),
+            tags=('products', 'recommendations', f'category:{product.category_id}', lang_tag(lang)),
+        )
+    reviews = Paginator(
+        product.reviews.select_related('user').order_by('-created_at', '-pk'), REVIEWS_PER_PAGE,
+    ).get_page(request.GET.get('reviews_page'))
     form = None
     if request.method == 'POST' and request.POST.get('form_type') == 'review':
         if not request.user.is_authenticated:
@@ -186,11 +314,8 @@ def add_to_cart(request):
     else:
         obj = get_object_or_404(Product, pk=item_id, is_active=True)
         key = f"P:{obj.pk}"
-    cart = _get_cart(request.session)
-    cart[key] = cart.get(key, 0) + qty
-    _save_cart(request.session, cart)
-    count = sum(cart.values())
-    return JsonResponse({'ok': True, 'count': count, 'key': key})
+    request.cart.add(key, qty)
+    return JsonResponse({'ok': True, 'count': request.cart.count, 'key': key})
 
 
 @require_POST
@@ -198,83 +323,28 @@ def update_cart_item(request):
     try:
         product_id = request.POST.get('product_id')
         action = request.POST.get('action')
-        cart = _get_cart(request.session)
+        cart = request.cart
         key = str(product_id)
         if key not in cart:
             return JsonResponse({'ok': False, 'error': 'not_in_cart'}, status=400)
 
         if action == 'inc':
-            cart[key] += 1
+            cart.add(key, 1)
         elif action == 'dec':
-            cart[key] = max(1, cart[key] - 1)
+            cart.set(key, max(1, cart.quantity(key) - 1))
         elif action == 'remove':
-            del cart[key]
+            cart.remove(key)
         else:
             return JsonResponse({'ok': False, 'error': 'bad_action'}, status=400)
 
-        _save_cart(request.session, cart)
-
-        line_total = 0.0
-        if key in cart:
-            if key.startswith('P:'):
-                obj_id = key.split(':', 1)[1]
-                product = Product.objects.filter(pk=obj_id).first()
-                if product:
-                    price_val = product.safe_translation_getter('price', any_language=True)
-                    try:
-                        price_num = float(price_val or 0)
-                    except (TypeError, ValueError):
-                        price_num = 0
-                    line_total = price_num * cart[key]
-            elif key.startswith('D:'):
-                obj_id = key.split(':', 1)[1]
-                design = DesignAsset.objects.filter(pk=obj_id).first()
-                if design:
-                    try:
-                        price_num = float(getattr(design, 'price', 0) or 0)
-                    except (TypeError, ValueError):
-                        price_num = 0
-                    line_total = price_num * cart[key]
-            elif key.startswith('C:'):
-                price = request.session.get('donation_price')
-                try:
-                    price_val = float(price)
-                except (TypeError, ValueError):
-                    price_val = 0
-                line_total = price_val * cart[key]
-
-        subtotal = 0.0
-        if cart:
-            product_ids = [k.split(':', 1)[1] for k in cart if k.startswith('P:')]
-            design_ids = [k.split(':', 1)[1] for k in cart if k.startswith('D:')]
-            products = Product.objects.filter(pk__in=product_ids)
-            designs = DesignAsset.objects.filter(pk__in=design_ids)
-            price_map = {}
-            for p in products:
-                val = p.safe_translation_getter('price', any_language=True)
-                try:
-                    price_map[f"P:{p.pk}"] = float(val or 0)
-                except (TypeError, ValueError):
-                    price_map[f"P:{p.pk}"] = 0
-            for d in designs:
-                try:
-                    price_map[f"D:{d.pk}"] = float(getattr(d, 'price', 0) or 0)
-                except (TypeError, ValueError):
-                    price_map[f"D:{d.pk}"] = 0
-            donation_price = request.session.get('donation_price')
-            if donation_price is not None and 'C:DONATION' in cart:
-                try:
-                    price_map['C:DONATION'] = float(donation_price)
-                except (TypeError, ValueError):
-                    price_map['C:DONATION'] = 0
-            subtotal = sum(price_map.get(k, 0) * q for k, q in cart.items())
-
+        pricer = CartPricer.for_request(request)
+        line = pricer.line(key)
         return JsonResponse({
             'ok': True,
-            'qty': cart.get(key, 0),
-            'count': sum(cart.values()),
-            'line_total': round(line_total, 2),
-            'subtotal': round(subtotal, 2),
+            'qty': cart.quantity(key),
+            'count': cart.count,
+            'line_total': line.line_total if line else ZERO,
+            'subtotal': pricer.subtotal,
             'removed': key not in cart
         })
     except Exception as e:
@@ -282,141 +352,20 @@ def update_cart_item(request):
 
 
 def cart_view(request):
-    cart = _get_cart(request.session)
-    product_ids = [k.split(':', 1)[1] for k in cart if k.startswith('P:')]
-    design_ids = [k.split(':', 1)[1] for k in cart if k.startswith('D:')]
-    products = Product.objects.filter(pk__in=product_ids)
-    designs = DesignAsset.objects.filter(pk__in=design_ids)
-    prod_map = {f"P:{p.pk}": p for p in products}
-    design_map = {f"D:{d.pk}": d for d in designs}
-    items = []
-    subtotal = Decimal('0')
-
-    for key, qty in cart.items():
-        if key.startswith('C:'):
-            price = request.session.get('donation_price')
-            try:
-                price_dec = Decimal(str(price))
-            except (InvalidOperation, TypeError):
-                price_dec = Decimal('0')
-            line_total = price_dec * qty
-            items.append({
-                'key': key,
-                'product': type('Tmp', (), {'name': 'Advance Payment', 'price': price_dec, 'image': None})(),
-                'qty': qty,
-                'line_total': line_total,
-                'is_design': False,
-                'is_donation': True
-            })
-            subtotal += line_total
-            continue
-
-        obj = prod_map.get(key) or design_map.get(key)
-        if not obj:
-            continue
-
-        if hasattr(obj, 'safe_translation_getter'):
-            price_val = obj.safe_translation_getter('price', any_language=True)
-            name_val = obj.safe_translation_getter('name', any_language=True) or str(obj.pk)
-            try:
-                price_number = Decimal(str(price_val)) if price_val is not None else Decimal('0')
-            except (InvalidOperation, TypeError):
-                price_number = Decimal('0')
-            line_total = price_number * qty
-            subtotal += line_total
-            temp_obj = obj
-            temp_obj.name = name_val
-            temp_obj.price = price_number
-            items.append({
-                'key': key,
-                'product': temp_obj,
-                'qty': qty,
-                'line_total': line_total,
-                'is_design': key.startswith('D:'),
-                'is_donation': False
-            })
-            continue
-
-        try:
-            price_number = Decimal(str(getattr(obj, 'price', 0) or 0))
-        except (InvalidOperation, TypeError):
-            price_number = Decimal('0')
-        line_total = price_number * qty
-        subtotal += line_total
-        items.append({
-            'key': key,
-            'product': obj,
-            'qty': qty,
-            'line_total': line_total,
-            'is_design': key.startswith('D:'),
-            'is_donation': False
-        })
-
-    return render(request, 'cart.html', {'items': items, 'subtotal': subtotal})
+    pricer = CartPricer.for_request(request)
+    return render(request, 'cart.html', {'items': pricer.lines, 'subtotal': pricer.subtotal})
 
 
 def checkout_view(request):
-    cart = _get_cart(request.session)
-    if not cart:
+    if not request.cart:
         messages.info(request, 'Your cart is empty.')
         return redirect('store')
-    product_ids = [k.split(':',1)[1] for k in cart.keys() if k.startswith('P:')]
-    design_ids = [k.split(':',1)[1] for k in cart.keys() if k.startswith('D:')]
-    products = Product.objects.filter(pk__in=product_ids)
-    designs = DesignAsset.objects.filter(pk__in=design_ids)
-    prod_map = {f"P:{p.pk}": p for p in products}
-    design_map = {f"D:{d.pk}": d for d in designs}
-    items = []
-    total = Decimal('0')
-    donation_price = request.session.get('donation_price')
-
-    for key, qty in cart.items():
-        if key.startswith('C:'):
-            try:
-                price_dec = Decimal(str(donation_price))
-            except (InvalidOperation, TypeError):
-                price_dec = Decimal('0')
-            line_total = price_dec * qty
-            total += line_total
-            items.append({
-                'product': type('Tmp', (), {'name': 'Advance Payment', 'price': price_dec, 'image': None})(),
-                'qty': qty,
-                'line_total': line_total
-            })
-            continue
-
-        obj = prod_map.get(key) or design_map.get(key)
-        if not obj:
-            continue
-
-
-        if hasattr(obj, 'safe_translation_getter'):
-            price_val = obj.safe_translation_getter('price', any_language=True)
-            name_val = obj.safe_translation_getter('name', any_language=True) or str(obj.pk)
-            try:
-                price_number = Decimal(str(price_val)) if price_val is not None else Decimal('0')
-            except (InvalidOperation, TypeError):
-                price_number = Decimal('0')
-            line_total = price_number * qty
-            total += line_total
-            obj.name = name_val
-            obj.price = price_number
-            items.append({'product': obj, 'qty': qty, 'line_total': line_total})
-            continue
-
-
-        try:
-            price_number = Decimal(str(getattr(obj, 'price', 0) or 0))
-        except (InvalidOperation, TypeError):
-            price_number = Decimal('0')
-        line_total = price_number * qty
-        total += line_total
-        items.append({'product': obj, 'qty': qty, 'line_total': line_total})
+    pricer = CartPricer.for_request(request)
     if request.method == 'POST':
-        request.session.pop('cart', None)
+        request.cart.clear()
         messages.success(request, 'Order placed successfully!')
         return redirect('store')
-    return render(request, 'checkout.html', {'items': items, 'total': total})
+    return render(request, 'checkout.html', {'items': pricer.lines, 'total': pricer.subtotal})
 
 
 
@@ -435,10 +384,8 @@ def donation_view(request):
         except (InvalidOperation, TypeError):
             messages.error(request, 'Enter a valid positive amount.')
         else:
-            cart = _get_cart(request.session)
-            request.session['donation_price'] = str(amount_dec)
-            cart['C:DONATION'] = cart.get('C:DONATION', 0) + qty_int
-            _save_cart(request.session, cart)
+            request.cart.set_donation_price(amount_dec)
+            request.cart.add('C:DONATION', qty_int)
             messages.success(request, 'Advance payment added to cart.')
             return redirect('cart')
     return render(request, 'donation.html')
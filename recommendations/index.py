@@ -0,0 +1,96 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from caching.snapshot import bump_catalog_version
+
+from .models import CoPurchase
+
+TOP_K = 8
+# orders with more distinct items than this add little signal and O(n^2) pairs
+MAX_ORDER_ITEMS = 50
+_ITEM_FIELDS = {'product': 'product_id', 'design': 'design_asset_id'}
+
+
+def _order_baskets(rows):
+    """Group ``(order_id, kind, product_id, design_asset_id)`` rows, sorted by order, into baskets."""
+    for _order_id, lines in groupby(rows, key=itemgetter(0)):
+        basket = defaultdict(set)
+        for _order, kind, product_id, design_id in lines:
+            item_id = product_id if kind == 'product' else design_id
+            if item_id is not None:
+                basket[kind].add(item_id)
+        yield basket
+
+
+def co_occurrence(rows):
+    """
+    Item frequencies and sparse pair counts per kind:
+    ``{kind: (Counter(item), {item: Counter(other)})}``.
+    """
+    stats = {kind: (Counter(), defaultdict(Counter)) for kind in _ITEM_FIELDS}
+    for basket in _order_baskets(rows):
+        for kind, items in basket.items():
+            if len(items) > MAX_ORDER_ITEMS:
+                continue
+            frequency, pairs = stats[kind]
+            frequency.update(items)
+            for a, b in combinations(items, 2):
+                pairs[a][b] += 1
+                pairs[b][a] += 1
+    return stats
+
+
+def top_neighbours(frequency, pairs, k=TOP_K, min_support=1):
+    """Yield ``(source, [(score, target), ...])`` ranked by cosine similarity."""
+    for source, others in pairs.items():
+        scored = (
+            (count / math.sqrt(frequency[source] * frequency[target]), target)
+            for target, count in others.items()
+            if count >= min_support
+        )
+        best = heapq.nlargest(k, scored, key=itemgetter(0))
+        if best:
+            yield source, best
+
+
+def build_index(order_items, k=TOP_K, min_support=1):
+    """Recompute the whole co-purchase table from an ``OrderItem`` queryset."""
+    rows = (
+        order_items.filter(kind__in=list(_ITEM_FIELDS))
+        .order_by('order_id')
+        .values_list('order_id', 'kind', 'product_id', 'design_asset_id')
+        .iterator(chunk_size=2000)
+    )
+    stats = co_occurrence(rows)
+    objs = [
+        CoPurchase(kind=kind, source_id=source, target_id=target, score=score, rank=rank)
+        for kind, (frequency, pairs) in stats.items()
+        for source, best in top_neighbours(frequency, pairs, k, min_support)
+        for rank, (score, target) in enumerate(best)
+    ]
+    with transaction.atomic():
+        CoPurchase.objects.all().delete()
+        CoPurchase.objects.bulk_create(objs, batch_size=1000)
+        bump_catalog_version()
+    return len(objs)
+
+
+def apply_recommendations(queryset, kind, source_id, field):
+    """
+    Restrict ``queryset`` (e.g. card rows, whose object id column is
+    ``field``) to the neighbours of ``source_id``, best first. Runs as a
+    single query.
+    """
+    neighbours = CoPurchase.objects.filter(kind=kind, source_id=source_id)
+    rank = neighbours.filter(target_id=OuterRef(field)).values('rank')[:1]
+    return (
+        queryset.filter(**{f'{field}__in': neighbours.values('target_id')})
+        .annotate(copurchase_rank=Subquery(rank))
+        .order_by('copurchase_rank')
+    )
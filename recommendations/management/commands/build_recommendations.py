@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from caching.tiered import catalog_cache
+from orders.models import OrderItem
+from payment.models import TransactionStatus
+from recommendations.index import TOP_K, build_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the "bought together" recommendations from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Neighbours kept per item')
+        parser.add_argument('--min-support', type=int, default=1,
+                            help='Minimum number of shared orders for a pair')
+        parser.add_argument('--paid-only', action='store_true',
+                            help='Only use orders with a successful payment')
+
+    def handle(self, *args, **options):
+        items = OrderItem.objects.all()
+        if options['paid_only']:
+            items = items.filter(order__transactions__status=TransactionStatus.SUCCESS).distinct()
+        written = build_index(items, k=options['top_k'], min_support=options['min_support'])
+        catalog_cache.invalidate('recommendations')
+        catalog_cache.bump_generation('pages')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} co-purchase rows'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoPurchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('design', 'Design Asset')], max_length=12)),
+                ('source_id', models.UUIDField()),
+                ('target_id', models.UUIDField()),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Co-purchase',
+                'verbose_name_plural': 'Co-purchases',
+                'db_table': 'recommendation_copurchase',
+                'ordering': ['kind', 'source_id', 'rank'],
+                'indexes': [models.Index(fields=['kind', 'source_id', 'rank'], name='recommendat_kind_5ad4ec_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class CoPurchase(models.Model):
+    """Top-K "bought together" neighbours of a product or design asset.
+
+    Rebuilt offline from order history by ``manage.py build_recommendations``.
+    """
+    KIND_CHOICES = (
+        ('product', _('Product')),
+        ('design', _('Design Asset')),
+    )
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    source_id = models.UUIDField()
+    target_id = models.UUIDField()
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = _('Co-purchase')
+        verbose_name_plural = _('Co-purchases')
+        db_table = 'recommendation_copurchase'
+        ordering = ['kind', 'source_id', 'rank']
+        indexes = [
+            models.Index(fields=['kind', 'source_id', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.source_id} -> {self.target_id} ({self.score:.3f})"
@@ -0,0 +1,71 @@
+from decimal import Decimal
+from io import StringIO
+
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+
+from .index import apply_recommendations, co_occurrence, top_neighbours
+from .models import CoPurchase
+
+
+class CoOccurrenceTests(TestCase):
+    def test_scores_pairs_within_orders(self):
+        rows = [
+            (1, 'product', 'a', None), (1, 'product', 'b', None),
+            (2, 'product', 'a', None), (2, 'product', 'b', None), (2, 'product', 'c', None),
+            (3, 'design', None, 'x'), (3, 'design', None, 'y'),
+        ]
+        stats = co_occurrence(rows)
+        frequency, pairs = stats['product']
+        self.assertEqual(pairs['a'], {'b': 2, 'c': 1})
+        best = dict(top_neighbours(frequency, pairs, k=1))
+        self.assertEqual(best['a'][0][1], 'b')
+        self.assertEqual(dict(stats['design'][1]), {'x': {'y': 1}, 'y': {'x': 1}})
+
+
+class RecommendationIndexTests(TestCase):
+    def setUp(self):
+        self.laptops = Category.objects.create(name="Laptops")
+        mice = Category.objects.create(name="Mice")
+        self.laptop = Product.objects.create(category=self.laptops, name="Laptop", price=Decimal('9.00'), slug="laptop")
+        self.other_laptop = Product.objects.create(category=self.laptops, name="Laptop 2", price=Decimal('9.00'), slug="laptop-2")
+        self.mouse = Product.objects.create(category=mice, name="Mouse", price=Decimal('1.00'), slug="mouse")
+
+    def _order(self, *products):
+        Order.objects.create_with_items([
+            OrderItem(kind='product', product=p, name=p.name, unit_price=Decimal('1.00')) for p in products
+        ])
+
+    def test_detail_uses_copurchases_and_falls_back_to_category(self):
+        related = self.client.get(reverse('product_detail', args=['laptop'])).context['related']
+        self.assertEqual([r['product_id'] for r in related], [self.other_laptop.pk])
+
+        self._order(self.laptop, self.mouse)
+        call_command('build_recommendations', stdout=StringIO())
+        self.assertEqual(CoPurchase.objects.count(), 2)
+        related = self.client.get(reverse('product_detail', args=['laptop'])).context['related']
+        self.assertEqual([r['product_id'] for r in related], [self.mouse.pk])
+
+    def test_rebuild_bumps_the_catalog_version_in_its_transaction(self):
+        self._order(self.laptop, self.mouse)
+        depth = len(connection.atomic_blocks)
+        with mock.patch('recommendations.index.bump_catalog_version',
+                        side_effect=lambda: self.assertGreater(len(connection.atomic_blocks), depth)) as bump:
+            call_command('build_recommendations', stdout=StringIO())
+        bump.assert_called_once()
+
+    def test_lookup_is_one_query(self):
+        from products.cards import product_cards
+        self._order(self.laptop, self.mouse)
+        self._order(self.laptop, self.mouse, self.other_laptop)
+        call_command('build_recommendations', stdout=StringIO())
+        with self.assertNumQueries(1):
+            rows = list(apply_recommendations(product_cards(), 'product', self.laptop.pk, 'product_id'))
+        self.assertEqual([r['product_id'] for r in rows], [self.mouse.pk, self.other_laptop.pk])
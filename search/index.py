@@ -0,0 +1,141 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, When
+
+from .models import SearchDocument
+
+# Upper bound of ranked ids handed back to a listing queryset.
+SEARCH_LIMIT = 500
+INDEXED_FIELDS = ('name', 'description')
+FTS_TABLE = 'search_document_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_registry = {}
+_fts_available = None
+
+
+def register(model, kind):
+    _registry[model] = kind
+
+
+def registered_models():
+    return dict(_registry)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall((query or '').lower())[:8]
+
+
+def _documents_for(model, pks):
+    kind = _registry[model]
+    tr_model = model._parler_meta.root_model
+    columns = {f.name for f in tr_model._meta.concrete_fields}
+    fields = [f for f in INDEXED_FIELDS if f in columns]
+    rows = tr_model.objects.filter(master_id__in=pks).values_list('master_id', 'language_code', *fields)
+    for master_id, language_code, name, *rest in rows:
+        yield SearchDocument(
+            kind=kind,
+            object_id=str(master_id),
+            language_code=language_code,
+            name=name or '',
+            body=(rest[0] if rest else '') or '',
+        )
+
+
+def index_objects(model, pks):
+    """(Re)build the documents of the given objects from their translations."""
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return 0
+    docs = list(_documents_for(model, pks))
+    with transaction.atomic():
+        remove_objects(model, pks)
+        SearchDocument.objects.bulk_create(docs, batch_size=500)
+    return len(docs)
+
+
+def remove_objects(model, pks):
+    SearchDocument.objects.filter(
+        kind=_registry[model], object_id__in=[str(pk) for pk in pks]
+    ).delete()
+
+
+def fts_available():
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def _unique(object_ids, limit):
+    ids, seen = [], set()
+    for object_id in object_ids:
+        if object_id not in seen:
+            seen.add(object_id)
+            ids.append(object_id)
+            if len(ids) >= limit:
+                break
+    return ids
+
+
+def _search_sqlite(kind, tokens, limit):
+    match = ' '.join('"%s"*' % t for t in tokens)
+    # bm25() cannot be aggregated, so rank per document and keep each
+    # object's best language in Python (at most one row per language).
+    sql = (
+        f"SELECT d.object_id FROM {FTS_TABLE} JOIN search_document d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s AND d.kind = %s "
+        f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, kind, limit * 3])
+        return _unique((row[0] for row in cursor.fetchall()), limit)
+
+
+def _search_mysql(kind, tokens, limit):
+    against = ' '.join('+%s*' % t for t in tokens)
+    sql = (
+        "SELECT object_id, MAX(MATCH(name, body) AGAINST (%s IN BOOLEAN MODE)) AS score "
+        "FROM search_document "
+        "WHERE kind = %s AND MATCH(name, body) AGAINST (%s IN BOOLEAN MODE) "
+        "GROUP BY object_id ORDER BY score DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [against, kind, against, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_fallback(kind, tokens, limit):
+    qs = SearchDocument.objects.filter(kind=kind)
+    for token in tokens:
+        qs = qs.filter(Q(name__icontains=token) | Q(body__icontains=token))
+    return _unique(qs.values_list('object_id', flat=True).iterator(), limit)
+
+
+def search_ids(kind, query, limit=SEARCH_LIMIT):
+    """Return object ids of ``kind`` matching ``query``, best match first."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    if connection.vendor == 'sqlite' and fts_available():
+        return _search_sqlite(kind, tokens, limit)
+    if connection.vendor == 'mysql':
+        return _search_mysql(kind, tokens, limit)
+    return _search_fallback(kind, tokens, limit)
+
+
+def apply_search(queryset, kind, query, limit=SEARCH_LIMIT, field='pk'):
+    """Restrict ``queryset`` to search hits and order it by relevance.
+
+    ``field`` names the column holding the object id, e.g. ``product_id`` on
+    the card tables.
+    """
+    ids = search_ids(kind, query, limit)
+    if not ids:
+        return queryset.none()
+    ranking = Case(
+        *[When(**{field: pk, 'then': position}) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(**{f'{field}__in': ids}).order_by(ranking)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from search import index
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for products and design assets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Objects indexed per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            SearchDocument.objects.all().delete()
+            for model, kind in index.registered_models().items():
+                total = 0
+                pks = model.objects.values_list('pk', flat=True).iterator(chunk_size=batch_size)
+                batch = []
+                for pk in pks:
+                    batch.append(pk)
+                    if len(batch) >= batch_size:
+                        total += index.index_objects(model, batch)
+                        batch = []
+                total += index.index_objects(model, batch)
+                self.stdout.write(self.style.SUCCESS(f'Indexed {total} {kind} documents'))
+            if connection.vendor == 'sqlite' and index.fts_available():
+                with connection.cursor() as cursor:
+                    cursor.execute(f"INSERT INTO {index.FTS_TABLE}({index.FTS_TABLE}) VALUES ('rebuild')")
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+FTS_SQLITE = [
+    "CREATE VIRTUAL TABLE search_document_fts USING fts5("
+    "name, body, content='search_document', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER search_document_ai AFTER INSERT ON search_document BEGIN "
+    "INSERT INTO search_document_fts(rowid, name, body) VALUES (new.id, new.name, new.body); END",
+    "CREATE TRIGGER search_document_ad AFTER DELETE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, name, body) "
+    "VALUES ('delete', old.id, old.name, old.body); END",
+    "CREATE TRIGGER search_document_au AFTER UPDATE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, name, body) "
+    "VALUES ('delete', old.id, old.name, old.body); "
+    "INSERT INTO search_document_fts(rowid, name, body) VALUES (new.id, new.name, new.body); END",
+]
+FTS_SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_document_au",
+    "DROP TRIGGER IF EXISTS search_document_ad",
+    "DROP TRIGGER IF EXISTS search_document_ai",
+    "DROP TABLE IF EXISTS search_document_fts",
+]
+FTS_MYSQL = ["ALTER TABLE search_document ADD FULLTEXT INDEX search_document_ft (name, body)"]
+FTS_MYSQL_REVERSE = ["ALTER TABLE search_document DROP INDEX search_document_ft"]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+create_fulltext = _run({'sqlite': FTS_SQLITE, 'mysql': FTS_MYSQL})
+drop_fulltext = _run({'sqlite': FTS_SQLITE_REVERSE, 'mysql': FTS_MYSQL_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('design', 'Design Asset')], max_length=12)),
+                ('object_id', models.CharField(max_length=36)),
+                ('language_code', models.CharField(max_length=15)),
+                ('name', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Search document',
+                'verbose_name_plural': 'Search documents',
+                'db_table': 'search_document',
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='search_docu_kind_216f66_idx')],
+            },
+        ),
+        migrations.RunPython(create_fulltext, drop_fulltext),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# (app label, model, kind, translated fields indexed as name and body)
+SOURCES = (
+    ('products', 'Product', 'product', ('name',)),
+    ('designs', 'DesignAsset', 'design', ('name', 'description')),
+)
+
+
+def backfill_documents(apps, schema_editor):
+    """Index the objects that have no search documents yet (``rebuild_search_index``)."""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    for app_label, model_name, kind, fields in SOURCES:
+        translations = apps.get_model(app_label, f'{model_name}Translation')
+        indexed = set(SearchDocument.objects.filter(kind=kind).values_list('object_id', flat=True))
+        docs = []
+        rows = translations.objects.order_by('pk').values_list('master_id', 'language_code', *fields)
+        for master_id, language_code, name, *rest in rows.iterator(chunk_size=2000):
+            if str(master_id) in indexed:
+                continue
+            docs.append(SearchDocument(
+                kind=kind, object_id=str(master_id), language_code=language_code,
+                name=name or '', body=(rest[0] if rest else '') or '',
+            ))
+            if len(docs) >= 500:
+                SearchDocument.objects.bulk_create(docs)
+                docs = []
+        SearchDocument.objects.bulk_create(docs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('products', '0011_remove_producttranslation_price'),
+        ('designs', '0009_remove_designassettranslation_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
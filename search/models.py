@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """One indexed row per catalog object and language.
+
+    The text columns are mirrored into an FTS5 table on SQLite and carry a
+    FULLTEXT index on MySQL (see migration 0001).
+    """
+    KIND_CHOICES = (
+        ('product', _('Product')),
+        ('design', _('Design Asset')),
+    )
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=36)
+    language_code = models.CharField(max_length=15)
+    name = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = _('Search document')
+        verbose_name_plural = _('Search documents')
+        db_table = 'search_document'
+        indexes = [
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} [{self.language_code}]"
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+
+from designs.models import DesignAsset
+from products.models import Product
+
+from . import index
+
+
+def _master_deleted(sender, instance, **kwargs):
+    index.remove_objects(sender, [instance.pk])
+
+
+def _translation_changed(sender, instance, raw=False, **kwargs):
+    # Only the translations carry indexed text, the master row itself does not.
+    if not raw and instance.master_id:
+        master_model = sender._meta.get_field('master').related_model
+        index.index_objects(master_model, [instance.master_id])
+
+
+for model, kind in ((Product, 'product'), (DesignAsset, 'design')):
+    index.register(model, kind)
+    translation_model = model._parler_meta.root_model
+    post_delete.connect(_master_deleted, sender=model, dispatch_uid=f'search-{kind}-delete')
+    post_save.connect(_translation_changed, sender=translation_model, dispatch_uid=f'search-{kind}-tr-save')
+    post_delete.connect(_translation_changed, sender=translation_model, dispatch_uid=f'search-{kind}-tr-delete')
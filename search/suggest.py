@@ -0,0 +1,191 @@
+"""
+Per-process prefix index for search-box suggestions.
+
+Every worker keeps the names (all card languages) and slugs of active
+products and design assets in memory. Lookups never touch the database: the
+index only re-reads the card table of a kind after that kind's catalog
+generation moved, and then re-tokenizes just the rows that changed.
+"""
+import bisect
+import re
+import threading
+import time
+from operator import itemgetter
+
+from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+from django.utils.translation import get_language
+
+from caching.tiered import catalog_cache
+from designs.models import DesignCard
+from products.models import ProductCard
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# candidates examined per lookup; keeps one-letter prefixes cheap
+MAX_CANDIDATES = 2000
+
+
+def _options():
+    return getattr(settings, 'SEARCH_SUGGEST', {})
+
+
+def normalize(text):
+    return (text or '').casefold()
+
+
+def tokens(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class Entry:
+    __slots__ = ('kind', 'object_id', 'slug', 'names', 'tokens', 'fingerprint')
+
+    def __init__(self, kind, object_id, slug, names):
+        self.kind = kind
+        self.object_id = object_id
+        self.slug = slug
+        self.names = names
+        self.tokens = frozenset(
+            token for text in (*names.values(), slug.replace('-', ' ')) for token in tokens(text)
+        )
+        self.fingerprint = (slug, tuple(sorted(names.items())))
+
+    def name(self, language_code):
+        return self.names.get(language_code) or self.names.get(settings.LANGUAGE_CODE) or next(iter(self.names.values()), '')
+
+    def url(self):
+        name = 'product_detail' if self.kind == 'product' else 'designs:asset_detail'
+        try:
+            return reverse(name, args=[self.slug])
+        except NoReverseMatch:
+            return ''
+
+
+# kind -> (card model, object id column, catalog generation scope)
+SOURCES = {
+    'product': (ProductCard, 'product_id', 'products'),
+    'design': (DesignCard, 'asset_id', 'designs'),
+}
+
+
+def load_entries(kind):
+    """``{(kind, object_id): Entry}`` of the active rows of ``kind``, read from its card table."""
+    model, id_field, _scope = SOURCES[kind]
+    rows = (
+        model.objects.filter(is_active=True)
+        .order_by()
+        .values_list(id_field, 'language_code', 'name', 'slug')
+    )
+    grouped = {}
+    for object_id, language_code, name, slug in rows:
+        key = (kind, str(object_id))
+        grouped.setdefault(key, (slug, {}))[1][language_code] = name
+    return {key: Entry(kind, key[1], slug, names) for key, (slug, names) in grouped.items()}
+
+
+class SuggestIndex:
+    """
+    Sorted ``(token, key)`` postings over the catalog; a lookup is one
+    bisect for the rarest query prefix plus a scan of its range.
+
+    The index is replaced wholesale on update, so readers never lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._postings = []
+        self._versions = {}
+        self._checked_at = 0.0
+
+    # -- maintenance -------------------------------------------------------
+
+    def refresh(self, force=False):
+        """Pick up catalog changes; a no-op until a kind's generation moves."""
+        interval = _options().get('CHECK_INTERVAL', 1.0)
+        now = time.monotonic()
+        if not force and now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        # read before the cards: the card signals run before the generation
+        # bump, so a version never gets recorded with older rows
+        versions = {kind: catalog_cache.generation(scope) for kind, (_m, _f, scope) in SOURCES.items()}
+        stale = [kind for kind in SOURCES if self._versions.get(kind) != versions[kind]]
+        if not stale:
+            return
+        with self._lock:
+            stale = [kind for kind in stale if self._versions.get(kind) != versions[kind]]
+            if stale:
+                self._update({kind: load_entries(kind) for kind in stale})
+                self._versions = {**self._versions, **{kind: versions[kind] for kind in stale}}
+
+    def _update(self, loaded):
+        entries = dict(self._entries)
+        changed = set()
+        for kind, fresh in loaded.items():
+            for key in [key for key in entries if key[0] == kind and key not in fresh]:
+                del entries[key]
+                changed.add(key)
+            for key, entry in fresh.items():
+                current = entries.get(key)
+                if current is None or current.fingerprint != entry.fingerprint:
+                    entries[key] = entry
+                    changed.add(key)
+        if not changed:
+            return
+        postings = [posting for posting in self._postings if posting[1] not in changed]
+        postings.extend((token, key) for key in changed if key in entries for token in entries[key].tokens)
+        # mostly-sorted input: timsort merges the appended run in linear time
+        postings.sort()
+        self._entries, self._postings = entries, postings
+
+    # -- lookups -----------------------------------------------------------
+
+    def _candidates(self, prefix):
+        postings = self._postings
+        start = bisect.bisect_left(postings, (prefix,))
+        for token, key in postings[start:start + MAX_CANDIDATES]:
+            if not token.startswith(prefix):
+                break
+            yield key
+
+    def suggest(self, query, limit=8, language_code=None):
+        """Top ``limit`` entries whose tokens start with every word of ``query``."""
+        words = tokens(query)[:6]
+        if not words:
+            return []
+        entries = self._entries
+        # the longest word is usually the most selective prefix
+        anchor = max(words, key=len)
+        others = [word for word in words if word != anchor]
+        phrase = normalize(query).strip()
+        language_code = language_code or get_language() or settings.LANGUAGE_CODE
+        scored, seen = [], set()
+        for key in self._candidates(anchor):
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = entries.get(key)
+            if entry is None or not all(any(t.startswith(w) for t in entry.tokens) for w in others):
+                continue
+            name = entry.name(language_code)
+            starts = normalize(name).startswith(phrase)
+            scored.append(((not starts, len(name), normalize(name)), entry, name))
+        scored.sort(key=itemgetter(0))
+        return [(entry, name) for _score, entry, name in scored[:limit]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+index = SuggestIndex()
+
+
+def suggest(query, limit=None):
+    """Serialized suggestions for the active language."""
+    index.refresh()
+    limit = limit or _options().get('LIMIT', 8)
+    return [
+        {'kind': entry.kind, 'id': entry.object_id, 'name': name, 'url': entry.url()}
+        for entry, name in index.suggest(query, limit)
+    ]
@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import translation
+
+from designs.models import DesignAsset, DesignCategory
+from products.models import Category, Product
+
+from .index import search_ids
+from .models import SearchDocument
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name="Laptops")
+        self.laptop = Product.objects.create(category=self.cat, name="Gaming Laptop", price=Decimal('10.00'), slug="gaming-laptop")
+        self.mouse = Product.objects.create(category=self.cat, name="Wireless Mouse", price=Decimal('2.00'), slug="wireless-mouse")
+
+    def test_translation_save_updates_index(self):
+        self.assertEqual(search_ids('product', 'lapt'), [str(self.laptop.pk)])
+        self.laptop.set_current_language('uz')
+        self.laptop.name = "Noutbuk"
+        self.laptop.price = Decimal('10.00')
+        self.laptop.save()
+        self.assertEqual(search_ids('product', 'noutbuk'), [str(self.laptop.pk)])
+
+    def test_delete_removes_documents(self):
+        pk = str(self.mouse.pk)
+        self.mouse.delete()
+        self.assertFalse(SearchDocument.objects.filter(object_id=pk).exists())
+        self.assertEqual(search_ids('product', 'mouse'), [])
+
+    def test_store_search_uses_index(self):
+        resp = self.client.get(reverse('store'), {'q': 'wireless'})
+        self.assertContains(resp, "Wireless Mouse")
+        self.assertNotContains(resp, "Gaming Laptop")
+
+    def test_rebuild_command(self):
+        dcat = DesignCategory.objects.create(name="Rooms", type="interior")
+        asset = DesignAsset.objects.create(category=dcat, name="Loft kitchen", description="Warm oak", price=Decimal('3.00'))
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(search_ids('design', 'oak'), [str(asset.pk)])
+        self.assertEqual(search_ids('product', 'gaming'), [str(self.laptop.pk)])
+
+
+@override_settings(SEARCH_SUGGEST={'LIMIT': 8, 'CHECK_INTERVAL': 0})
+class SuggestTests(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name="Laptops")
+        self.laptop = Product.objects.create(category=self.cat, name="Gaming Laptop", price=Decimal('10.00'), slug="gaming-laptop")
+        self.mouse = Product.objects.create(category=self.cat, name="Gaming Mouse", price=Decimal('2.00'), slug="gaming-mouse")
+        dcat = DesignCategory.objects.create(name="Rooms", type="interior")
+        self.asset = DesignAsset.objects.create(category=dcat, name="Gamer room", price=Decimal('3.00'), slug="gamer-room")
+
+    def _names(self, q, **params):
+        data = self.client.get(reverse('search:suggest'), {'q': q, **params}).json()
+        return [r['name'] for r in data['results']]
+
+    def test_prefix_matches_products_and_designs(self):
+        self.assertEqual(self._names('gam'), ["Gamer room", "Gaming Mouse", "Gaming Laptop"])
+        self.assertEqual(self._names('gaming lap'), ["Gaming Laptop"])
+        self.assertEqual(self._names('gam', limit=1), ["Gamer room"])
+
+    def test_lookups_do_not_touch_the_database(self):
+        self._names('gam')
+        with self.assertNumQueries(0):
+            self.assertEqual(self._names('mou'), ["Gaming Mouse"])
+
+    def test_catalog_changes_are_picked_up(self):
+        self.assertEqual(self._names('mou'), ["Gaming Mouse"])
+        self.laptop.set_current_language('uz')
+        self.laptop.name = "Noutbuk"
+        self.laptop.save()
+        self.mouse.is_active = False
+        self.mouse.save()
+        self.assertEqual(self._names('mou'), [])
+        self.assertEqual(self._names('nout'), ["Gaming Laptop"])
+        with translation.override('uz'):
+            data = self.client.get('/uz/search/suggest/', {'q': 'nout'}).json()
+        self.assertEqual(data['results'][0]['name'], "Noutbuk")
+        self.assertTrue(data['results'][0]['url'].startswith('/uz/'))
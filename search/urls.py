@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import suggest_view
+
+app_name = 'search'
+
+urlpatterns = [
+    path('suggest/', suggest_view, name='suggest'),
+]
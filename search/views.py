@@ -0,0 +1,20 @@
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .suggest import suggest
+
+MAX_LIMIT = 20
+
+
+@require_GET
+def suggest_view(request):
+    """Typeahead JSON for the search boxes; served from the in-process index."""
+    query = request.GET.get('q', '')[:100]
+    try:
+        limit = max(1, min(int(request.GET.get('limit', '')), MAX_LIMIT))
+    except ValueError:
+        limit = None
+    response = JsonResponse({'query': query, 'results': suggest(query, limit)})
+    patch_cache_control(response, public=True, max_age=60)
+    return response